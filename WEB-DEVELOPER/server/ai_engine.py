@@ -27,12 +27,16 @@
 ║    start_ai(app)              ← bootstrap                                   ║
 ║    sync_light_state(light)    ← traffic cycle notification                 ║
 ║    get_esp32_status() → dict  ← status for frontend                        ║
+║    get_perf_stats() → dict    ← per-stage latency histograms               ║
+║    get_perf_counters() → dict ← raw _perf counters (/metrics)              ║
+║    get_frame_channel_stats()  ← ingest channel drop counters (/metrics)    ║
 ║                                                                              ║
 ║  app.py PUBLIC API — ai_engine calls these:                                 ║
 ║    app.set_ai_frame(bytes)    ← push detection frame to /laptop_feed       ║
 ║    app.get_current_light()    ← read traffic light state                   ║
 ║    app.update_ai_context()    ← update context + emit WebSocket            ║
 ║    app.process_violation()    ← save violation to DB + emit                ║
+║    app.save_violation_clip()  ← store evidence clip, attach to violation   ║
 ║                                                                              ║
 ║  VERSION HISTORY:                                                            ║
 ║    v5.0  YOLOv8 + EasyOCR + MQTT + ESP32 frame receiver                  ║
@@ -46,14 +50,30 @@
 """
 
 import cv2
+import os
 import time
+import abc
 import json
-import base64
+import atexit
+import struct
 import logging
 import logging.handlers
+import math
 import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import queue
 import re
+import sys
+import tempfile
+import types
 import numpy as np
+from collections import deque
+
+import engine_child
+import frame_ingest
+from frame_channel import FrameChannel, POLICIES as FRAME_CHANNEL_POLICIES
+from frame_ingest import DEFAULT_CAMERA_ID, TOPIC_ESP32_FRAME
 from pathlib import Path
 from datetime import datetime
 
@@ -72,6 +92,20 @@ except ImportError:
     _EASYOCR_AVAILABLE = False
     easyocr = None
 
+try:
+    import onnxruntime as ort
+    _ORT_AVAILABLE = True
+except ImportError:
+    _ORT_AVAILABLE = False
+    ort = None
+
+try:
+    import openvino as ov
+    _OPENVINO_AVAILABLE = True
+except ImportError:
+    _OPENVINO_AVAILABLE = False
+    ov = None
+
 try:
     import paho.mqtt.client as mqtt
     _MQTT_AVAILABLE = True
@@ -100,7 +134,12 @@ MQTT_KEEPALIVE = 60
 TOPIC_CONTEXT     = "traffic/ai/context"
 TOPIC_VIOLATION   = "traffic/ai/violation"
 TOPIC_TRAFFIC_ST  = "traffic/light/state"
-TOPIC_ESP32_FRAME = "traffic/esp32/frame"
+
+# ESP32-CAM frames (traffic/esp32/frame[/<cam_id>], DEFAULT_CAMERA_ID for the
+# bare topic) are subscribed once by app's MQTT client and delivered through
+# frame_ingest.INGEST → _ingest_esp32_frame; ai_engine's client does not
+# subscribe to them.
+LOCAL_CAMERA_ID       = "laptop_cam"       # webcam / demo fallback source
 
 # YOLO COCO class IDs
 VEHICLE_CLASSES = {2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
@@ -112,16 +151,133 @@ ROI_RATIO_BOTTOM = 0.90
 ROI_RATIO_LEFT   = 0.04
 ROI_RATIO_RIGHT  = 0.96
 
+# Per-camera ROI override: {cam_id: (top, bottom, left, right)} ratios.
+# Cameras not listed use the ROI_RATIO_* defaults above.
+CAMERA_ROI: dict[str, tuple[float, float, float, float]] = {}
+
 # Detection config
 CONF_THRESHOLD     = 0.45   # YOLO confidence threshold
 OCR_MIN_CHARS      = 4      # Vietnamese plate min 4 chars
 CAPTURE_INTERVAL   = 0.5    # 500ms capture throttle
+FRAME_JPEG_QUALITY = 85     # one encode per annotated frame: live stream + evidence
 MAX_VEHICLES       = 6      # ESP32 optimization limit
 PLATE_THROTTLE_SEC = 30     # Same plate: skip for 30s
+ESP32_FRAME_MAX_AGE = 2.0   # Camera considered active if frame < 2s old
+ESP32_FRAME_WAIT    = 0.25  # max block waiting for a new ESP32 frame (stop/light checks)
+
+# Per-camera ingest channel (MQTT → detection): capacity 1 + drop_oldest =
+# analyze the newest frame; a larger queue smooths bursts; "block" holds the
+# MQTT thread up to INGEST_BLOCK_SEC. Drops = frames that were never analyzed.
+INGEST_CAPACITY  = int(os.getenv("AI_INGEST_QUEUE", "1"))
+INGEST_POLICY    = os.getenv("AI_INGEST_POLICY", "drop_oldest").strip().lower()
+INGEST_BLOCK_SEC = 0.2
+
+# Camera admission — cam ids come from the (public) broker via the topic suffix
+# or "CAM:" header, and every slot costs a clip ring, an ingest channel, a
+# tracker and a share of each YOLO batch. Only esp32_cam_<n> ids (or the ids in
+# AI_CAMERA_IDS when set) get a slot, at most MAX_CAMERAS of them; frames from
+# any other id are dropped before anything is allocated.
+MAX_CAMERAS           = int(os.getenv("AI_MAX_CAMERAS", "3"))
+CAMERA_ALLOWLIST      = frozenset(frame_ingest.normalize_camera_id(c)
+                                  for c in os.getenv("AI_CAMERA_IDS", "").split(",") if c.strip())
+CAMERA_REJECT_LOG_SEC = 30.0   # at most one "rejected camera" warning per interval
+_ESP32_CAM_ID_RE      = re.compile(r"^esp32_cam_\d{1,3}$")
+
+# Detection scheduler — ticks are paced to a target rate (0 = as fast as frames
+# arrive / inference allows) and woken early by light changes and new frames.
+DETECTION_TARGET_FPS = float(os.getenv("AI_TARGET_FPS", "30"))
+IDLE_RECHECK_SEC     = 0.5    # GREEN: re-read light at least this often (direct app writes)
+
+# Reduced-size JPEG decode for detection (libjpeg DCT scaling): XGA 1024x768
+# → 512x384 at 2, YOLO letterboxes to 640 anyway. OCR crops and the violation
+# evidence image come from a full-resolution decode of the original bytes,
+# done by the OCR worker (only for frames with a violation).
+ESP32_DECODE_REDUCE   = int(os.getenv("AI_DECODE_REDUCE", "2"))   # 1 | 2 | 4 | 8
+DECODE_BASELINE_EVERY = 100   # also time a full decode every Nth frame (savings report)
+_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Inference backend for YOLO — "torch" (ultralytics), "onnx" (ONNX Runtime CPU)
+# or "openvino" (OpenVINO IR, CPU). Exported models are cached in MODEL_CACHE_DIR.
+INFERENCE_BACKEND = os.getenv("AI_INFERENCE_BACKEND", "torch").strip().lower()
+INFERENCE_THREADS = int(os.getenv("AI_INFERENCE_THREADS", "0"))   # intra-op threads, 0 = runtime default
+YOLO_WEIGHTS      = "yolov8n.pt"
+YOLO_IMGSZ        = 640
+YOLO_IOU          = 0.7      # NMS IoU — same default as ultralytics predict()
+MODEL_CACHE_DIR   = Path(os.getenv("AI_MODEL_CACHE", str(Path(__file__).resolve().parent / "models")))
+
+# Motion gate — skip YOLO when the ROI band has not changed since the last
+# inference and reuse that inference's detections instead.
+MOTION_GATE_ENABLED  = os.getenv("AI_MOTION_GATE", "1").lower() in ("1", "true", "yes")
+MOTION_DOWNSCALE_W   = 160     # ROI band is downscaled to this width before differencing
+MOTION_PIXEL_DELTA   = 18      # gray-level change for a pixel to count as "moving"
+MOTION_THRESHOLD     = float(os.getenv("AI_MOTION_THRESHOLD", "0.01"))  # moving-pixel fraction
+MOTION_MAX_SKIP_SEC  = 1.0     # force a YOLO refresh at least this often
+
+# Vehicle tracker (IoU + centroid, SORT-style) — one violation/OCR job per track
+TRACK_IOU_MIN        = 0.30    # min IoU to continue a track
+TRACK_CENTROID_RATIO = 0.60    # fallback: centroid shift < ratio × track size
+TRACK_MAX_MISSED     = 5       # YOLO runs without a match before a track is dropped
+TRACK_MIN_HITS       = 2       # matches needed before a track may trigger a violation
+
+# Plate localization — find the plate rectangle inside the vehicle crop so OCR
+# (CRAFT text detector + recognizer) only sees that tight region.
+PLATE_LOCALIZE        = os.getenv("AI_PLATE_LOCALIZE", "1").lower() in ("1", "true", "yes")
+PLATE_LOC_MAX_W       = 320          # crop downscaled to this width for the search
+PLATE_ASPECT_RANGE    = (1.0, 6.0)   # w/h — 2-line motorbike ≈1.3, 1-line car ≈4.5
+PLATE_AREA_RANGE      = (0.004, 0.25)  # plate area / crop area
+PLATE_PAD_RATIO       = 0.12         # padding kept around the found plate
+
+# Plate preprocessing profile applied to the (localized) crop before OCR:
+#   accurate — cubic upscale, bilateral filter, adaptive threshold, closing (binarized)
+#   fast     — grayscale + CLAHE on a crop resized to PLATE_FAST_HEIGHT (no bilateral)
+#   none     — crop passed to EasyOCR unchanged
+# Compare per deployment with benchmarks/bench_plate_preprocess.py.
+PLATE_PREPROCESS      = os.getenv("AI_PLATE_PREPROCESS", "accurate").strip().lower()
+PLATE_FAST_HEIGHT     = 64           # EasyOCR recognizer input height
+PLATE_CLAHE_CLIP      = 2.0
+PLATE_CLAHE_TILES     = (4, 4)
+
+# OCR worker pool — violations are OCR'd + saved off the detection thread
+OCR_WORKERS    = int(os.getenv("AI_OCR_WORKERS", "2"))
+OCR_QUEUE_SIZE = int(os.getenv("AI_OCR_QUEUE_SIZE", "16"))   # frames with violations; full → dropped
+OCR_BATCH_MAX  = int(os.getenv("AI_OCR_BATCH_MAX", str(MAX_VEHICLES)))  # crops per batched OCR call
+
+# Violation evidence clips — per-camera ring of recent JPEG frames (the bytes
+# ingest / the live stream already hold, never re-encoded), cut into a
+# CLIP_PRE_SEC → CLIP_POST_SEC clip around each violation by a background builder
+CLIP_ENABLED    = os.getenv("AI_CLIP_ENABLED", "1").lower() in ("1", "true", "yes")
+CLIP_PRE_SEC    = float(os.getenv("AI_CLIP_PRE_SEC", "3"))
+CLIP_POST_SEC   = float(os.getenv("AI_CLIP_POST_SEC", "2"))
+CLIP_RING_BYTES = int(float(os.getenv("AI_CLIP_RING_MB", "8")) * 1024 * 1024)   # per camera
+CLIP_FORMAT     = os.getenv("AI_CLIP_FORMAT", "mjpeg").strip().lower()   # mjpeg | mp4
+CLIP_QUEUE_SIZE = 32       # pending clips; full → violation saved without a clip
 
 # Camera — ai_engine uses webcam as fallback when no ESP32
 CAMERA_SOURCE = 0   # VideoCapture(0) — same as app.py Camera Laptop
 
+# Engine mode — "thread": detection runs inside the app process (default);
+# "process": detection + OCR run in a child process (own GIL). ESP32 frames go
+# in and annotated frames come out through shared-memory rings; violations,
+# context and status come back over a queue.
+ENGINE_MODE            = os.getenv("AI_ENGINE_MODE", "thread").strip().lower()
+SHM_RING_SLOTS         = int(os.getenv("AI_SHM_RING_SLOTS", "8"))
+SHM_SLOT_BYTES         = int(os.getenv("AI_SHM_SLOT_KB", "512")) * 1024   # max JPEG size
+ENGINE_STATUS_INTERVAL = 1.0     # child → parent status snapshot period (s)
+ENGINE_RESULT_QUEUE    = 256     # child → parent message queue bound
+ENGINE_STOP_JOIN_SEC   = 2.0     # child: wait for its worker threads on stop
+
+# Per-stage latency histograms — log-spaced buckets, STAGE_HIST_PER_OCTAVE per
+# doubling from STAGE_HIST_MIN_MS (4/octave ≈ ±9% resolution, 0.01 ms … ~170 s)
+STAGE_NAMES           = ("decode", "yolo", "draw", "encode", "ocr", "process_violation", "tick")
+STAGE_HIST_MIN_MS     = 0.01
+STAGE_HIST_PER_OCTAVE = 4
+STAGE_HIST_BUCKETS    = 96
+
 # ════════════════════════════════════════════════════════════════════════════
 # GLOBAL STATE
 # ════════════════════════════════════════════════════════════════════════════
@@ -129,12 +285,15 @@ CAMERA_SOURCE = 0   # VideoCapture(0) — same as app.py Camera Laptop
 # Traffic light state (synced from app.py via sync_light_state())
 _current_light = "RED"
 _light_lock    = threading.Lock()
+_light_version    = 0      # bumped on every change, under _frame_cond (wakes the scheduler)
+_light_changed_at = 0.0    # perf_counter() of the last change
 
-# ESP32 connection tracking
+# ESP32 connection tracking — one frame slot per camera (see _CameraSlot)
 _esp32_ever_connected = threading.Event()
-_esp32_last_frame_ts  = 0.0
-_esp32_frame_lock     = threading.Lock()
-_esp32_latest_frame: bytes | None = None
+_esp32_last_frame_ts  = 0.0                 # newest frame from ANY camera
+_esp32_frame_lock     = threading.RLock()    # re-entrant: ingest channels share _frame_cond
+_frame_cond           = threading.Condition(_esp32_frame_lock)  # notified on every ingest
+_cameras: "dict[str, _CameraSlot]" = {}     # {cam_id: slot}, guarded by _esp32_frame_lock
 
 # Plate throttle: {plate_text: last_process_ts}
 _plate_seen: dict[str, float] = {}
@@ -143,11 +302,26 @@ _plate_lock = threading.Lock()
 # AI models (loaded once, background thread)
 _vehicle_model = None
 _ocr_reader    = None
-_models_ready  = threading.Event()
+_models_ready  = threading.Event()   # both loaders finished (model may still be None)
+_yolo_ready    = threading.Event()   # detector loaded + warmed up (or unavailable → demo)
+_ocr_ready     = threading.Event()   # OCR reader loaded + warmed up (or unavailable)
+_startup_t0    = 0.0                 # perf_counter() when model loading began
+_startup_timing: dict[str, float] = {}   # phase → seconds, guarded by _perf_lock
+
+# OCR job queue (bounded) — one item per frame = list of violation jobs,
+# filled by _handle_violations, drained in batches by _ocr_worker
+_ocr_queue: "queue.Queue[list[dict]]" = queue.Queue(maxsize=OCR_QUEUE_SIZE)
+
+# Evidence clip requests (due_ts, _ClipTicket) → _clip_builder
+_clip_queue: "queue.Queue[tuple]" = queue.Queue(maxsize=CLIP_QUEUE_SIZE)
+_clip_seq = 0              # clip name suffix, detection thread only
 
 # MQTT client
 _ai_mqtt: "mqtt.Client | None" = None  # type: ignore
 
+# Process mode — parent: handle on the engine child; child: link back to parent
+_engine: "_EngineProcess | None" = None
+
 # Stop signal
 _stop_event = threading.Event()
 
@@ -155,17 +329,153 @@ _stop_event = threading.Event()
 _perf = {
     "total_frames":       0,
     "detection_frames":   0,
+    "detection_batches":  0,
+    "motion_inferred":    0,     # frames sent to YOLO by the motion gate
+    "motion_skipped":     0,     # static frames → previous detections reused
+    "tracks_created":     0,
+    "tracks_reported":    0,     # tracks that produced their one violation job
     "violations_found":   0,
     "ocr_success":        0,
     "ocr_fail":           0,
+    "plate_loc_hit":      0,     # plate rectangle found → tight crop OCR'd
+    "plate_loc_miss":     0,     # not found → whole vehicle crop OCR'd
+    "plate_loc_ms_total": 0.0,
+    "plate_prep_calls":   0,
+    "plate_prep_ms_total": 0.0,
+    "ocr_ms_total":       0.0,
+    "ocr_calls":          0,     # crops OCR'd
+    "ocr_batches":        0,     # EasyOCR calls (one per batch of crops)
+    "ocr_enqueued":       0,
+    "ocr_processed":      0,
+    "ocr_dropped":        0,     # OCR queue full → violation lost
+    "ocr_wait_ms_total":  0.0,
+    "ocr_wait_ms_max":    0.0,
+    "clip_requested":     0,
+    "clip_built":         0,
+    "clip_dropped":       0,     # clip queue full → violation without a clip
+    "clip_failed":        0,     # no frames in the window / mp4 writer error
+    "clip_cancelled":     0,     # every violation of the frame throttled → clip not kept
+    "clip_ms_total":      0.0,
+    "clip_bytes_total":   0,
     "esp32_frames":       0,
+    "camera_rejected":    0,     # frames from unknown / over-cap camera ids (dropped)
+    "duplicate_frames_avoided": 0,   # already-decoded ESP32 frames a later tick did not re-decode
+    "decode_count":       0,     # ESP32 JPEG decodes for detection
+    "decode_ms_total":    0.0,
+    "decode_bytes_total": 0,     # decoded BGR bytes actually allocated
+    "decode_bytes_saved": 0,     # vs. full-resolution decode
+    "full_decode_samples":  0,   # baseline full-res decodes (every DECODE_BASELINE_EVERY)
+    "full_decode_ms_total": 0.0,
+    "evidence_decodes":   0,     # full-res decodes for OCR crops (OCR worker)
+    "frame_waits":        0,     # detection loop blocked for a new ESP32 frame
     "webcam_frames":      0,
     "demo_frames":        0,
+    "frame_encodes":      0,     # annotated-frame JPEG encodes (stream + evidence share one)
     "detection_fps":      0.0,
+    "sched_ticks":        0,
+    "sched_lag_ms_total": 0.0,   # tick start vs. its scheduled time
+    "sched_lag_ms_max":   0.0,
+    "sched_overruns":     0,     # tick work longer than 1 / DETECTION_TARGET_FPS
+    "light_wake_ms_last": 0.0,   # light change → first detection tick
     "last_fps_ts":        0.0,
     "last_fps_count":     0,
 }
 _perf_lock = threading.Lock()
+# _perf keys that are point-in-time values; every other number is a monotonic
+# total (app's /metrics exports those as counters). last_* are internal.
+PERF_GAUGE_KEYS = frozenset({"detection_fps", "ocr_wait_ms_max", "sched_lag_ms_max", "light_wake_ms_last"})
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# STAGE LATENCY HISTOGRAMS
+# ════════════════════════════════════════════════════════════════════════════
+
+class _LatencyHistogram:
+    """
+    Bounded log-bucketed latency histogram (ms). record() is O(1) and keeps
+    no samples; percentiles are read from bucket upper bounds (capped at the
+    observed max), so they are accurate to one bucket width.
+    """
+    __slots__ = ("counts", "n", "total_ms", "max_ms", "_lock")
+
+    def __init__(self):
+        self.counts   = [0] * STAGE_HIST_BUCKETS
+        self.n        = 0
+        self.total_ms = 0.0
+        self.max_ms   = 0.0
+        self._lock    = threading.Lock()
+
+    def record(self, ms: float):
+        if ms > STAGE_HIST_MIN_MS:
+            idx = min(STAGE_HIST_BUCKETS - 1,
+                      int(math.log2(ms / STAGE_HIST_MIN_MS) * STAGE_HIST_PER_OCTAVE) + 1)
+        else:
+            idx = 0
+        with self._lock:
+            self.counts[idx] += 1
+            self.n           += 1
+            self.total_ms    += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    @staticmethod
+    def _upper_ms(idx: int) -> float:
+        return STAGE_HIST_MIN_MS * 2 ** (idx / STAGE_HIST_PER_OCTAVE)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, n, total, mx = list(self.counts), self.n, self.total_ms, self.max_ms
+        out = {"n": n, "mean_ms": round(total / n, 3) if n else 0.0, "max_ms": round(mx, 3)}
+        for name, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            if not n:
+                out[name] = 0.0
+                continue
+            rank, seen = q * n, 0
+            for idx, c in enumerate(counts):
+                seen += c
+                if seen >= rank:
+                    out[name] = round(min(self._upper_ms(idx), mx), 3)
+                    break
+        return out
+
+
+_stages = {name: _LatencyHistogram() for name in STAGE_NAMES}
+_stage_cost_us: float | None = None     # measured cost of one timed sample (see _stage_overhead)
+
+
+def _stage_time(stage: str, t0: float):
+    """Record perf_counter() - t0 into the stage histogram."""
+    _stages[stage].record((time.perf_counter() - t0) * 1000)
+
+
+def _stage_overhead(stats: dict) -> dict:
+    """
+    Instrumentation cost: one perf_counter() pair + record(), measured once
+    on a scratch histogram, times the samples taken on the detection thread,
+    as a share of the measured tick time.
+    """
+    global _stage_cost_us
+    if _stage_cost_us is None:
+        h, n = _LatencyHistogram(), 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            t = time.perf_counter()
+            h.record((time.perf_counter() - t) * 1000)
+        _stage_cost_us = (time.perf_counter() - t0) / n * 1e6
+    tick = stats["tick"]
+    samples = sum(stats[k]["n"] for k in ("decode", "yolo", "draw", "encode", "tick"))
+    tick_ms = tick["mean_ms"] * tick["n"]
+    return {
+        "cost_us_per_sample": round(_stage_cost_us, 3),
+        "pct_of_tick":        round(samples * _stage_cost_us / 1000 / tick_ms * 100, 3) if tick_ms else 0.0,
+    }
+
+
+def _stage_stats() -> dict:
+    """{stage: {n, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} + instrumentation overhead."""
+    stats = {name: h.snapshot() for name, h in _stages.items()}
+    stats["overhead"] = _stage_overhead(stats)
+    return stats
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -177,11 +487,17 @@ def sync_light_state(light: str):
     PUBLIC API — app.py calls this every time traffic light changes.
     ai_engine activates detection when RED/YELLOW, pauses when GREEN.
     """
-    global _current_light
+    global _current_light, _light_version, _light_changed_at
     with _light_lock:
         old = _current_light
         _current_light = light.upper()
+    if _engine is not None:
+        _engine.send_light(_current_light)
     if old != _current_light:
+        with _frame_cond:
+            _light_version   += 1
+            _light_changed_at = time.perf_counter()
+            _frame_cond.notify_all()
         active = "🔴 ACTIVE" if _current_light in ("RED", "YELLOW") else "⚪ IDLE"
         log.info("🚦 Light sync: %s → %s | Detection: %s", old, _current_light, active)
 
@@ -190,28 +506,139 @@ def get_esp32_status() -> dict:
     """
     PUBLIC API — app.py calls this to get AI/ESP32 status for frontend.
     Returns serializable dict (no non-primitive types).
+    In process mode the detection fields come from the engine child's last
+    status snapshot, merged with this process's MQTT / ingest state.
+    """
+    if _engine is not None:
+        return _engine.status(_local_status())
+    return _local_status()
+
+
+def get_perf_stats() -> dict:
+    """
+    PUBLIC API — per-stage latency histograms (decode, yolo, draw, encode,
+    ocr, process_violation, tick) with the scheduler and decode summaries.
+    """
+    st = get_esp32_status()
+    return {
+        "detection_fps": st["detection_fps"],
+        "stages":        st["stages"],
+        "scheduler":     st["scheduler"],
+        "decode":        st["decode"],
+        "engine":        st["engine"],
+    }
+
+
+def get_perf_counters() -> dict:
+    """
+    PUBLIC API — raw _perf counters (numbers only), for app's /metrics.
+    In process mode: the engine child's counters from its last status snapshot.
+    """
+    if _engine is not None:
+        return _engine.perf_counters()
+    with _perf_lock:
+        return dict(_perf)
+
+
+def get_frame_channel_stats() -> list[dict]:
     """
+    PUBLIC API — per-camera ingest channel counters (enqueued / consumed /
+    dropped = never analyzed), for app's /metrics. Process mode: the child's.
+    """
+    if _engine is not None:
+        return _engine.frame_channels()
+    with _esp32_frame_lock:
+        slots = [s for cid, s in sorted(_cameras.items()) if cid != LOCAL_CAMERA_ID]
+    return [s.ingest.stats() for s in slots]
+
+
+def _local_status() -> dict:
+    """Status of the detection state held in this process."""
     now = time.time()
     with _perf_lock:
         p = dict(_perf)
+    with _esp32_frame_lock:
+        cameras = {cid: slot.status(now) for cid, slot in sorted(_cameras.items())}
     return {
         "ever_connected":   _esp32_ever_connected.is_set(),
         "demo_mode":        not _esp32_ever_connected.is_set(),
         "last_frame_age":   round(now - _esp32_last_frame_ts, 1) if _esp32_last_frame_ts else None,
         "models_ready":     _models_ready.is_set(),
+        "yolo_ready":       _yolo_ready.is_set(),
+        "ocr_ready":        _ocr_ready.is_set(),
+        "startup_timing":   _startup_timing_snapshot(),
         "yolo_available":   _YOLO_AVAILABLE,
+        "inference_backend": _vehicle_model.name if _vehicle_model is not None else None,
+        "inference_threads": INFERENCE_THREADS,
         "ocr_available":    _EASYOCR_AVAILABLE,
         "mqtt_available":   _MQTT_AVAILABLE,
         "mqtt_connected":   _ai_mqtt is not None and _ai_mqtt.is_connected(),
         "detection_fps":    round(p["detection_fps"], 1),
         "total_frames":     p["total_frames"],
+        "duplicate_frames_avoided": p["duplicate_frames_avoided"],
+        "decode":           _decode_stats(p),
+        "stages":           _stage_stats(),
+        "scheduler": {
+            "target_fps":    DETECTION_TARGET_FPS,
+            "ticks":         p["sched_ticks"],
+            "lag_ms_avg":    round(p["sched_lag_ms_total"] / max(1, p["sched_ticks"]), 2),
+            "lag_ms_max":    round(p["sched_lag_ms_max"], 1),
+            "overruns":      p["sched_overruns"],
+            "light_wake_ms": round(p["light_wake_ms_last"], 2),
+        },
         "violations_found": p["violations_found"],
+        "motion_inferred":  p["motion_inferred"],
+        "motion_skipped":   p["motion_skipped"],
+        "tracks_created":   p["tracks_created"],
+        "tracks_reported":  p["tracks_reported"],
+        "yolo_skip_rate":   round(p["motion_skipped"] / max(1, p["motion_skipped"] + p["motion_inferred"]) * 100, 1),
         "ocr_success_rate": round(p["ocr_success"] / max(1, p["ocr_success"] + p["ocr_fail"]) * 100, 1),
         "frame_source":     "ESP32-CAM" if _esp32_ever_connected.is_set() else "WEBCAM/DEMO",
+        "plate_loc_hit_rate": round(p["plate_loc_hit"] / max(1, p["plate_loc_hit"] + p["plate_loc_miss"]) * 100, 1),
+        "plate_loc_ms_avg": round(p["plate_loc_ms_total"] / max(1, p["plate_loc_hit"] + p["plate_loc_miss"]), 2),
+        "plate_preprocess": PLATE_PREPROCESS,
+        "plate_prep_ms_avg": round(p["plate_prep_ms_total"] / max(1, p["plate_prep_calls"]), 2),
+        "ocr_ms_avg":       round(p["ocr_ms_total"] / max(1, p["ocr_calls"]), 1),
+        "ocr_queue": {
+            "depth":       _ocr_queue.qsize(),
+            "capacity":    OCR_QUEUE_SIZE,
+            "workers":     OCR_WORKERS,
+            "enqueued":    p["ocr_enqueued"],
+            "processed":   p["ocr_processed"],
+            "dropped":     p["ocr_dropped"],
+            "wait_ms_avg": round(p["ocr_wait_ms_total"] / max(1, p["ocr_processed"]), 1),
+            "wait_ms_max": round(p["ocr_wait_ms_max"], 1),
+            "batch_max":   OCR_BATCH_MAX,
+            "crops_per_batch": round(p["ocr_calls"] / max(1, p["ocr_batches"]), 2),
+        },
+        "clips":            _clip_stats(p, cameras),
+        "frame_channels":   [c["ingest"] for cid, c in cameras.items() if cid != LOCAL_CAMERA_ID],
+        "active_cameras":   sum(1 for c in cameras.values() if c["active"]),
+        "camera_admission": {"max": MAX_CAMERAS, "allowlist": sorted(CAMERA_ALLOWLIST),
+                             "rejected_frames": p["camera_rejected"]},
+        "cameras":          cameras,
+        "engine":           {"mode": "thread", "pid": os.getpid()},
         "version":          "6.0",
     }
 
 
+def _decode_stats(p: dict) -> dict:
+    """Per-frame decode time / memory for detection vs. the sampled full-res baseline."""
+    n       = max(1, p["decode_count"])
+    ms_avg  = p["decode_ms_total"] / n
+    full_ms = p["full_decode_ms_total"] / p["full_decode_samples"] if p["full_decode_samples"] else None
+    return {
+        "reduce":           ESP32_DECODE_REDUCE,
+        "frames":           p["decode_count"],
+        "ms_avg":           round(ms_avg, 2),
+        "full_ms_avg":      round(full_ms, 2) if full_ms is not None else None,
+        "ms_saved_avg":     round(full_ms - ms_avg, 2) if full_ms is not None else None,
+        "kb_per_frame":     round(p["decode_bytes_total"] / n / 1024, 1),
+        "kb_saved_per_frame": round(p["decode_bytes_saved"] / n / 1024, 1),
+        "evidence_decodes": p["evidence_decodes"],
+    }
+
+
 def start_ai(app_instance):
     """
     PUBLIC API — app.py calls this in _bootstrap().
@@ -228,16 +655,33 @@ def start_ai(app_instance):
     app_instance.ai_sync_light   = sync_light_state
     app_instance.ai_esp32_status = get_esp32_status
 
+    # ESP32 frames arrive through app's MQTT subscription (one per process);
+    # in process mode _ingest_esp32_frame forwards them into the shm ring
+    frame_ingest.INGEST.subscribe("ai_engine", _ingest_esp32_frame)
+
+    if ENGINE_MODE == "process":
+        _start_engine_process()
+        return
+
     # Thread 1: Load models (background, non-blocking)
     threading.Thread(target=_load_models_worker, name="AI-ModelLoader", daemon=True).start()
 
-    # Thread 2: MQTT — receive ESP32-CAM frames
+    # Thread 2: MQTT — light sync + violation / context publish
     threading.Thread(target=_mqtt_worker, name="AI-MQTT", daemon=True).start()
 
     # Thread 3: Main detection loop
     threading.Thread(target=_detection_loop, name="AI-Detection", daemon=True).start()
 
-    log.info("✅ AI Engine threads started: ModelLoader + MQTT + Detection")
+    # Thread 4..N: OCR worker pool (plate OCR + save, off the detection thread)
+    for i in range(max(1, OCR_WORKERS)):
+        threading.Thread(target=_ocr_worker, name=f"AI-OCR-{i + 1}", daemon=True).start()
+
+    # Thread N+1: evidence clip builder (pre/post-roll around each violation)
+    if CLIP_ENABLED:
+        threading.Thread(target=_clip_builder, name="AI-Clips", daemon=True).start()
+
+    log.info("✅ AI Engine threads started: ModelLoader + MQTT + Detection + OCR×%d%s",
+             max(1, OCR_WORKERS), " + Clips" if CLIP_ENABLED else "")
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -248,103 +692,194 @@ class _AppRef:
     """
     Holds runtime reference to app.py module functions.
     All calls to app.py go through this class.
-    Import happens at runtime (not module load) → no circular import.
+    set() resolves the app module and binds its callables once (at start_ai,
+    not module load → no circular import); per-frame calls are plain calls.
+    The light is read lock-free from _current_light, which app keeps current
+    through sync_light_state() on every change.
+    In the engine child process (AI_ENGINE_MODE=process) calls are forwarded
+    to the parent through `_remote` (an _EngineChildLink) instead.
     """
-    _app = None
+    _app    = None
+    _remote = None
+    _process_violation = None
+    _set_ai_frame      = None
+    _update_ai_context = None
+    _save_violation_clip = None
 
     @classmethod
     def set(cls, app):
+        """
+        Bind app's callbacks. `app` is the Flask instance (its module is
+        found through import_name — "__main__" when started as a script, so
+        no second copy of app.py gets imported) or the app module itself.
+        """
         cls._app = app
+        module = app if isinstance(app, types.ModuleType) else \
+            sys.modules.get(getattr(app, "import_name", ""))
+        if module is None or not hasattr(module, "process_violation"):
+            try:
+                import app as module
+            except ImportError:
+                log.error("Cannot import app — violations / frames / context will be lost")
+                return
+        cls._process_violation = getattr(module, "process_violation", None)
+        cls._set_ai_frame      = getattr(module, "set_ai_frame", None)
+        cls._update_ai_context = getattr(module, "update_ai_context", None)
+        cls._save_violation_clip = getattr(module, "save_violation_clip", None)
+        missing = [n for n, f in (("process_violation", cls._process_violation),
+                                  ("set_ai_frame", cls._set_ai_frame),
+                                  ("update_ai_context", cls._update_ai_context),
+                                  ("save_violation_clip", cls._save_violation_clip)) if f is None]
+        if missing:
+            log.error("app module %s lacks: %s", module.__name__, ", ".join(missing))
 
     @classmethod
     def process_violation(cls, payload: dict):
         """Call app.process_violation() — save + emit violation."""
-        if cls._app is None:
+        if cls._remote is not None:
+            cls._remote.send_violation(payload)
+            return
+        if cls._process_violation is None:
             log.warning("AppRef not set — violation lost: %s", payload.get("plate"))
             return
+        t0 = time.perf_counter()
         try:
-            import app as _app_module
-            if hasattr(_app_module, "process_violation"):
-                _app_module.process_violation(payload)
-            else:
-                log.error("process_violation() not found in app — lost: %s", payload.get("plate"))
-        except ImportError:
-            log.error("Cannot import app — violation lost: %s", payload.get("plate"))
+            cls._process_violation(payload)
         except Exception as e:
             log.error("process_violation error: %s | plate=%s", e, payload.get("plate"))
+        _stage_time("process_violation", t0)
 
     @classmethod
-    def get_light(cls) -> str:
-        """
-        Read traffic light state via app.get_current_light().
-        Falls back to local _current_light cache if app not available.
-        """
-        if cls._app is not None:
-            try:
-                import app as _app_module
-                if hasattr(_app_module, "get_current_light"):
-                    return _app_module.get_current_light()
-            except Exception:
-                pass
-        # Fallback: local cache synced via sync_light_state()
-        with _light_lock:
-            return _current_light
-
-    @classmethod
-    def push_frame(cls, frame: np.ndarray):
-        """Push detection frame to app's Camera Laptop stream (/laptop_feed)."""
-        if cls._app is None:
+    def save_clip(cls, clip_name: str, data: bytes):
+        """Call app.save_violation_clip() — store the clip, attach it to its violation."""
+        if cls._remote is not None:
+            cls._remote.send_clip(clip_name, data)
+            return
+        if cls._save_violation_clip is None:
+            log.debug("AppRef not set — clip lost: %s", clip_name)
             return
         try:
-            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if not ok:
-                return
-            import app as _app_module
-            if hasattr(_app_module, "set_ai_frame"):
-                _app_module.set_ai_frame(buf.tobytes())
+            cls._save_violation_clip(clip_name, data)
         except Exception as e:
-            log.debug("push_frame error: %s", e)
+            log.error("save_violation_clip error: %s | clip=%s", e, clip_name)
+
+    @staticmethod
+    def get_light() -> str:
+        """Current traffic light — lock-free read of the value sync_light_state() replaces."""
+        return _current_light
+
+    @classmethod
+    def push_frame(cls, jpeg: bytes | None):
+        """Push an encoded detection frame to app's Camera Laptop stream (/laptop_feed)."""
+        if not jpeg:
+            return
+        if cls._remote is not None:
+            cls._remote.push_frame(jpeg)
+            return
+        if cls._set_ai_frame is not None:
+            try:
+                cls._set_ai_frame(jpeg)
+            except Exception as e:
+                log.debug("push_frame error: %s", e)
 
     @classmethod
     def update_context(cls, vehicles: int, fps: float, **kw):
         """Update AI context in app — triggers WebSocket emit."""
-        try:
-            import app as _app_module
-            if hasattr(_app_module, "update_ai_context"):
-                _app_module.update_ai_context(vehicles=vehicles, fps=fps, **kw)
-        except Exception as e:
-            log.debug("update_context error: %s", e)
+        if cls._remote is not None:
+            cls._remote.send_context(vehicles, fps, kw)
+            return
+        if cls._update_ai_context is not None:
+            try:
+                cls._update_ai_context(vehicles=vehicles, fps=fps, **kw)
+            except Exception as e:
+                log.debug("update_context error: %s", e)
 
 
 # ════════════════════════════════════════════════════════════════════════════
 # MODEL LOADER
 # ════════════════════════════════════════════════════════════════════════════
 
+def _startup_mark(phase: str, t0: float | None = None):
+    """Record a startup phase: duration since t0, or time since loading began."""
+    now = time.perf_counter()
+    with _perf_lock:
+        _startup_timing[phase] = round(now - (t0 if t0 is not None else _startup_t0), 3)
+
+
+def _startup_timing_snapshot() -> dict:
+    with _perf_lock:
+        return dict(_startup_timing)
+
+
 def _load_models_worker():
-    """Load YOLOv8 + EasyOCR in background thread. Sets _models_ready when done."""
-    global _vehicle_model, _ocr_reader
+    """
+    Load YOLOv8 and EasyOCR concurrently (one thread each), warm both up on a
+    dummy frame / plate crop, then set _models_ready. _yolo_ready and
+    _ocr_ready are set as each one finishes, so detection starts as soon as
+    the detector is up. Blocks until both are done.
+    """
+    global _startup_t0
+    _startup_t0 = time.perf_counter()
+    log.info("📦 Loading AI models (background, YOLO ∥ OCR)...")
+
+    loaders = [threading.Thread(target=_load_yolo, name="AI-Load-YOLO", daemon=True),
+               threading.Thread(target=_load_ocr,  name="AI-Load-OCR",  daemon=True)]
+    for t in loaders:
+        t.start()
+    for t in loaders:
+        t.join()
+
+    _startup_mark("models_ready_s")
+    _models_ready.set()
+    timing = _startup_timing_snapshot()
+    log.info("=" * 60)
+    log.info("🚀 AI Models ready | YOLO=%-8s | OCR=%-8s | %.1fs",
+             "✅ OK" if _vehicle_model else "❌ OFF",
+             "✅ OK" if _ocr_reader  else "❌ OFF", timing.get("models_ready_s", 0.0))
+    log.info("   Startup: %s", "  ".join(f"{k}={v}" for k, v in timing.items()))
+    log.info("=" * 60)
 
-    log.info("📦 Loading AI models (background)...")
 
-    # ── YOLOv8 ──────────────────────────────────────────────────────────────
-    if _YOLO_AVAILABLE:
+def _load_yolo():
+    """YOLOv8 (torch / ONNX Runtime / OpenVINO backend) + warm-up inference."""
+    global _vehicle_model
+    try:
+        if not _YOLO_AVAILABLE:
+            log.warning("⚠️  ultralytics not installed → YOLO detection disabled")
+            log.warning("   Install: pip install ultralytics")
+            return
         try:
-            model_path = Path("yolov8n.pt")
-            if not model_path.exists():
-                log.info("   yolov8n.pt not found locally → will download from Ultralytics hub (~6MB)")
-            _vehicle_model = YOLO(str(model_path) if model_path.exists() else "yolov8n.pt")
-            log.info("✅ YOLOv8n loaded | COCO classes: %d | Vehicle targets: car, motorcycle",
-                     len(_vehicle_model.names))
+            t0 = time.perf_counter()
+            model = _create_yolo_backend(INFERENCE_BACKEND, INFERENCE_THREADS)
+            _startup_mark("yolo_load_s", t0)
+            log.info("✅ YOLOv8n loaded | backend=%s threads=%s | COCO classes: %d | "
+                     "Vehicle targets: car, motorcycle",
+                     model.name, INFERENCE_THREADS or "auto", len(model.names))
         except Exception as e:
             log.error("❌ YOLOv8 load failed: %s", e)
             log.error("   Fix: pip install ultralytics")
-            _vehicle_model = None
-    else:
-        log.warning("⚠️  ultralytics not installed → YOLO detection disabled")
-        log.warning("   Install: pip install ultralytics")
+            return
+        # First inference allocates buffers / picks kernels — do it before the first real frame
+        try:
+            t0 = time.perf_counter()
+            model.infer([_demo_background().copy()])
+            _startup_mark("yolo_warmup_s", t0)
+        except Exception as e:
+            log.warning("⚠️  YOLO warm-up failed: %s", e)
+        _vehicle_model = model
+    finally:
+        _startup_mark("yolo_ready_s")
+        _yolo_ready.set()
 
-    # ── EasyOCR — Vietnamese + English plate recognition ────────────────────
-    if _EASYOCR_AVAILABLE:
+
+def _load_ocr():
+    """EasyOCR (Vietnamese + English plates) + warm-up readtext on a synthetic plate."""
+    global _ocr_reader
+    try:
+        if not _EASYOCR_AVAILABLE:
+            log.warning("⚠️  easyocr not installed → OCR disabled (plates will show as UNKNOWN)")
+            log.warning("   Install: pip install easyocr")
+            return
         try:
             _easyocr_dir = Path.home() / ".EasyOCR" / "model"
             _craft       = _easyocr_dir / "craft_mlt_25k.pth"
@@ -360,109 +895,495 @@ def _load_models_worker():
 
             # lang=['en'] sufficient for Vietnamese plates (alphanumeric only)
             # Add 'vi' for full Vietnamese text if needed
-            _ocr_reader = easyocr.Reader(
+            t0 = time.perf_counter()
+            reader = easyocr.Reader(
                 ['en'],
                 gpu=False,           # Set True if CUDA available
                 verbose=False,
                 download_enabled=True,
             )
+            _startup_mark("ocr_load_s", t0)
             log.info("✅ EasyOCR loaded (lang=en, gpu=False, cached=%s)", _cached)
             log.info("   Supports: Vietnamese plates (51B-12345), Foreign plates (alphanumeric)")
         except Exception as e:
             log.error("❌ EasyOCR load failed: %s", e)
             log.error("   Fix: pip install easyocr")
-            _ocr_reader = None
+            return
+        try:
+            t0 = time.perf_counter()
+            plate = np.full((48, 180, 3), 235, dtype=np.uint8)
+            cv2.putText(plate, "51A 12345", (8, 34), cv2.FONT_HERSHEY_SIMPLEX, 0.9,
+                        (20, 20, 20), 2, cv2.LINE_AA)
+            reader.readtext(_preprocess_plate_crop(plate), detail=1, paragraph=False)
+            _startup_mark("ocr_warmup_s", t0)
+        except Exception as e:
+            log.warning("⚠️  OCR warm-up failed: %s", e)
+        _ocr_reader = reader
+    finally:
+        _startup_mark("ocr_ready_s")
+        _ocr_ready.set()
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# YOLO INFERENCE BACKENDS — torch / ONNX Runtime / OpenVINO
+# ════════════════════════════════════════════════════════════════════════════
+#
+# Every backend exposes:
+#   .name                → "torch" | "onnx" | "openvino"
+#   .names               → {cls_id: cls_name}
+#   .infer(frames)       → one _DET_DTYPE structured array per frame
+#
+# ONNX / OpenVINO copies of yolov8n are exported once with ultralytics and
+# cached in MODEL_CACHE_DIR; pre/post-processing (letterbox, decode, NMS)
+# is done here so the CPU runtime's thread count can be controlled.
+#
+
+# Detections travel as one compact structured array per frame (no per-box
+# Python objects): filtering, ROI tests and tracking are array operations.
+_DET_DTYPE = np.dtype([("cls", np.int16), ("conf", np.float32), ("box", np.float32, (4,))])
+_TARGET_CLASS_IDS = np.array(sorted(TARGET_CLASSES), dtype=np.int16)
+
+
+def _make_detections(cls: np.ndarray, conf: np.ndarray, xyxy: np.ndarray) -> np.ndarray:
+    """(N,) class ids, (N,) scores, (N,4) boxes → (N,) _DET_DTYPE array."""
+    dets = np.empty(len(cls), dtype=_DET_DTYPE)
+    dets["cls"]  = cls
+    dets["conf"] = conf
+    dets["box"]  = xyxy
+    return dets
+
+
+def _filter_detections(dets: np.ndarray) -> np.ndarray:
+    """Keep TARGET_CLASSES with conf ≥ CONF_THRESHOLD (one boolean mask)."""
+    return dets[np.isin(dets["cls"], _TARGET_CLASS_IDS) & (dets["conf"] >= CONF_THRESHOLD)]
+
+
+def _in_roi_mask(boxes: np.ndarray, roi: tuple[int, int, int, int]) -> np.ndarray:
+    """(N,4) xyxy boxes → (N,) bool: box centroid inside the (x1, y1, x2, y2) ROI."""
+    cx = (boxes[:, 0] + boxes[:, 2]) // 2
+    cy = (boxes[:, 1] + boxes[:, 3]) // 2
+    return (cx >= roi[0]) & (cx <= roi[2]) & (cy >= roi[1]) & (cy <= roi[3])
+
+
+class _TorchYoloBackend:
+    """Ultralytics PyTorch model (original path)."""
+    name = "torch"
+
+    def __init__(self, weights: str, threads: int = 0):
+        if threads > 0:
+            try:
+                import torch
+                torch.set_num_threads(threads)
+            except Exception as e:
+                log.debug("torch.set_num_threads(%d) failed: %s", threads, e)
+        model_path = Path(weights)
+        if not model_path.exists():
+            log.info("   %s not found locally → will download from Ultralytics hub (~6MB)", weights)
+        self.model = YOLO(weights)
+        self.names = dict(self.model.names)
+
+    def infer(self, frames: list[np.ndarray]) -> list[np.ndarray]:
+        results = self.model(frames, verbose=False, conf=CONF_THRESHOLD, iou=YOLO_IOU)
+        batch = []
+        for r in results:
+            boxes = r.boxes
+            if boxes is None or len(boxes) == 0:
+                batch.append(np.empty(0, dtype=_DET_DTYPE))
+                continue
+            # One device→host copy per tensor instead of three per box
+            batch.append(_make_detections(boxes.cls.cpu().numpy(),
+                                          boxes.conf.cpu().numpy(),
+                                          np.trunc(boxes.xyxy.cpu().numpy())))
+        return batch
+
+
+class _ExportedYoloBackend(abc.ABC):
+    """Letterbox pre-processing + YOLOv8 head decoding + NMS for exported models."""
+    name = "exported"
+
+    def __init__(self, names: dict[int, str], imgsz: int = YOLO_IMGSZ):
+        self.names = names
+        self.imgsz = imgsz
+
+    @abc.abstractmethod
+    def _forward(self, blob: np.ndarray) -> np.ndarray:
+        """(N, 3, S, S) float32 → (N, 4 + num_classes, anchors) raw head output."""
+
+    def _letterbox(self, frame: np.ndarray) -> tuple[np.ndarray, float, int, int]:
+        h, w = frame.shape[:2]
+        r = min(self.imgsz / h, self.imgsz / w)
+        nw, nh = int(round(w * r)), int(round(h * r))
+        pad_x, pad_y = (self.imgsz - nw) // 2, (self.imgsz - nh) // 2
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        canvas[pad_y:pad_y + nh, pad_x:pad_x + nw] = cv2.resize(
+            frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        return canvas, r, pad_x, pad_y
+
+    def infer(self, frames: list[np.ndarray]) -> list[np.ndarray]:
+        metas, imgs = [], []
+        for f in frames:
+            img, r, px, py = self._letterbox(f)
+            imgs.append(img)
+            metas.append((r, px, py, f.shape[1], f.shape[0]))
+        blob = cv2.dnn.blobFromImages(imgs, scalefactor=1 / 255.0, swapRB=True)
+        out  = self._forward(blob)
+        return [self._decode(out[i], *meta) for i, meta in enumerate(metas)]
+
+    def _decode(self, pred: np.ndarray, r: float, pad_x: int, pad_y: int,
+                w: int, h: int) -> np.ndarray:
+        pred   = pred.T                                  # (anchors, 4 + nc)
+        scores = pred[:, 4:]
+        cls    = scores.argmax(axis=1)
+        conf   = scores[np.arange(len(cls)), cls]
+        keep   = conf >= CONF_THRESHOLD
+        if not keep.any():
+            return np.empty(0, dtype=_DET_DTYPE)
+        boxes, cls, conf = pred[keep, :4], cls[keep], conf[keep]
+
+        # cx,cy,w,h (letterboxed) → x1,y1,x2,y2 (original frame)
+        xyxy = np.empty_like(boxes)
+        xyxy[:, 0] = (boxes[:, 0] - boxes[:, 2] / 2 - pad_x) / r
+        xyxy[:, 1] = (boxes[:, 1] - boxes[:, 3] / 2 - pad_y) / r
+        xyxy[:, 2] = (boxes[:, 0] + boxes[:, 2] / 2 - pad_x) / r
+        xyxy[:, 3] = (boxes[:, 1] + boxes[:, 3] / 2 - pad_y) / r
+        np.clip(xyxy[:, 0::2], 0, w, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, h, out=xyxy[:, 1::2])
+
+        xywh = np.column_stack([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]])
+        idx  = cv2.dnn.NMSBoxesBatched(xywh.tolist(), conf.tolist(), cls.tolist(),
+                                       CONF_THRESHOLD, YOLO_IOU)
+        idx = np.asarray(idx, dtype=int).reshape(-1)[:300]
+        return _make_detections(cls[idx], conf[idx], np.trunc(xyxy[idx]))
+
+
+class _OnnxYoloBackend(_ExportedYoloBackend):
+    """ONNX Runtime, CPUExecutionProvider."""
+    name = "onnx"
+
+    def __init__(self, model_path: Path, names: dict[int, str], threads: int = 0):
+        super().__init__(names)
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.execution_mode           = ort.ExecutionMode.ORT_SEQUENTIAL
+        if threads > 0:
+            so.intra_op_num_threads = threads
+            so.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), sess_options=so,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _forward(self, blob: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class _OpenVinoYoloBackend(_ExportedYoloBackend):
+    """OpenVINO IR on CPU, latency hint."""
+    name = "openvino"
+
+    def __init__(self, model_path: Path, names: dict[int, str], threads: int = 0):
+        super().__init__(names)
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads > 0:
+            config["INFERENCE_NUM_THREADS"] = threads
+        self.compiled = ov.Core().compile_model(str(model_path), "CPU", config)
+        self.output   = self.compiled.output(0)
+
+    def _forward(self, blob: np.ndarray) -> np.ndarray:
+        return self.compiled(blob)[self.output]
+
+
+def _export_yolo(fmt: str) -> tuple[Path, dict[int, str]]:
+    """
+    Export yolov8n to fmt ("onnx" | "openvino") once, cache in MODEL_CACHE_DIR.
+    Returns (model file, class names). Class names are kept in a JSON sidecar
+    so a cache hit does not need to load the torch model.
+    """
+    import shutil
+
+    MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    stem   = Path(YOLO_WEIGHTS).stem
+    target = MODEL_CACHE_DIR / (f"{stem}.onnx" if fmt == "onnx"
+                                else f"{stem}_openvino_model/{stem}.xml")
+    names_file = MODEL_CACHE_DIR / f"{stem}.names.json"
+
+    if target.exists() and names_file.exists():
+        names = {int(k): v for k, v in json.loads(names_file.read_text()).items()}
+        log.info("✅ Cached %s model: %s", fmt, target)
+        return target, names
+
+    log.info("📦 Exporting %s → %s (one-time, cached in %s)...", YOLO_WEIGHTS, fmt, MODEL_CACHE_DIR)
+    t0 = time.time()
+    model    = YOLO(YOLO_WEIGHTS)
+    exported = Path(model.export(format=fmt, imgsz=YOLO_IMGSZ, dynamic=True, verbose=False))
+    if fmt == "onnx":
+        shutil.move(str(exported), str(target))
     else:
-        log.warning("⚠️  easyocr not installed → OCR disabled (plates will show as UNKNOWN)")
-        log.warning("   Install: pip install easyocr")
+        shutil.rmtree(target.parent, ignore_errors=True)
+        shutil.move(str(exported), str(target.parent))
+    names = dict(model.names)
+    names_file.write_text(json.dumps({str(k): v for k, v in names.items()}))
+    log.info("✅ Exported %s model in %.1fs: %s", fmt, time.time() - t0, target)
+    return target, names
+
+
+def _create_yolo_backend(backend: str = INFERENCE_BACKEND, threads: int = INFERENCE_THREADS):
+    """Build the requested YOLO backend; falls back to torch if its runtime is missing."""
+    if backend == "onnx" and not _ORT_AVAILABLE:
+        log.warning("⚠️  onnxruntime not installed → falling back to torch backend")
+        log.warning("   Install: pip install onnxruntime")
+        backend = "torch"
+    elif backend == "openvino" and not _OPENVINO_AVAILABLE:
+        log.warning("⚠️  openvino not installed → falling back to torch backend")
+        log.warning("   Install: pip install openvino")
+        backend = "torch"
+    elif backend not in ("torch", "onnx", "openvino"):
+        log.warning("⚠️  Unknown AI_INFERENCE_BACKEND=%r → using torch", backend)
+        backend = "torch"
+
+    if backend == "onnx":
+        path, names = _export_yolo("onnx")
+        return _OnnxYoloBackend(path, names, threads)
+    if backend == "openvino":
+        path, names = _export_yolo("openvino")
+        return _OpenVinoYoloBackend(path, names, threads)
+    return _TorchYoloBackend(YOLO_WEIGHTS, threads)
 
-    _models_ready.set()
-    log.info("=" * 60)
-    log.info("🚀 AI Models ready | YOLO=%-8s | OCR=%-8s",
-             "✅ OK" if _vehicle_model else "❌ OFF",
-             "✅ OK" if _ocr_reader  else "❌ OFF")
-    log.info("=" * 60)
+
+# ════════════════════════════════════════════════════════════════════════════
+# CAMERA SLOTS — one latest-frame slot per ESP32-CAM
+# ════════════════════════════════════════════════════════════════════════════
+
+
+if INGEST_POLICY not in FRAME_CHANNEL_POLICIES:
+    log.warning("⚠️  Unknown AI_INGEST_POLICY=%r — using 'drop_oldest' (choices: %s)",
+                INGEST_POLICY, ", ".join(FRAME_CHANNEL_POLICIES))
+    INGEST_POLICY = "drop_oldest"
+
+
+class _CameraSlot:
+    """
+    Ingest channel + per-camera counters for one camera.
+    Frames go MQTT thread → `ingest` (FrameChannel on _frame_cond, so the
+    detection loop waits on all cameras at once) → detection thread;
+    frame_ts / frames_received are written by the MQTT thread under
+    _esp32_frame_lock; analysis counters by the detection thread;
+    `violations` by OCR workers under _perf_lock.
+    """
+
+    def __init__(self, cam_id: str):
+        self.cam_id          = cam_id
+        self.ingest          = FrameChannel(f"ingest:{cam_id}", INGEST_CAPACITY, INGEST_POLICY,
+                                            cond=_frame_cond)
+        self.frame_ts        = 0.0
+        self.frames_received = 0
+        # Source of the frame analyzed this tick (detection thread): original
+        # JPEG + decode reduction factor, so evidence can be cut at full res.
+        self.jpeg: bytes | None = None
+        self.decode_scale    = 1
+        self.decoded_seq     = 0     # ingest seq of the last decoded frame
+        self.dup_seq         = 0     # decoded_seq already counted in duplicate_frames_avoided
+        self.frames_analyzed = 0
+        self.violations      = 0
+        self.vehicles        = 0
+        self.fps             = 0.0
+        self.last_capture_ts = 0.0
+        self.roi             = CAMERA_ROI.get(
+            cam_id, (ROI_RATIO_TOP, ROI_RATIO_BOTTOM, ROI_RATIO_LEFT, ROI_RATIO_RIGHT))
+        self._fps_ts         = time.time()
+        self._fps_count      = 0
+        # Motion gate state (detection thread only)
+        self.motion_ref: np.ndarray | None = None   # ROI band at last YOLO run
+        self.motion_energy   = 0.0
+        self.last_detections: np.ndarray | None = None   # _DET_DTYPE
+        self.last_infer_ts   = 0.0
+        # Tracker state (detection thread only)
+        self.tracker         = _VehicleTracker()
+        self.tracks: "list[_Track]" = []            # visible tracks after last YOLO run
+        # Evidence clip ring (own lock): ingest thread for ESP32, detection thread for local
+        self.clip_ring       = _ClipRing()
+
+    def roi_box(self, w: int, h: int) -> tuple[int, int, int, int]:
+        """ROI in pixels for a w×h frame → (x1, y1, x2, y2)."""
+        top, bottom, left, right = self.roi
+        return int(w * left), int(h * top), int(w * right), int(h * bottom)
+
+    def mark_analyzed(self, now: float):
+        """Count one analyzed frame, refresh FPS every 3s."""
+        self.frames_analyzed += 1
+        self._fps_count += 1
+        elapsed = now - self._fps_ts
+        if elapsed >= 3.0:
+            self.fps = self._fps_count / elapsed
+            self._fps_ts, self._fps_count = now, 0
+
+    def is_fresh(self, now: float) -> bool:
+        return self.frame_ts > 0 and (now - self.frame_ts) < ESP32_FRAME_MAX_AGE
+
+    def has_new_frame(self) -> bool:
+        return len(self.ingest) > 0
+
+    def status(self, now: float) -> dict:
+        age = now - self.frame_ts if self.frame_ts else None
+        top, bottom, left, right = self.roi
+        return {
+            "active":          age is not None and age < ESP32_FRAME_MAX_AGE,
+            "last_frame_age":  round(age, 1) if age is not None else None,
+            "frame_seq":       self.ingest.seq,
+            "fps":             round(self.fps, 1),
+            "frames_received": self.frames_received,
+            "frames_analyzed": self.frames_analyzed,
+            "vehicles":        self.vehicles,
+            "violations":      self.violations,
+            "motion_energy":   round(self.motion_energy, 4),
+            "tracks_active":   len(self.tracks),
+            "clip_ring":       self.clip_ring.stats(),
+            "ingest":          self.ingest.stats(),
+            "roi":             {"top": top, "bottom": bottom, "left": left, "right": right},
+        }
+
+
+_camera_reject_log_ts = 0.0
+_camera_reject_logged = 0      # _perf["camera_rejected"] at the last warning
+
+
+def _camera_id_allowed(cam_id: str) -> bool:
+    """AI_CAMERA_IDS membership when set, else the esp32_cam_<n> shape."""
+    if CAMERA_ALLOWLIST:
+        return cam_id in CAMERA_ALLOWLIST
+    return bool(_ESP32_CAM_ID_RE.match(cam_id))
+
+
+def _reject_camera(cam_id: str, reason: str):
+    """Count a dropped frame; warn at most once per CAMERA_REJECT_LOG_SEC."""
+    global _camera_reject_log_ts, _camera_reject_logged
+    now = time.time()
+    with _perf_lock:
+        _perf["camera_rejected"] += 1
+        total = _perf["camera_rejected"]
+        if now - _camera_reject_log_ts < CAMERA_REJECT_LOG_SEC:
+            return
+        since, _camera_reject_log_ts, _camera_reject_logged = total - _camera_reject_logged, now, total
+    log.warning("⚠️  Dropped frames from camera %r (%s) — %d rejected frame(s) since last report",
+                cam_id[:40], reason, since)
+
+
+def _get_camera_slot(cam_id: str) -> _CameraSlot | None:
+    """
+    Return (create if needed) the slot for cam_id, or None when a new ESP32
+    slot would exceed MAX_CAMERAS. Caller holds _esp32_frame_lock.
+    """
+    slot = _cameras.get(cam_id)
+    if slot is None:
+        if cam_id != LOCAL_CAMERA_ID and \
+                sum(1 for c in _cameras if c != LOCAL_CAMERA_ID) >= MAX_CAMERAS:
+            return None
+        slot = _cameras[cam_id] = _CameraSlot(cam_id)
+        if cam_id != LOCAL_CAMERA_ID:
+            log.info("📷 New camera slot: %s (total ESP32 cameras: %d)",
+                     cam_id, sum(1 for c in _cameras if c != LOCAL_CAMERA_ID))
+    return slot
+
+
+def _ingest_esp32_frame(cam_id: str, frame_bytes: bytes):
+    """
+    Put frame_bytes into cam_id's ingest channel (its policy decides what
+    a full channel drops), which wakes the detection loop.
+    Process mode (parent): forward into the engine child's shared-memory ring.
+    """
+    global _esp32_last_frame_ts
+    if not _camera_id_allowed(cam_id):
+        _reject_camera(cam_id, "unknown id")
+        return
+    now = time.time()
+    if _engine is not None:
+        # Process mode (parent): the engine child owns the camera slots (+ the cap)
+        _engine.push_frame(cam_id, frame_bytes, now)
+        _esp32_last_frame_ts = now
+    else:
+        with _frame_cond:
+            slot = _get_camera_slot(cam_id)
+            if slot is None:
+                _reject_camera(cam_id, f"over AI_MAX_CAMERAS={MAX_CAMERAS}")
+                return
+            slot.frame_ts = now
+            slot.frames_received += 1
+            _esp32_last_frame_ts = now
+        slot.ingest.put(frame_bytes, timeout=INGEST_BLOCK_SEC)   # notifies _frame_cond
+        if CLIP_ENABLED:
+            slot.clip_ring.append(now, frame_bytes)
+
+    with _perf_lock:
+        _perf["esp32_frames"] += 1
+
+    # First ESP32 frame → switch DEMO → REAL
+    if not _esp32_ever_connected.is_set():
+        _esp32_ever_connected.set()
+        log.info("🎉 ═══════════════════════════════════════════════════")
+        log.info("🎉  ESP32-CAM CONNECTED (%s) — switching to REAL mode!", cam_id)
+        log.info("🎉  Camera Live now using ESP32-CAM frames via MQTT")
+        log.info("🎉  Camera Laptop continues independently (app.py)")
+        log.info("🎉 ═══════════════════════════════════════════════════")
 
 
 # ════════════════════════════════════════════════════════════════════════════
 # MQTT WORKER — receive ESP32-CAM frames
 # ════════════════════════════════════════════════════════════════════════════
 
+def _on_mqtt_message(client, userdata, msg):
+    """
+    MQTT on_message: traffic light sync. Frame messages only reach it from a
+    direct feed (mqtt_replay) — live frames come through frame_ingest.
+    """
+    if frame_ingest.is_frame_topic(msg.topic):
+        try:
+            cam_id, jpeg, _ = frame_ingest.parse_frame_message(msg.topic, msg.payload)
+            _ingest_esp32_frame(cam_id, jpeg)
+        except Exception as e:
+            log.debug("ESP32 frame decode error [%s]: %s", msg.topic, e)
+
+    elif msg.topic == TOPIC_TRAFFIC_ST:
+        try:
+            d = json.loads(msg.payload.decode())
+            l = d.get("light", "").upper()
+            if l in ("RED", "YELLOW", "GREEN"):
+                sync_light_state(l)
+        except Exception:
+            pass
+
+
 def _mqtt_worker():
     """
     MQTT client for ai_engine:
-    - Subscribes to traffic/esp32/frame → receives ESP32-CAM JPEG frames
     - Subscribes to traffic/light/state → syncs traffic light
+    - Publishes violations + context (_publish_violation / _publish_context)
     - Auto-reconnects on disconnect
-
-    When first ESP32 frame arrives → _esp32_ever_connected.set()
-    → detection_loop switches from webcam/demo to ESP32-CAM frames
+    ESP32-CAM frames are not subscribed here: app's client owns that
+    subscription and frame_ingest hands each frame to _ingest_esp32_frame.
     """
     global _ai_mqtt
 
     if not _MQTT_AVAILABLE:
-        log.warning("⚠️  paho-mqtt not available → ESP32 frame reception disabled")
+        log.warning("⚠️  paho-mqtt not available → light sync / violation publish disabled")
         log.warning("   Install: pip install paho-mqtt")
         return
 
     def on_connect(client, userdata, flags, rc):
         if rc == 0:
             client.subscribe([
-                (TOPIC_ESP32_FRAME, 0),   # QoS 0 for high-freq video frames
-                (TOPIC_TRAFFIC_ST,  1),   # QoS 1 for reliable light sync
+                (TOPIC_TRAFFIC_ST,      1),   # QoS 1 for reliable light sync
             ])
-            log.info("✅ AI-MQTT connected → %s:%d | Subscribed ESP32 frame + traffic topics",
+            log.info("✅ AI-MQTT connected → %s:%d | Subscribed traffic light topic",
                      MQTT_HOST, MQTT_PORT)
         else:
             log.warning("AI-MQTT connect failed rc=%d — retry pending", rc)
 
-    def on_message(client, userdata, msg):
-        global _esp32_latest_frame, _esp32_last_frame_ts
-
-        if msg.topic == TOPIC_ESP32_FRAME:
-            try:
-                pl = msg.payload
-                # Handle both raw JPEG and base64-encoded JPEG
-                if pl[:2] in (b"//", b"/9", b"iV"):
-                    frame_bytes = base64.b64decode(pl)
-                else:
-                    frame_bytes = bytes(pl)
-
-                with _esp32_frame_lock:
-                    _esp32_latest_frame  = frame_bytes
-                    _esp32_last_frame_ts = time.time()
-
-                with _perf_lock:
-                    _perf["esp32_frames"] += 1
-
-                # First ESP32 frame → switch DEMO → REAL
-                if not _esp32_ever_connected.is_set():
-                    _esp32_ever_connected.set()
-                    log.info("🎉 ═══════════════════════════════════════════════════")
-                    log.info("🎉  ESP32-CAM CONNECTED — switching to REAL mode!")
-                    log.info("🎉  Camera Live now using ESP32-CAM frames via MQTT")
-                    log.info("🎉  Camera Laptop continues independently (app.py)")
-                    log.info("🎉 ═══════════════════════════════════════════════════")
-
-            except Exception as e:
-                log.debug("ESP32 frame decode error: %s", e)
-
-        elif msg.topic == TOPIC_TRAFFIC_ST:
-            try:
-                d = json.loads(msg.payload.decode())
-                l = d.get("light", "").upper()
-                if l in ("RED", "YELLOW", "GREEN"):
-                    sync_light_state(l)
-            except Exception:
-                pass
-
     def on_disconnect(client, userdata, rc):
         if rc != 0:
             log.warning("AI-MQTT disconnected rc=%d — auto-reconnect in loop_forever", rc)
 
     client = mqtt.Client(client_id=f"AI-Engine-v6-{int(time.time())}")
     client.on_connect    = on_connect
-    client.on_message    = on_message
+    client.on_message    = _on_mqtt_message
     client.on_disconnect = on_disconnect
 
     retry_delay = 5
@@ -526,30 +1447,61 @@ def _open_laptop_camera() -> "cv2.VideoCapture | None":
     return cap
 
 
-def _get_frame(cap) -> "np.ndarray | None":
+def _get_frames(cap) -> list[tuple[_CameraSlot, np.ndarray]]:
     """
-    Get next frame for detection. Priority:
-    1. ESP32-CAM frame (if fresh < 2s) — REAL mode
+    Get the freshest frame of every active source for one detection tick.
+    Priority:
+    1. ESP32-CAM frames (every camera with a frame < ESP32_FRAME_MAX_AGE) — REAL mode
+       Each camera's ingest channel yields its next unanalyzed frame; when no
+       camera has one, block on _frame_cond (≤ ESP32_FRAME_WAIT) for the next
+       ingest or light change.
     2. Laptop webcam (if open) — DEMO mode with real camera
     3. Animated demo frame — DEMO mode, no camera
+    Returns [(slot, frame), ...] — empty only if ESP32 cameras are active but
+    sent nothing new within ESP32_FRAME_WAIT (or the light changed meanwhile).
     """
     now = time.time()
 
-    # 1. ESP32-CAM frame (highest priority when connected)
-    with _esp32_frame_lock:
-        esp32_bytes = _esp32_latest_frame
-        esp32_age   = now - _esp32_last_frame_ts if _esp32_last_frame_ts else 999
+    # 1. ESP32-CAM frames (highest priority when connected)
+    with _frame_cond:
+        active = [slot for _, slot in sorted(_cameras.items()) if slot.is_fresh(now)]
+        if active and not any(s.has_new_frame() for s in active):
+            with _perf_lock:
+                _perf["frame_waits"] += 1
+            v0 = _light_version
+            _frame_cond.wait_for(lambda: _light_version != v0 or _stop_event.is_set()
+                                 or any(s.has_new_frame() for s in active),
+                                 timeout=ESP32_FRAME_WAIT)
+        fresh, dup = [], 0
+        for slot in active:
+            jpeg = slot.ingest.get_nowait()
+            if jpeg is not None:
+                fresh.append((slot, jpeg, slot.ingest.read_seq))
+            elif slot.ingest.seq == slot.decoded_seq != slot.dup_seq:
+                # newest frame is the one already decoded: a latest-frame reader
+                # would decode + infer it again — counted once per frame
+                slot.dup_seq = slot.decoded_seq
+                dup += 1
+    if dup:
+        with _perf_lock:
+            _perf["duplicate_frames_avoided"] += dup
+
+    frames = []
+    for slot, esp32_bytes, seq in fresh:
+        frame = _decode_for_detection(esp32_bytes)
+        if frame is not None:
+            slot.jpeg, slot.decode_scale, slot.decoded_seq = esp32_bytes, ESP32_DECODE_REDUCE, seq
+            frames.append((slot, frame))
+    if frames:
+        with _perf_lock:
+            _perf["total_frames"] += len(frames)
+        return frames
+    if active and not fresh:
+        return []
 
-    if esp32_bytes and esp32_age < 2.0:
-        try:
-            arr   = np.frombuffer(esp32_bytes, dtype=np.uint8)
-            frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-            if frame is not None:
-                with _perf_lock:
-                    _perf["total_frames"] += 1
-                return frame
-        except Exception:
-            pass
+    with _esp32_frame_lock:
+        local = _get_camera_slot(LOCAL_CAMERA_ID)
+    local.jpeg, local.decode_scale = None, 1
 
     # 2. Laptop webcam fallback (when no ESP32)
     if cap and cap.isOpened():
@@ -558,13 +1510,51 @@ def _get_frame(cap) -> "np.ndarray | None":
             with _perf_lock:
                 _perf["webcam_frames"] += 1
                 _perf["total_frames"]  += 1
-            return frame
+            return [(local, frame)]
 
     # 3. Animated demo frame
     frame = _generate_demo_frame()
     with _perf_lock:
         _perf["demo_frames"] += 1
         _perf["total_frames"] += 1
+    return [(local, frame)]
+
+
+def _decode_for_detection(jpeg: bytes) -> np.ndarray | None:
+    """
+    Decode an ESP32 JPEG at 1/ESP32_DECODE_REDUCE size for detection.
+    Every DECODE_BASELINE_EVERY frames a full decode is timed too, so the
+    status report can show the time saved per frame.
+    """
+    arr = np.frombuffer(jpeg, dtype=np.uint8)
+    try:
+        t0    = time.perf_counter()
+        frame = cv2.imdecode(arr, _DECODE_FLAGS.get(ESP32_DECODE_REDUCE, cv2.IMREAD_COLOR))
+        dt_ms = (time.perf_counter() - t0) * 1000
+    except Exception:
+        return None
+    if frame is None:
+        return None
+    _stages["decode"].record(dt_ms)
+
+    full_ms = None
+    with _perf_lock:
+        n = _perf["decode_count"]
+    if ESP32_DECODE_REDUCE > 1 and n % DECODE_BASELINE_EVERY == 0:
+        t0 = time.perf_counter()
+        cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        full_ms = (time.perf_counter() - t0) * 1000
+
+    h, w = frame.shape[:2]
+    s = ESP32_DECODE_REDUCE
+    with _perf_lock:
+        _perf["decode_count"]       += 1
+        _perf["decode_ms_total"]    += dt_ms
+        _perf["decode_bytes_total"] += frame.nbytes
+        _perf["decode_bytes_saved"] += (h * s) * (w * s) * 3 - frame.nbytes
+        if full_ms is not None:
+            _perf["full_decode_samples"]  += 1
+            _perf["full_decode_ms_total"] += full_ms
     return frame
 
 
@@ -579,19 +1569,26 @@ _demo_state = {
 }
 
 
-def _generate_demo_frame() -> np.ndarray:
+_DEMO_W, _DEMO_H = 1280, 720
+_demo_bg: np.ndarray | None = None   # static layers, built once by _demo_background()
+
+
+def _demo_background() -> np.ndarray:
     """
-    High-quality animated demo frame for Camera Live detection.
-    Shows realistic road scene with moving vehicles + license plates.
-    Used when no ESP32 AND no webcam available.
+    Static demo layers (sky gradient, road, lane lines, watermark) rendered
+    once; _generate_demo_frame() only draws the moving vehicles on top.
     """
-    W, H = 1280, 720
+    global _demo_bg
+    if _demo_bg is not None:
+        return _demo_bg
+    W, H = _DEMO_W, _DEMO_H
     frame = np.zeros((H, W, 3), dtype=np.uint8)
 
     # ── Background: sky + road ───────────────────────────────────
-    for y in range(int(H * 0.55)):
-        v = int(28 - (y / (H * 0.55)) * 18)
-        frame[y, :] = (max(4,v-2), max(8,v), max(16,v+4))
+    sky_h = int(H * 0.55)
+    v = (28 - (np.arange(sky_h) / (H * 0.55)) * 18).astype(np.int32)
+    frame[:sky_h] = np.stack([np.maximum(4, v - 2), np.maximum(8, v),
+                              np.maximum(16, v + 4)], axis=1)[:, None, :].astype(np.uint8)
 
     cv2.rectangle(frame, (0, int(H*0.55)), (W, H), (20, 26, 34), -1)
 
@@ -601,6 +1598,31 @@ def _generate_demo_frame() -> np.ndarray:
     # Road edges
     cv2.line(frame, (0, int(H*0.58)), (W, int(H*0.58)), (35, 45, 55), 1)
 
+    # Watermark sits above the road → vehicles never overlap it
+    # ── DEMO watermark ───────────────────────────────────────────
+    cv2.putText(frame, "DEMO MODE — CAMERA LIVE",
+                (int(W*0.24), int(H*0.38)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (12, 24, 48), 3, cv2.LINE_AA)
+    cv2.putText(frame, "Connect ESP32-CAM via MQTT to go LIVE",
+                (int(W*0.22), int(H*0.44)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.62, (20, 60, 120), 1, cv2.LINE_AA)
+
+    frame.flags.writeable = False
+    _demo_bg = frame
+    return frame
+
+
+def _generate_demo_frame() -> np.ndarray:
+    """
+    High-quality animated demo frame for Camera Live detection.
+    Shows realistic road scene with moving vehicles + license plates.
+    Used when no ESP32 AND no webcam available.
+    Returns a fresh array (the frame is annotated and may back a violation's
+    evidence after this tick), copied from the prebuilt static background.
+    """
+    W, H = _DEMO_W, _DEMO_H
+    frame = _demo_background().copy()
+
     # ── Animated vehicles ────────────────────────────────────────
     t = time.time()
 
@@ -645,14 +1667,6 @@ def _generate_demo_frame() -> np.ndarray:
     cv2.putText(frame, "ABC 1234", (vx3-24, vy3+17),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.30, (20, 20, 20), 1)
 
-    # ── DEMO watermark ───────────────────────────────────────────
-    cv2.putText(frame, "DEMO MODE — CAMERA LIVE",
-                (int(W*0.24), int(H*0.38)),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (12, 24, 48), 3, cv2.LINE_AA)
-    cv2.putText(frame, "Connect ESP32-CAM via MQTT to go LIVE",
-                (int(W*0.22), int(H*0.44)),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.62, (20, 60, 120), 1, cv2.LINE_AA)
-
     return frame
 
 
@@ -660,36 +1674,33 @@ def _generate_demo_frame() -> np.ndarray:
 # YOLO DETECTION
 # ════════════════════════════════════════════════════════════════════════════
 
-def _run_yolo(frame: np.ndarray) -> list[tuple]:
+def _run_yolo(frame: np.ndarray) -> np.ndarray:
     """
-    Run YOLOv8 on frame. Returns list of (cls_id, cls_name, conf, x1, y1, x2, y2).
+    Run YOLOv8 on frame. Returns a _DET_DTYPE array (fields cls, conf, box=xyxy).
     Falls back to demo detections if model not available.
     """
-    if _vehicle_model is not None:
-        try:
-            results = _vehicle_model(frame, verbose=False, conf=CONF_THRESHOLD)
-            detections = []
-            for r in results:
-                if r.boxes is None:
-                    continue
-                for box in r.boxes:
-                    cls_id  = int(box.cls[0])
-                    conf    = float(box.conf[0])
-                    xyxy    = box.xyxy[0].tolist()
-                    x1, y1, x2, y2 = int(xyxy[0]), int(xyxy[1]), int(xyxy[2]), int(xyxy[3])
-                    cls_name = _vehicle_model.names.get(cls_id, f"cls_{cls_id}")
-                    detections.append((cls_id, cls_name, conf, x1, y1, x2, y2))
-            with _perf_lock:
-                _perf["detection_frames"] += 1
-            return detections
-        except Exception as e:
-            log.debug("YOLO inference error: %s", e)
-            return []
-    else:
-        return _demo_detections(frame)
+    return _run_yolo_batch([frame])[0]
 
 
-def _demo_detections(frame: np.ndarray) -> list[tuple]:
+def _run_yolo_batch(frames: list[np.ndarray]) -> list[np.ndarray]:
+    """
+    Run YOLOv8 once on a batch of frames (one per camera).
+    Returns one _DET_DTYPE array per frame, same format as _run_yolo().
+    """
+    if _vehicle_model is None:
+        return [_demo_detections(f) for f in frames]
+    try:
+        batch = _vehicle_model.infer(frames)
+        with _perf_lock:
+            _perf["detection_frames"] += len(frames)
+            _perf["detection_batches"] += 1
+        return batch
+    except Exception as e:
+        log.debug("YOLO inference error: %s", e)
+        return [np.empty(0, dtype=_DET_DTYPE) for _ in frames]
+
+
+def _demo_detections(frame: np.ndarray) -> np.ndarray:
     """Animated demo detections when YOLO not available."""
     if not hasattr(_demo_detections, "_pos"):
         _demo_detections._pos = 0
@@ -697,7 +1708,165 @@ def _demo_detections(frame: np.ndarray) -> list[tuple]:
     _demo_detections._pos = (_demo_detections._pos + 3) % (w - 80)
     x = _demo_detections._pos
     y = int(h * 0.70)
-    return [(3, "motorcycle", 0.82, x, y-30, x+60, y+30)]
+    return _make_detections(np.array([3]), np.array([0.82]),
+                            np.array([[x, y-30, x+60, y+30]]))
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# MOTION GATE — skip YOLO on static frames
+# ════════════════════════════════════════════════════════════════════════════
+
+def _roi_band_gray(slot: _CameraSlot, frame: np.ndarray) -> np.ndarray:
+    """Downscaled, blurred grayscale of the camera's ROI band (cheap to diff)."""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = slot.roi_box(w, h)
+    band = frame[y1:y2, x1:x2]
+    bh, bw = band.shape[:2]
+    small = cv2.resize(band, (MOTION_DOWNSCALE_W, max(1, bh * MOTION_DOWNSCALE_W // max(1, bw))),
+                       interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+
+def _needs_inference(slot: _CameraSlot, frame: np.ndarray, now: float) -> bool:
+    """
+    Motion gate for one camera frame. The ROI band is compared against the band
+    at the last YOLO run (not the previous frame), so slow creep still adds up.
+    True → run YOLO; False → reuse slot.last_detections.
+    """
+    if not MOTION_GATE_ENABLED:
+        return True
+
+    gray = _roi_band_gray(slot, frame)
+    ref  = slot.motion_ref
+    if ref is None or ref.shape != gray.shape:
+        slot.motion_energy = 1.0
+    else:
+        diff = cv2.absdiff(gray, ref)
+        slot.motion_energy = float(np.count_nonzero(diff > MOTION_PIXEL_DELTA)) / diff.size
+
+    if (slot.last_detections is None
+            or slot.motion_energy >= MOTION_THRESHOLD
+            or (now - slot.last_infer_ts) >= MOTION_MAX_SKIP_SEC):
+        slot.motion_ref = gray
+        return True
+    return False
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# VEHICLE TRACKER — IoU / centroid multi-object tracker (pure NumPy)
+# ════════════════════════════════════════════════════════════════════════════
+
+class _Track:
+    """One tracked vehicle. `reported` → its violation job was already queued."""
+    __slots__ = ("track_id", "box", "velocity", "cls_id", "cls_name", "conf",
+                 "hits", "missed", "reported")
+
+    def __init__(self, track_id: int, det: np.void):
+        self.track_id = track_id
+        self.box      = det["box"].copy()
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.hits     = 1
+        self.missed   = 0
+        self.reported = False
+        self.set_class(det)
+
+    def set_class(self, det: np.void):
+        self.cls_id   = int(det["cls"])
+        self.cls_name = TARGET_CLASSES.get(self.cls_id, f"cls_{self.cls_id}")
+        self.conf     = float(det["conf"])
+
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every box in a (T,4) against every box in b (D,4) → (T,D)."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter  = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class _VehicleTracker:
+    """
+    SORT-style tracker without the Kalman filter: constant-velocity box
+    prediction, greedy IoU matching, then a centroid-distance pass for
+    fast/small vehicles whose boxes no longer overlap. Updated once per YOLO
+    run of its camera; track ids are unique across all cameras.
+    """
+    _next_id   = 1
+    _id_lock   = threading.Lock()
+
+    def __init__(self):
+        self.tracks: list[_Track] = []
+
+    @classmethod
+    def _new_id(cls) -> int:
+        with cls._id_lock:
+            tid = cls._next_id
+            cls._next_id += 1
+        return tid
+
+    def update(self, detections: np.ndarray) -> list[_Track]:
+        """Match a _DET_DTYPE array to tracks. Returns tracks matched in this update."""
+        for t in self.tracks:
+            t.box = t.box + t.velocity
+
+        matches: list[tuple[int, int]] = []
+        free_t = set(range(len(self.tracks)))
+        free_d = set(range(len(detections)))
+
+        if self.tracks and len(detections):
+            trk_boxes = np.stack([t.box for t in self.tracks])
+            det_boxes = detections["box"]
+
+            # Pass 1: greedy by IoU
+            iou = _iou_matrix(trk_boxes, det_boxes)
+            for ti, di in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+                if iou[ti, di] < TRACK_IOU_MIN:
+                    break
+                if ti in free_t and di in free_d:
+                    matches.append((ti, di)); free_t.discard(ti); free_d.discard(di)
+
+            # Pass 2: greedy by centroid distance (relative to track size)
+            if free_t and free_d:
+                ft, fd = sorted(free_t), sorted(free_d)
+                tc = (trk_boxes[ft, :2] + trk_boxes[ft, 2:]) / 2
+                dc = (det_boxes[fd, :2] + det_boxes[fd, 2:]) / 2
+                size = np.maximum(trk_boxes[ft, 2:] - trk_boxes[ft, :2], 1).max(axis=1)
+                dist = np.linalg.norm(tc[:, None, :] - dc[None, :, :], axis=2) / size[:, None]
+                for i, j in zip(*np.unravel_index(np.argsort(dist, axis=None), dist.shape)):
+                    if dist[i, j] > TRACK_CENTROID_RATIO:
+                        break
+                    ti, di = ft[i], fd[j]
+                    if ti in free_t and di in free_d:
+                        matches.append((ti, di)); free_t.discard(ti); free_d.discard(di)
+
+        matched = []
+        for ti, di in matches:
+            t, det = self.tracks[ti], detections[di]
+            new_box    = det["box"].copy()
+            t.velocity = 0.5 * t.velocity + 0.5 * (new_box - (t.box - t.velocity))
+            t.box      = new_box
+            t.set_class(det)
+            t.hits    += 1
+            t.missed   = 0
+            matched.append(t)
+
+        for ti in free_t:
+            self.tracks[ti].missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= TRACK_MAX_MISSED]
+
+        for di in sorted(free_d):
+            t = _Track(self._new_id(), detections[di])
+            self.tracks.append(t)
+            matched.append(t)
+        if free_d:
+            with _perf_lock:
+                _perf["tracks_created"] += len(free_d)
+
+        return matched
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -721,104 +1890,255 @@ _INTL_PLATE_PATTERNS = [
 ]
 
 
+_OCR_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-. "
+
+
 def _run_ocr(crop: np.ndarray) -> str:
     """
     Run EasyOCR on vehicle crop to extract license plate text.
     Tries Vietnamese patterns first, then international.
     Returns cleaned plate string or empty string.
     """
+    return _run_ocr_batch([crop])[0]
+
+
+def _run_ocr_batch(crops: "list[np.ndarray | None]") -> list[str]:
+    """
+    OCR several vehicle crops (all violations of a frame / an OCR queue
+    window) with one EasyOCR call. Each crop is localized + preprocessed,
+    then padded onto a common canvas so readtext_batched can run text
+    detection and recognition over the whole batch at once.
+    Returns one plate string ("" = not read) per crop, in order.
+    """
+    plates = [""] * len(crops)
     if _ocr_reader is None:
-        return ""
+        return plates
 
-    if crop is None or crop.size == 0:
-        return ""
+    idx, prepared = [], []
+    for i, crop in enumerate(crops):
+        if crop is None or crop.size == 0:
+            continue
+        try:
+            # Plate localization → OCR only the plate rectangle
+            if PLATE_LOCALIZE:
+                crop, _found = _localize_plate(crop)
+            # Preprocess for better OCR accuracy
+            prepared.append(_preprocess_plate_crop(crop))
+            idx.append(i)
+        except Exception as e:
+            log.debug("OCR prepare error: %s", e)
+    if not prepared:
+        return plates
 
     try:
-        # Preprocess for better OCR accuracy
-        crop_proc = _preprocess_plate_crop(crop)
+        t0 = time.perf_counter()
+        if len(prepared) == 1 or not hasattr(_ocr_reader, "readtext_batched"):
+            batch = [_ocr_reader.readtext(img, allowlist=_OCR_ALLOWLIST, detail=1, paragraph=False)
+                     for img in prepared]
+        else:
+            h = max(img.shape[0] for img in prepared)
+            w = max(img.shape[1] for img in prepared)
+            padded = [cv2.copyMakeBorder(img, 0, h - img.shape[0], 0, w - img.shape[1],
+                                         cv2.BORDER_CONSTANT, value=(255, 255, 255))
+                      for img in prepared]
+            batch = _ocr_reader.readtext_batched(padded, allowlist=_OCR_ALLOWLIST, detail=1,
+                                                 paragraph=False, batch_size=len(padded))
+        ocr_ms = (time.perf_counter() - t0) * 1000
+        _stages["ocr"].record(ocr_ms)
+        with _perf_lock:
+            _perf["ocr_calls"]       += len(prepared)
+            _perf["ocr_batches"]     += 1
+            _perf["ocr_ms_total"]    += ocr_ms
+    except Exception as e:
+        log.debug("OCR error: %s", e)
+        with _perf_lock:
+            _perf["ocr_fail"] += len(prepared)
+        return plates
 
-        results = _ocr_reader.readtext(
-            crop_proc,
-            allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-. ",
-            detail=1,
-            paragraph=False,
-        )
+    for i, results in zip(idx, batch):
+        plates[i] = _parse_plate_text(results)
+    return plates
 
-        if not results:
-            with _perf_lock:
-                _perf["ocr_fail"] += 1
-            return ""
-
-        # Combine all text from results
-        all_text = " ".join(r[1].strip().upper() for r in results if r[2] > 0.3)
-        all_text = all_text.replace("O", "0").replace("I", "1").replace("l", "1")
-
-        # Try Vietnamese patterns first (priority)
-        for pattern in _VN_PLATE_PATTERNS:
-            m = pattern.search(all_text)
-            if m:
-                plate = _normalize_vn_plate(m.group(1))
-                if len(plate) >= OCR_MIN_CHARS:
-                    with _perf_lock:
-                        _perf["ocr_success"] += 1
-                    log.debug("OCR [VN] found: %s", plate)
-                    return plate
-
-        # Try international patterns
-        for pattern in _INTL_PLATE_PATTERNS:
-            m = pattern.search(all_text)
-            if m:
-                plate = m.group(1).strip().upper()
-                plate = re.sub(r'\s+', ' ', plate)
-                if len(plate) >= OCR_MIN_CHARS:
-                    with _perf_lock:
-                        _perf["ocr_success"] += 1
-                    log.debug("OCR [INTL] found: %s", plate)
-                    return plate
-
-        # Fallback: best single result if confidence > 0.5
-        best = max(results, key=lambda r: r[2])
-        if best[2] > 0.5 and len(best[1].strip()) >= OCR_MIN_CHARS:
-            plate = best[1].strip().upper()
-            with _perf_lock:
-                _perf["ocr_success"] += 1
-            return plate
 
+def _parse_plate_text(results: list) -> str:
+    """EasyOCR readtext results (bbox, text, conf) → cleaned plate string or ""."""
+    if not results:
         with _perf_lock:
             _perf["ocr_fail"] += 1
         return ""
 
-    except Exception as e:
-        log.debug("OCR error: %s", e)
+    # Combine all text from results
+    all_text = " ".join(r[1].strip().upper() for r in results if r[2] > 0.3)
+    all_text = all_text.replace("O", "0").replace("I", "1").replace("l", "1")
+
+    # Try Vietnamese patterns first (priority)
+    for pattern in _VN_PLATE_PATTERNS:
+        m = pattern.search(all_text)
+        if m:
+            plate = _normalize_vn_plate(m.group(1))
+            if len(plate) >= OCR_MIN_CHARS:
+                with _perf_lock:
+                    _perf["ocr_success"] += 1
+                log.debug("OCR [VN] found: %s", plate)
+                return plate
+
+    # Try international patterns
+    for pattern in _INTL_PLATE_PATTERNS:
+        m = pattern.search(all_text)
+        if m:
+            plate = m.group(1).strip().upper()
+            plate = re.sub(r'\s+', ' ', plate)
+            if len(plate) >= OCR_MIN_CHARS:
+                with _perf_lock:
+                    _perf["ocr_success"] += 1
+                log.debug("OCR [INTL] found: %s", plate)
+                return plate
+
+    # Fallback: best single result if confidence > 0.5
+    best = max(results, key=lambda r: r[2])
+    if best[2] > 0.5 and len(best[1].strip()) >= OCR_MIN_CHARS:
+        plate = best[1].strip().upper()
         with _perf_lock:
-            _perf["ocr_fail"] += 1
-        return ""
+            _perf["ocr_success"] += 1
+        return plate
+
+    with _perf_lock:
+        _perf["ocr_fail"] += 1
+    return ""
 
 
-def _preprocess_plate_crop(crop: np.ndarray) -> np.ndarray:
-    """Preprocess vehicle crop for better OCR accuracy."""
+def _localize_plate(crop: np.ndarray) -> tuple[np.ndarray, bool]:
+    """
+    Find the license plate rectangle inside a vehicle crop (no model needed).
+
+    Candidates come from two cheap masks on a downscaled copy:
+      • colour  — VN yellow plates (HSV hue 15-40) + white plates (low sat, high val)
+      • texture — dense vertical edges (Sobel-x, Otsu, wide closing) = character rows
+    Each candidate box is filtered by aspect ratio + relative area and scored by
+    fill ratio × edge density × vertical position (plates sit in the lower half).
+    Returns (plate_crop, True) or (crop, False) when nothing plausible is found.
+    """
+    t0 = time.perf_counter()
+    best = None
     try:
-        # Resize if too small
         h, w = crop.shape[:2]
-        if w < 100 or h < 30:
-            scale = max(100 / w, 30 / h)
-            crop = cv2.resize(crop, (int(w*scale), int(h*scale)), interpolation=cv2.INTER_CUBIC)
-
-        # Grayscale → bilateral filter → adaptive threshold → morphology
-        gray   = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.bilateralFilter(gray, 9, 75, 75)
-        thresh = cv2.adaptiveThreshold(
-            blurred, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV,
-            11, 2
-        )
-        kernel  = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-        cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-
-        # Return as 3-channel (EasyOCR expects BGR or gray)
-        return cv2.cvtColor(cv2.bitwise_not(cleaned), cv2.COLOR_GRAY2BGR)
+        scale = min(1.0, PLATE_LOC_MAX_W / max(1, w))
+        small = cv2.resize(crop, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else crop
+        sh, sw = small.shape[:2]
+        area   = float(sh * sw)
+
+        hsv    = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        yellow = cv2.inRange(hsv, (15, 80, 100), (40, 255, 255))
+        white  = cv2.inRange(hsv, (0, 0, 170), (180, 50, 255))
+        color  = cv2.morphologyEx(yellow | white, cv2.MORPH_CLOSE,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (5, 3)))
+
+        gray   = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        edges  = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3))
+        _, edges = cv2.threshold(edges, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        texture = cv2.morphologyEx(edges, cv2.MORPH_CLOSE,
+                                   cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, sw // 20), 3)))
+
+        for mask in (color, texture):
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for c in contours:
+                x, y, bw, bh = cv2.boundingRect(c)
+                if bh == 0:
+                    continue
+                aspect   = bw / bh
+                rel_area = bw * bh / area
+                if not (PLATE_ASPECT_RANGE[0] <= aspect <= PLATE_ASPECT_RANGE[1]):
+                    continue
+                if not (PLATE_AREA_RANGE[0] <= rel_area <= PLATE_AREA_RANGE[1]):
+                    continue
+                fill    = cv2.contourArea(c) / float(bw * bh)
+                density = cv2.countNonZero(edges[y:y + bh, x:x + bw]) / float(bw * bh)
+                if density < 0.08:          # plates have characters → edges
+                    continue
+                score = fill * density * (0.5 + (y + bh / 2) / sh)
+                if best is None or score > best[0]:
+                    best = (score, x, y, bw, bh)
+
+        if best is None:
+            return crop, False
+
+        _, x, y, bw, bh = best
+        px, py = int(bw * PLATE_PAD_RATIO), int(bh * PLATE_PAD_RATIO)
+        x1 = max(0, int((x - px) / scale));       y1 = max(0, int((y - py) / scale))
+        x2 = min(w, int((x + bw + px) / scale));  y2 = min(h, int((y + bh + py) / scale))
+        return crop[y1:y2, x1:x2], True
+    except Exception as e:
+        log.debug("Plate localization error: %s", e)
+        return crop, False
+    finally:
+        with _perf_lock:
+            _perf["plate_loc_hit" if best is not None else "plate_loc_miss"] += 1
+            _perf["plate_loc_ms_total"] += (time.perf_counter() - t0) * 1000
+
+
+def _preprocess_accurate(crop: np.ndarray) -> np.ndarray:
+    """Upscale → bilateral filter → adaptive threshold → closing (binarized, 3-channel)."""
+    # Resize if too small
+    h, w = crop.shape[:2]
+    if w < 100 or h < 30:
+        scale = max(100 / w, 30 / h)
+        crop = cv2.resize(crop, (int(w*scale), int(h*scale)), interpolation=cv2.INTER_CUBIC)
+
+    # Grayscale → bilateral filter → adaptive threshold → morphology
+    gray   = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.bilateralFilter(gray, 9, 75, 75)
+    thresh = cv2.adaptiveThreshold(
+        blurred, 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV,
+        11, 2
+    )
+    kernel  = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+    cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+
+    # Return as 3-channel (EasyOCR expects BGR or gray)
+    return cv2.cvtColor(cv2.bitwise_not(cleaned), cv2.COLOR_GRAY2BGR)
+
+
+def _preprocess_fast(crop: np.ndarray) -> np.ndarray:
+    """
+    Grayscale + CLAHE at the recognizer's input height. Large crops are
+    downsized first (INTER_AREA), so the contrast step runs on few pixels;
+    the text stays gray-level for EasyOCR instead of being binarized.
+    """
+    h, w = crop.shape[:2]
+    scale = PLATE_FAST_HEIGHT / max(1, h)
+    if abs(scale - 1.0) > 0.05:
+        crop = cv2.resize(crop, (max(1, int(w * scale)), PLATE_FAST_HEIGHT),
+                          interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    clahe = cv2.createCLAHE(clipLimit=PLATE_CLAHE_CLIP, tileGridSize=PLATE_CLAHE_TILES)
+    return clahe.apply(gray)
+
+
+_PREPROCESS_PROFILES = {
+    "accurate": _preprocess_accurate,
+    "fast":     _preprocess_fast,
+    "none":     lambda crop: crop,
+}
+
+if PLATE_PREPROCESS not in _PREPROCESS_PROFILES:
+    log.warning("⚠️  Unknown AI_PLATE_PREPROCESS=%r — using 'accurate' (choices: %s)",
+                PLATE_PREPROCESS, ", ".join(_PREPROCESS_PROFILES))
+    PLATE_PREPROCESS = "accurate"
+
+
+def _preprocess_plate_crop(crop: np.ndarray, profile: str | None = None) -> np.ndarray:
+    """Preprocess plate / vehicle crop for OCR with the given (default: configured) profile."""
+    t0 = time.perf_counter()
+    try:
+        return _PREPROCESS_PROFILES[profile or PLATE_PREPROCESS](crop)
     except Exception:
         return crop  # Return original if preprocessing fails
+    finally:
+        with _perf_lock:
+            _perf["plate_prep_calls"]    += 1
+            _perf["plate_prep_ms_total"] += (time.perf_counter() - t0) * 1000
 
 
 def _normalize_vn_plate(raw: str) -> str:
@@ -842,48 +2162,68 @@ def _detection_loop():
     Flow:
     1. Wait for models to load (max 120s)
     2. Open laptop webcam as fallback source
-    3. Loop every ~30ms:
-       - GREEN light → skip (no detection, save CPU)
+    3. Loop, paced to DETECTION_TARGET_FPS (see _wait_for_wakeup):
+       - GREEN light → idle until the light changes (no detection, save CPU)
        - YELLOW light → detect + draw (warm-up, no violations)
        - RED light → detect + ROI check + OCR + process_violation
+       Ticks whose work exceeds the period start the next one immediately
+       (overrun, no catch-up burst); lag vs. schedule is reported in _perf.
 
     Frame source priority (checked every iteration):
-    → ESP32-CAM (if fresh) → laptop webcam → demo frame
+    → ESP32-CAMs (all fresh cameras, one batched YOLO call) → laptop webcam → demo frame
+    ESP32 frames are analyzed once per sequence number: with no new frame the
+    loop blocks on _frame_cond instead of re-decoding the previous JPEG.
     """
-    log.info("⏳ Detection loop: waiting for models (timeout=120s)...")
-    _models_ready.wait(timeout=120)
+    log.info("⏳ Detection loop: waiting for YOLO (timeout=120s)...")
+    _yolo_ready.wait(timeout=120)
 
-    if not _models_ready.is_set():
-        log.error("❌ Models not ready after 120s — detection loop aborted")
+    if not _yolo_ready.is_set():
+        log.error("❌ YOLO not ready after 120s — detection loop aborted")
         return
 
-    log.info("🎯 Detection loop started")
+    log.info("🎯 Detection loop started%s", "" if _ocr_ready.is_set() else " (OCR still loading)")
 
     # Open webcam as fallback (ai_engine + app.py can both have webcam open simultaneously)
     cap = _open_laptop_camera()
 
     frame_count  = 0
-    last_capture_ts = 0.0
     fps_ts       = time.time()
     fps_count    = 0
+    fps          = 0.0
+    period       = 1.0 / DETECTION_TARGET_FPS if DETECTION_TARGET_FPS > 0 else 0.0
+    due          = time.perf_counter()     # scheduled start of the next tick
+    seen_version = _light_version
 
     while not _stop_event.is_set():
         try:
+            if _light_version != seen_version:
+                seen_version = _light_version
+                with _perf_lock:
+                    _perf["light_wake_ms_last"] = (time.perf_counter() - _light_changed_at) * 1000
+
             current_light = _AppRef.get_light()
 
             # ── GREEN: idle mode — no detection ─────────────────
             if current_light == "GREEN":
                 _AppRef.update_context(0, 0.0)
-                time.sleep(0.2)
+                _wait_for_wakeup(seen_version, IDLE_RECHECK_SEC)
+                due = time.perf_counter()
                 continue
 
-            # ── Get frame ────────────────────────────────────────
-            frame = _get_frame(cap)
-            if frame is None:
-                time.sleep(0.1)
-                continue
+            # ── Get freshest frame of every active camera ───────
+            sources = _get_frames(cap)
+            if not sources:
+                continue        # no new ESP32 frame yet (_get_frames already waited)
 
-            # ── FPS tracking ─────────────────────────────────────
+            # ── Scheduling lag: frames ready vs. scheduled tick start ─
+            tick_start = time.perf_counter()
+            lag_ms = max(0.0, tick_start - due) * 1000
+            with _perf_lock:
+                _perf["sched_ticks"]        += 1
+                _perf["sched_lag_ms_total"] += lag_ms
+                _perf["sched_lag_ms_max"]    = max(_perf["sched_lag_ms_max"], lag_ms)
+
+            # ── FPS tracking (ticks/s, one tick = all cameras) ──
             fps_count += 1
             now = time.time()
             elapsed = now - fps_ts
@@ -894,96 +2234,27 @@ def _detection_loop():
                     _perf["last_fps_count"] = fps_count
                 fps_ts = now; fps_count = 0
 
-            # ── YOLO detection ───────────────────────────────────
-            detections = _run_yolo(frame)
-            h, w = frame.shape[:2]
-
-            roi_y1 = int(h * ROI_RATIO_TOP)
-            roi_y2 = int(h * ROI_RATIO_BOTTOM)
-            roi_x1 = int(w * ROI_RATIO_LEFT)
-            roi_x2 = int(w * ROI_RATIO_RIGHT)
-
-            vehicles_in_frame   = 0
-            violations_detected = []
-
-            for det in detections:
-                cls_id, cls_name, conf, x1, y1, x2, y2 = det
-                if cls_id not in TARGET_CLASSES:
-                    continue
-                if conf < CONF_THRESHOLD:
-                    continue
-
-                vehicles_in_frame += 1
-
-                # Draw bounding box
-                box_color = (0, 230, 80) if current_light == "GREEN" else \
-                            (0, 180, 220) if current_light == "YELLOW" else (20, 20, 220)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), box_color, 2)
-
-                label = f"{cls_name} {conf*100:.0f}%"
-                label_y = max(y1 - 8, 18)
-                cv2.rectangle(frame, (x1, label_y-14), (x1 + len(label)*8, label_y+4), box_color, -1)
-                cv2.putText(frame, label, (x1+2, label_y),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.50, (0, 0, 0), 1, cv2.LINE_AA)
-
-                # ── RED light: check if in violation ROI ────────
-                if current_light == "RED":
-                    cx = (x1 + x2) // 2
-                    cy = (y1 + y2) // 2
-                    in_roi = (roi_x1 <= cx <= roi_x2) and (roi_y1 <= cy <= roi_y2)
-
-                    if in_roi:
-                        # Highlight violation
-                        cv2.rectangle(frame, (x1-3, y1-3), (x2+3, y2+3), (0, 0, 255), 3)
-                        violations_detected.append({
-                            "cls_id": cls_id, "cls_name": cls_name, "conf": conf,
-                            "x1": x1, "y1": y1, "x2": x2, "y2": y2,
-                            "cx": cx, "cy": cy,
-                        })
-
-            # ── Draw ROI line ─────────────────────────────────────
-            roi_color = (50, 50, 220) if current_light == "RED" else \
-                        (50, 200, 220) if current_light == "YELLOW" else (50, 200, 50)
-            cv2.line(frame, (roi_x1, roi_y1), (roi_x2, roi_y1), roi_color, 2)
-            cv2.line(frame, (roi_x1, roi_y1), (roi_x1, roi_y2), roi_color, 1)
-            cv2.line(frame, (roi_x2, roi_y1), (roi_x2, roi_y2), roi_color, 1)
-
-            # ROI label
-            roi_label = "🔴 VIOLATION ZONE — STOP LINE" if current_light == "RED" else "DETECTION ROI"
-            cv2.putText(frame, roi_label,
-                        (roi_x1 + 10, roi_y1 - 6),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.44, roi_color, 1, cv2.LINE_AA)
-
-            # ── Source indicator ──────────────────────────────────
-            src_txt = "SOURCE: ESP32-CAM" if _esp32_ever_connected.is_set() else "SOURCE: WEBCAM/DEMO"
-            src_color = (0, 220, 100) if _esp32_ever_connected.is_set() else (0, 120, 220)
-            cv2.putText(frame, src_txt, (roi_x1 + 10, roi_y1 + 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.40, src_color, 1, cv2.LINE_AA)
-
-            # ── Push frame to Camera Laptop stream ───────────────
-            _AppRef.push_frame(frame)
-
-            # ── Capture throttle: 500ms between violation saves ──
-            if (now - last_capture_ts) < CAPTURE_INTERVAL:
-                _AppRef.update_context(vehicles_in_frame, fps)
-                time.sleep(0.02)
-                continue
-
-            # ── Process violations (RED only) ─────────────────────
-            if current_light == "RED" and violations_detected:
-                last_capture_ts = now
-                for viol in violations_detected:
-                    _handle_violation(frame, viol, vehicles_in_frame)
+            max_vehicles = _detection_tick(sources, current_light, now)
 
-            _AppRef.update_context(vehicles_in_frame, fps,
+            _AppRef.update_context(max_vehicles, fps,
                                    capture_interval=CAPTURE_INTERVAL,
                                    roi="STOP_LINE",
                                    target_objects=["MOTORBIKE", "CAR"],
                                    weather="SUN",
                                    distance=5.0)
 
+            if frame_count == 0 and _startup_t0:
+                _startup_mark("first_detection_s")
             frame_count += 1
-            time.sleep(0.030)  # ~33fps loop
+
+            # ── Pace to DETECTION_TARGET_FPS (woken early by light changes) ─
+            now = time.perf_counter()
+            _stages["tick"].record((now - tick_start) * 1000)
+            due = max(due + period, tick_start)
+            if now > due:
+                with _perf_lock:
+                    _perf["sched_overruns"] += 1
+            _wait_for_wakeup(seen_version, due - now)
 
         except Exception as e:
             log.error("Detection loop error: %s", e, exc_info=True)
@@ -995,35 +2266,371 @@ def _detection_loop():
              _perf["total_frames"], _perf["violations_found"])
 
 
+def _detection_tick(sources: "list[tuple[_CameraSlot, np.ndarray]]", current_light: str,
+                    now: float) -> int:
+    """
+    One detection tick over the freshest frame of every active camera:
+    motion gate → batched YOLO → tracker → ROI check + drawing → violation
+    jobs (RED only) → primary frame to the Camera Laptop stream.
+    Shared by _detection_loop and the offline replay benchmark.
+    Returns the max vehicle count over the cameras.
+    """
+    # ── Motion gate → YOLO only on cameras whose ROI changed ─
+    infer_idx = [i for i, (slot, frame) in enumerate(sources)
+                 if _needs_inference(slot, frame, now)]
+
+    # ── YOLO detection — one batched call for all moving cameras ─
+    if infer_idx:
+        t0 = time.perf_counter()
+        batch = _run_yolo_batch([sources[i][1] for i in infer_idx])
+        _stage_time("yolo", t0)
+        for i, detections in zip(infer_idx, batch):
+            slot = sources[i][0]
+            slot.last_detections = detections
+            slot.last_infer_ts   = now
+            slot.tracks = slot.tracker.update(_filter_detections(detections))
+    with _perf_lock:
+        _perf["motion_inferred"] += len(infer_idx)
+        _perf["motion_skipped"]  += len(sources) - len(infer_idx)
+
+    max_vehicles = 0
+    encoded = []
+    for slot, frame in sources:
+        t0 = time.perf_counter()
+        vehicles_in_frame, violations_detected = _analyze_frame(
+            slot, frame, slot.tracks, current_light)
+        _stage_time("draw", t0)
+        enc = _EncodedFrame(frame)
+        encoded.append(enc)
+        slot.mark_analyzed(now)
+        slot.vehicles = vehicles_in_frame
+        max_vehicles  = max(max_vehicles, vehicles_in_frame)
+
+        # ── Process violations (RED only, 500ms throttle per camera) ──
+        if current_light == "RED" and violations_detected \
+                and (now - slot.last_capture_ts) >= CAPTURE_INTERVAL:
+            slot.last_capture_ts = now
+            if _handle_violations(enc, violations_detected, vehicles_in_frame, slot):
+                for viol in violations_detected:
+                    viol["track"].reported = True
+                with _perf_lock:
+                    _perf["tracks_reported"] += len(violations_detected)
+
+    # ── Push primary camera frame to Camera Laptop stream ─
+    stream_jpeg = encoded[0].jpeg()
+    _AppRef.push_frame(stream_jpeg)
+    # Webcam / demo source: the stream JPEG is its only encoded copy → clip ring
+    if CLIP_ENABLED and stream_jpeg and sources[0][0].cam_id == LOCAL_CAMERA_ID:
+        sources[0][0].clip_ring.append(time.time(), stream_jpeg)
+
+    return max_vehicles
+
+
+def _wait_for_wakeup(light_version: int, timeout: float):
+    """
+    Scheduler wait: block on _frame_cond until `timeout` passes, the light
+    changes (sync_light_state bumps _light_version) or the engine stops.
+    """
+    if timeout <= 0:
+        return
+    with _frame_cond:
+        _frame_cond.wait_for(lambda: _light_version != light_version or _stop_event.is_set(),
+                             timeout=timeout)
+
+
+def _analyze_frame(slot: _CameraSlot, frame: np.ndarray, tracks: "list[_Track]",
+                   current_light: str) -> tuple[int, list[dict]]:
+    """
+    Draw tracked vehicles for one camera frame, check the camera's ROI.
+    A track triggers a violation only once (first RED frame inside the ROI
+    after TRACK_MIN_HITS matches); later frames of the same track are ignored.
+    Returns (vehicles_in_frame, violations_detected).
+    """
+    h, w = frame.shape[:2]
+    roi_x1, roi_y1, roi_x2, roi_y2 = slot.roi_box(w, h)
+
+    vehicles_in_frame   = len(tracks)
+    violations_detected = []
+
+    # Integer boxes + ROI containment for all tracks at once
+    boxes  = np.array([t.box for t in tracks], dtype=np.int32).reshape(-1, 4)
+    in_roi = _in_roi_mask(boxes, (roi_x1, roi_y1, roi_x2, roi_y2)) \
+        if current_light == "RED" else np.zeros(len(tracks), dtype=bool)
+
+    for trk, (x1, y1, x2, y2), inside in zip(tracks, boxes.tolist(), in_roi.tolist()):
+        cls_id, cls_name, conf = trk.cls_id, trk.cls_name, trk.conf
+
+        # Draw bounding box
+        box_color = (0, 230, 80) if current_light == "GREEN" else \
+                    (0, 180, 220) if current_light == "YELLOW" else (20, 20, 220)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), box_color, 2)
+
+        label = f"#{trk.track_id} {cls_name} {conf*100:.0f}%"
+        label_y = max(y1 - 8, 18)
+        cv2.rectangle(frame, (x1, label_y-14), (x1 + len(label)*8, label_y+4), box_color, -1)
+        cv2.putText(frame, label, (x1+2, label_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.50, (0, 0, 0), 1, cv2.LINE_AA)
+
+        # ── RED light: track inside violation ROI ───────
+        if inside:
+            # Highlight violation
+            cv2.rectangle(frame, (x1-3, y1-3), (x2+3, y2+3), (0, 0, 255), 3)
+            if not trk.reported and trk.hits >= TRACK_MIN_HITS:
+                violations_detected.append({
+                    "cls_id": cls_id, "cls_name": cls_name, "conf": conf,
+                    "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+                    "cx": (x1 + x2) // 2, "cy": (y1 + y2) // 2,
+                    "track_id": trk.track_id, "track": trk,
+                })
+
+    # ── Draw ROI line ─────────────────────────────────────
+    roi_color = (50, 50, 220) if current_light == "RED" else \
+                (50, 200, 220) if current_light == "YELLOW" else (50, 200, 50)
+    cv2.line(frame, (roi_x1, roi_y1), (roi_x2, roi_y1), roi_color, 2)
+    cv2.line(frame, (roi_x1, roi_y1), (roi_x1, roi_y2), roi_color, 1)
+    cv2.line(frame, (roi_x2, roi_y1), (roi_x2, roi_y2), roi_color, 1)
+
+    # ROI label
+    roi_label = "🔴 VIOLATION ZONE — STOP LINE" if current_light == "RED" else "DETECTION ROI"
+    cv2.putText(frame, roi_label,
+                (roi_x1 + 10, roi_y1 - 6),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.44, roi_color, 1, cv2.LINE_AA)
+
+    # ── Source indicator ──────────────────────────────────
+    is_esp32  = slot.cam_id != LOCAL_CAMERA_ID
+    src_txt   = f"SOURCE: ESP32-CAM [{slot.cam_id}]" if is_esp32 else "SOURCE: WEBCAM/DEMO"
+    src_color = (0, 220, 100) if is_esp32 else (0, 120, 220)
+    cv2.putText(frame, src_txt, (roi_x1 + 10, roi_y1 + 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.40, src_color, 1, cv2.LINE_AA)
+
+    return vehicles_in_frame, violations_detected
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# ENCODED FRAME CACHE — one JPEG encode per annotated frame
+# ════════════════════════════════════════════════════════════════════════════
+
+class _EncodedFrame:
+    """
+    Annotated frame + its JPEG, encoded at most once (FRAME_JPEG_QUALITY) by
+    whichever consumer asks first: the live stream push (detection thread) or
+    violation evidence (OCR worker). Both get the same bytes.
+    """
+    __slots__ = ("frame", "_jpeg", "_lock")
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+        self._jpeg: bytes | None = None
+        self._lock = threading.Lock()
+
+    def jpeg(self) -> bytes | None:
+        with self._lock:
+            if self._jpeg is None:
+                t0 = time.perf_counter()
+                ok, buf = cv2.imencode(".jpg", self.frame, [cv2.IMWRITE_JPEG_QUALITY, FRAME_JPEG_QUALITY])
+                _stage_time("encode", t0)
+                with _perf_lock:
+                    _perf["frame_encodes"] += 1
+                self._jpeg = buf.tobytes() if ok else b""
+            return self._jpeg or None
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # VIOLATION HANDLER
 # ════════════════════════════════════════════════════════════════════════════
 
-def _handle_violation(frame: np.ndarray, viol: dict, vehicles_in_frame: int):
+def _handle_violations(encoded: _EncodedFrame, viols: "list[dict]", vehicles_in_frame: int,
+                       slot: _CameraSlot) -> bool:
     """
-    Handle a single violation detection:
-    1. Crop vehicle region
-    2. OCR license plate (VN + international)
-    3. Throttle check (same plate not processed within 30s)
-    4. Encode violation image (full frame)
-    5. Call app.process_violation()
-    6. Publish to MQTT (for ESP32 + ThingsBoard)
+    Hot-path part of a frame's violations (detection thread):
+    1. Crop each vehicle region (copied — the job outlives this tick); for a
+       reduced-size ESP32 decode only the original JPEG + box are queued and
+       the OCR worker cuts the crops from one full-resolution decode
+    2. Enqueue all of the frame's jobs as one queue item (OCR'd in one batch)
+       — never blocks; dropped + counted if the queue is full (returns False
+       so the tracks stay eligible on the next frame)
+    3. Request the frame's evidence clip (CLIP_ENABLED) — a _ClipTicket
+       shared by the jobs: _clip_builder cuts it once the post-roll is in,
+       and it is saved only if _complete_violation records one of them
+    OCR, throttle, evidence JPEG (shared with the live stream; full-res
+    re-annotation for a reduced decode), app + MQTT
+    notify → _ocr_worker / _complete_violation() on the OCR worker pool.
     """
-    x1, y1, x2, y2 = viol["x1"], viol["y1"], viol["x2"], viol["y2"]
-    cls_name = viol["cls_name"]
-    conf     = viol["conf"]
+    global _clip_seq
+    frame = encoded.frame
+    t_event = time.time()
+    ts, enqueued_at = int(t_event), time.perf_counter()
+    ticket = None
+    if CLIP_ENABLED:
+        _clip_seq += 1
+        ticket = _ClipTicket(f"{ts}_{slot.cam_id}_{_clip_seq}.{CLIP_FORMAT}",
+                             slot, t_event, len(viols))
+        if not _request_clip(ticket):
+            ticket = None
+    jobs = []
+    for viol in viols:
+        box = (viol["x1"], viol["y1"], viol["x2"], viol["y2"])
+        job = {
+            "crop":        None,
+            "encoded":     encoded,
+            "viol":        {k: v for k, v in viol.items() if k != "track"},
+            "vehicles":    vehicles_in_frame,
+            "slot":        slot,
+            "ts":          ts,
+            "enqueued_at": enqueued_at,
+            "clip":        ticket,
+        }
+        if slot.jpeg is not None and slot.decode_scale > 1:
+            job["jpeg"], job["scale"], job["box"] = slot.jpeg, slot.decode_scale, box
+        else:
+            job["crop"] = _crop_vehicle(frame, box).copy()
+        jobs.append(job)
+    try:
+        _ocr_queue.put_nowait(jobs)
+        with _perf_lock:
+            _perf["ocr_enqueued"] += len(jobs)
+        return True
+    except queue.Full:
+        if ticket is not None:
+            ticket.cancel()
+        with _perf_lock:
+            _perf["ocr_dropped"] += len(jobs)
+            dropped = _perf["ocr_dropped"]
+        if dropped == len(jobs) or dropped % 50 < len(jobs):
+            log.warning("⚠️  OCR queue full (%d) — %d violation(s) dropped (total dropped: %d)",
+                        OCR_QUEUE_SIZE, len(jobs), dropped)
+        return False
 
-    # Crop vehicle with padding
+
+def _crop_vehicle(frame: np.ndarray, box: tuple, scale: int = 1) -> np.ndarray:
+    """Vehicle region with 15px padding; box is in frame/scale coordinates."""
     h, w = frame.shape[:2]
-    pad = 15
-    cx1 = max(0, x1 - pad)
-    cy1 = max(0, y1 - pad)
-    cx2 = min(w, x2 + pad)
-    cy2 = min(h, y2 + pad)
-    car_crop = frame[cy1:cy2, cx1:cx2]
+    pad = 15 * scale
+    x1, y1, x2, y2 = (v * scale for v in box)
+    return frame[max(0, y1 - pad):min(h, y2 + pad), max(0, x1 - pad):min(w, x2 + pad)]
+
+
+def _evidence_crops(jobs: "list[dict]") -> "list[np.ndarray | None]":
+    """
+    OCR crop per job — cut from a full-resolution decode of the original
+    JPEG when one was queued; each distinct JPEG is decoded once per batch.
+    That decode also becomes the jobs' evidence image (job["evidence"]),
+    annotated with their violation boxes, so a reduced detection decode
+    does not shrink the stored violation image.
+    """
+    decoded: dict[int, np.ndarray | None] = {}
+    groups: dict[int, list[dict]] = {}
+    crops = []
+    for job in jobs:
+        if job["crop"] is not None:
+            crops.append(job["crop"])
+            continue
+        key = id(job["jpeg"])
+        if key not in decoded:
+            decoded[key] = cv2.imdecode(np.frombuffer(job["jpeg"], dtype=np.uint8), cv2.IMREAD_COLOR)
+            with _perf_lock:
+                _perf["evidence_decodes"] += 1
+        full = decoded[key]
+        if full is None:
+            crops.append(_crop_vehicle(job["encoded"].frame, job["box"]))
+        else:
+            # copied: the full frame is annotated below
+            crops.append(_crop_vehicle(full, job["box"], job["scale"]).copy())
+            groups.setdefault(key, []).append(job)
+
+    for key, group in groups.items():
+        evidence = _EncodedFrame(_annotate_evidence(decoded[key], group))
+        for job in group:
+            job["evidence"] = evidence
+    return crops
+
+
+def _annotate_evidence(frame: np.ndarray, jobs: "list[dict]") -> np.ndarray:
+    """Full-resolution evidence: stop line + each violating vehicle (boxes scaled up)."""
+    h, w   = frame.shape[:2]
+    scale  = jobs[0]["scale"]
+    thick  = max(2, scale + 1)
+    font   = 0.5 * scale
+    roi_x1, roi_y1, roi_x2, _ = jobs[0]["slot"].roi_box(w, h)
+    cv2.line(frame, (roi_x1, roi_y1), (roi_x2, roi_y1), (50, 50, 220), thick)
+    for job in jobs:
+        viol = job["viol"]
+        x1, y1, x2, y2 = (v * scale for v in job["box"])
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), thick)
+        label = f"#{viol['track_id']} {viol['cls_name']} {viol['conf']*100:.0f}%"
+        cv2.putText(frame, label, (x1 + 2, max(y1 - 8 * scale, int(18 * scale))),
+                    cv2.FONT_HERSHEY_SIMPLEX, font, (0, 0, 255), max(1, scale // 2 + 1), cv2.LINE_AA)
+    return frame
+
+
+def _ocr_worker():
+    """
+    OCR pool worker: completes queued violations off the detection thread.
+    Takes one frame's jobs, then drains whatever else is already queued (up
+    to OCR_BATCH_MAX crops) and OCRs them in one batched call.
+    Starts taking jobs once the OCR reader is ready (loads in parallel with
+    YOLO); violations found meanwhile wait in the queue.
+    """
+    while not _ocr_ready.wait(0.5):
+        if _stop_event.is_set():
+            return
+    while not _stop_event.is_set():
+        try:
+            items = [_ocr_queue.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        jobs = list(items[0])
+        while len(jobs) < OCR_BATCH_MAX:
+            try:
+                item = _ocr_queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            jobs.extend(item)
+
+        now = time.perf_counter()
+        with _perf_lock:
+            for job in jobs:
+                wait_ms = (now - job["enqueued_at"]) * 1000
+                _perf["ocr_wait_ms_total"] += wait_ms
+                _perf["ocr_wait_ms_max"]    = max(_perf["ocr_wait_ms_max"], wait_ms)
+        recorded = [False] * len(jobs)
+        try:
+            # OCR — try to read every license plate in one call (full-res crops)
+            plates = _run_ocr_batch(_evidence_crops(jobs))
+            for i, (job, plate) in enumerate(zip(jobs, plates)):
+                try:
+                    recorded[i] = _complete_violation(job, plate)
+                except Exception as e:
+                    log.error("OCR worker error: %s", e, exc_info=True)
+        except Exception as e:
+            log.error("OCR worker error: %s", e, exc_info=True)
+        finally:
+            # every job settles its frame's clip: kept if any was recorded
+            for job, ok in zip(jobs, recorded):
+                if job["clip"] is not None:
+                    job["clip"].resolve(ok)
+            with _perf_lock:
+                _perf["ocr_processed"] += len(jobs)
+            for _ in items:
+                _ocr_queue.task_done()
 
-    # OCR — try to read license plate
-    plate = _run_ocr(car_crop)
+
+def _complete_violation(job: dict, plate: str):
+    """
+    Asynchronous part of a violation (OCR worker), after its plate was read
+    by the batched OCR call (VN + international, "" = not read):
+    1. Throttle check (same plate not processed within 30s)
+    2. Evidence image = the annotated frame's shared JPEG (raw bytes, no base64),
+       or its full-resolution re-annotation for a reduced ESP32 decode
+    3. Call app.process_violation()
+    4. Publish to MQTT (for ESP32 + ThingsBoard)
+    Returns True if the violation was recorded, False if throttled.
+    """
+    viol     = job["viol"]
+    slot     = job["slot"]
+    cls_name = viol["cls_name"]
+    conf     = viol["conf"]
 
     # Plate throttle: skip if same plate within PLATE_THROTTLE_SEC
     if plate:
@@ -1032,27 +2639,29 @@ def _handle_violation(frame: np.ndarray, viol: dict, vehicles_in_frame: int):
             last_ts = _plate_seen.get(plate, 0)
             if now - last_ts < PLATE_THROTTLE_SEC:
                 log.debug("Plate throttled: %s (%.0fs ago)", plate, now - last_ts)
-                return
+                return False
             _plate_seen[plate] = now
 
-    # Encode violation image (full frame JPEG)
-    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-    image_b64 = base64.b64encode(buf.tobytes()).decode() if ok else ""
+    # Evidence image — full-res when detection ran on a reduced decode, else
+    # the annotated frame (already encoded if it went to the live stream)
+    image_bytes = job.get("evidence", job["encoded"]).jpeg() or b""
 
     vtype_map = {"car": "CAR", "motorcycle": "MOTORBIKE", "bus": "BUS", "truck": "TRUCK"}
     vtype     = vtype_map.get(cls_name, "UNKNOWN")
-    cam_id    = "ESP32-CAM" if _esp32_ever_connected.is_set() else "LAPTOP_CAM"
+    cam_id    = slot.cam_id
 
     payload = {
-        "ts":             int(time.time()),
+        "ts":             job["ts"],
         "plate":          plate or "UNKNOWN",
         "type":           vtype,
         "speed_kmh":      0.0,          # No radar — future enhancement
         "confidence":     round(conf, 4),
-        "image_b64":      image_b64,
+        "image_bytes":    image_bytes,
         "cam_id":         cam_id,
         "roi":            "STOP_LINE",
-        "vehicles_frame": vehicles_in_frame,
+        "vehicles_frame": job["vehicles"],
+        "track_id":       viol["track_id"],
+        "clip_name":      job["clip"].name if job.get("clip") is not None else "",
     }
 
     log.warning("🚨 VIOLATION: plate=%-12s type=%-10s conf=%.2f cam=%s",
@@ -1060,19 +2669,249 @@ def _handle_violation(frame: np.ndarray, viol: dict, vehicles_in_frame: int):
 
     with _perf_lock:
         _perf["violations_found"] += 1
+        slot.violations += 1
 
     # Notify app.py
     _AppRef.process_violation(payload)
 
-    # Publish to MQTT (for ESP32 display + ThingsBoard)
+    # Publish to MQTT (for ESP32 display + ThingsBoard) — in process mode the
+    # child has no MQTT client; the parent publishes when the violation arrives
+    _publish_violation(payload)
+    return True
+
+
+def _publish_violation(payload: dict):
+    """Publish a violation (without the image) on TOPIC_VIOLATION."""
     if _ai_mqtt and _ai_mqtt.is_connected():
         try:
-            mqtt_payload = {k: v for k, v in payload.items() if k != "image_b64"}
+            mqtt_payload = {k: v for k, v in payload.items() if k != "image_bytes"}
             _ai_mqtt.publish(TOPIC_VIOLATION, json.dumps(mqtt_payload), qos=1)
         except Exception as e:
             log.debug("MQTT violation publish error: %s", e)
 
 
+# ════════════════════════════════════════════════════════════════════════════
+# VIOLATION EVIDENCE CLIPS
+# ════════════════════════════════════════════════════════════════════════════
+
+if CLIP_FORMAT not in ("mjpeg", "mp4"):
+    log.warning("⚠️  Unknown AI_CLIP_FORMAT=%r — using 'mjpeg'", CLIP_FORMAT)
+    CLIP_FORMAT = "mjpeg"
+
+
+class _ClipRing:
+    """
+    Last CLIP_PRE_SEC + CLIP_POST_SEC (+1s margin) of one camera's JPEG
+    frames, capped at CLIP_RING_BYTES. Holds references to the bytes objects
+    ingest / the stream push already own: append is O(1) with no copy and no
+    encode; the oldest frames go first when either limit is hit.
+    """
+    __slots__ = ("_frames", "_bytes", "_lock", "budget", "span")
+
+    def __init__(self, budget: int = CLIP_RING_BYTES, span: float = CLIP_PRE_SEC + CLIP_POST_SEC + 1.0):
+        self._frames: "deque[tuple[float, bytes]]" = deque()
+        self._bytes = 0
+        self._lock  = threading.Lock()
+        self.budget = budget
+        self.span   = span
+
+    def append(self, ts: float, jpeg: bytes):
+        if not jpeg or len(jpeg) > self.budget:
+            return
+        with self._lock:
+            frames = self._frames
+            frames.append((ts, jpeg))
+            self._bytes += len(jpeg)
+            while self._bytes > self.budget or ts - frames[0][0] > self.span:
+                self._bytes -= len(frames.popleft()[1])
+
+    def window(self, t0: float, t1: float) -> "list[tuple[float, bytes]]":
+        """Frames with t0 ≤ ts ≤ t1, oldest first (references, no copy)."""
+        with self._lock:
+            return [(ts, b) for ts, b in self._frames if t0 <= ts <= t1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, size = len(self._frames), self._bytes
+            span = self._frames[-1][0] - self._frames[0][0] if n > 1 else 0.0
+        return {"frames": n, "bytes": size, "seconds": round(span, 1)}
+
+
+class _ClipTicket:
+    """
+    One frame's evidence clip, shared by the frame's violation jobs. It is
+    requested when the jobs are queued (the ring still holds the pre-roll)
+    but kept only if _complete_violation records at least one of them —
+    the plate throttle may reject them all. _clip_builder skips a ticket
+    whose jobs were all rejected; a clip built before OCR finished waits
+    here for the last job's verdict.
+    """
+    __slots__ = ("name", "slot", "t_event", "_pending", "_recorded", "_data", "_lock")
+
+    def __init__(self, name: str, slot: _CameraSlot, t_event: float, jobs: int):
+        self.name      = name
+        self.slot      = slot
+        self.t_event   = t_event
+        self._pending  = jobs
+        self._recorded = False
+        self._data: bytes | None = None
+        self._lock     = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """All jobs settled and none recorded → no clip needed."""
+        with self._lock:
+            return self._pending == 0 and not self._recorded
+
+    def cancel(self):
+        """Jobs never reached OCR (queue full)."""
+        with self._lock:
+            self._pending = 0
+
+    def resolve(self, recorded: bool):
+        """One job settled (OCR worker)."""
+        with self._lock:
+            self._pending  -= 1
+            self._recorded |= recorded
+            if self._pending > 0 or self._data is None:
+                return
+            data, self._data = self._data, None
+        self._finish(data, self._recorded)
+
+    def built(self, data: bytes):
+        """Clip bytes ready (clip builder): save now, or hold until OCR settles."""
+        with self._lock:
+            if self._pending > 0:
+                self._data = data
+                return
+        self._finish(data, self._recorded)
+
+    def _finish(self, data: bytes, recorded: bool):
+        if recorded:
+            _AppRef.save_clip(self.name, data)
+        else:
+            with _perf_lock:
+                _perf["clip_cancelled"] += 1
+
+
+def _request_clip(ticket: _ClipTicket) -> bool:
+    """Queue a clip of the ticket's camera ring around its event (never blocks; full → dropped)."""
+    try:
+        _clip_queue.put_nowait((ticket.t_event + CLIP_POST_SEC, ticket))
+    except queue.Full:
+        with _perf_lock:
+            _perf["clip_dropped"] += 1
+        return False
+    with _perf_lock:
+        _perf["clip_requested"] += 1
+    return True
+
+
+def _clip_builder():
+    """
+    Clip worker: waits until a request's post-roll has been buffered, cuts
+    [t_event - CLIP_PRE_SEC, t_event + CLIP_POST_SEC] from the camera's ring
+    and hands the clip to its _ClipTicket (→ app.save_violation_clip() once a
+    violation of the frame is recorded). Requests arrive in event order with
+    the same post-roll, so FIFO is also due-time order.
+    """
+    while not _stop_event.is_set():
+        try:
+            due, ticket = _clip_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            delay = due - time.time()
+            if delay > 0 and _stop_event.wait(delay):
+                break
+            if ticket.cancelled:            # every violation throttled: skip the build
+                with _perf_lock:
+                    _perf["clip_cancelled"] += 1
+                continue
+            t0 = time.perf_counter()
+            data = _build_clip(ticket.slot.clip_ring.window(ticket.t_event - CLIP_PRE_SEC, due))
+            with _perf_lock:
+                _perf["clip_ms_total"] += (time.perf_counter() - t0) * 1000
+                if data:
+                    _perf["clip_built"]       += 1
+                    _perf["clip_bytes_total"] += len(data)
+                else:
+                    _perf["clip_failed"] += 1
+            if data:
+                ticket.built(data)
+        except Exception as e:
+            log.error("Clip builder error: %s", e, exc_info=True)
+            with _perf_lock:
+                _perf["clip_failed"] += 1
+        finally:
+            _clip_queue.task_done()
+
+
+_clip_fourcc = ""          # mp4 codec that opened first (H.264 plays in browsers, mp4v fallback)
+
+
+def _build_clip(frames: "list[tuple[float, bytes]]") -> bytes | None:
+    """
+    MJPEG = the JPEGs back to back (plays in ffplay / VLC, no decode needed);
+    mp4 = decoded and re-encoded with cv2.VideoWriter at the frames' own rate.
+    """
+    global _clip_fourcc
+    if not frames:
+        return None
+    if CLIP_FORMAT == "mjpeg":
+        return b"".join(jpeg for _, jpeg in frames)
+
+    span = frames[-1][0] - frames[0][0]
+    fps  = min(30.0, max(1.0, (len(frames) - 1) / span)) if span > 0 else 1.0
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        writer, size = None, None
+        for _, jpeg in frames:
+            img = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                continue
+            if writer is None:
+                size = (img.shape[1], img.shape[0])
+                for fourcc in ((_clip_fourcc,) if _clip_fourcc else ("avc1", "mp4v")):
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+                    if writer.isOpened():
+                        _clip_fourcc = fourcc       # skip failing codecs on later clips
+                        break
+                if not writer.isOpened():
+                    log.warning("⚠️  cv2.VideoWriter cannot write mp4 — set AI_CLIP_FORMAT=mjpeg")
+                    return None
+            elif (img.shape[1], img.shape[0]) != size:
+                img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+            writer.write(img)
+        if writer is None:
+            return None
+        writer.release()
+        return Path(path).read_bytes()
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+def _clip_stats(p: dict, cameras: dict) -> dict:
+    """Clip builder counters + ring memory over all cameras (from their status)."""
+    return {
+        "enabled":      CLIP_ENABLED,
+        "format":       CLIP_FORMAT,
+        "pre_s":        CLIP_PRE_SEC,
+        "post_s":       CLIP_POST_SEC,
+        "ring_mb_per_camera": round(CLIP_RING_BYTES / 1048576, 1),
+        "ring_bytes":   sum(c["clip_ring"]["bytes"] for c in cameras.values()),
+        "pending":      _clip_queue.qsize(),
+        "requested":    p["clip_requested"],
+        "built":        p["clip_built"],
+        "dropped":      p["clip_dropped"],
+        "failed":       p["clip_failed"],
+        "cancelled":    p["clip_cancelled"],
+        "build_ms_avg": round(p["clip_ms_total"] / max(1, p["clip_built"] + p["clip_failed"]), 1),
+        "kb_avg":       round(p["clip_bytes_total"] / 1024 / max(1, p["clip_built"]), 1),
+    }
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # CONTEXT PUBLISHER
 # ════════════════════════════════════════════════════════════════════════════
@@ -1120,7 +2959,397 @@ def _update_app_frame(frame: np.ndarray):
     Push detection-annotated frame to app.py's Camera Laptop stream.
     Wraps _AppRef.push_frame() for backward compatibility.
     """
-    _AppRef.push_frame(frame)
+    _AppRef.push_frame(_EncodedFrame(frame).jpeg())
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# ENGINE PROCESS MODE — detection in a child process (AI_ENGINE_MODE=process)
+# ════════════════════════════════════════════════════════════════════════════
+#
+#   parent (app.py process)                    child (_engine_process_main)
+#   ───────────────────────                    ────────────────────────────
+#   AI-MQTT → _ingest_esp32_frame ──frames_in ring──▶ AI-FrameIn → camera slots
+#   sync_light_state ───────────────ctrl queue──────▶ control loop → light/stop
+#   AI-FrameOut → app.set_ai_frame ◀──frames_out ring── _AppRef.push_frame
+#   AI-Results → app.process_violation,              _AppRef.process_violation,
+#                update_ai_context, status ◀─results─ update_context, status
+#
+# The app-facing contract (process_violation / update_ai_context /
+# get_esp32_status / sync_light_state) is unchanged in both modes.
+#
+
+class _ShmFrameRing:
+    """
+    Single-writer / single-reader ring of byte frames (JPEG) in
+    multiprocessing.shared_memory. Memory layout:
+      header  : write_count (u64)
+      slot[i] : seq (u64) | length (u64) | ts (f64) | cam_id (40s) | data
+    Each slot is a seqlock: the writer stores an odd seq while copying, then
+    2·(n+1) for frame n. The reader accepts frame n only if seq reads
+    2·(n+1) before and after its copy; a reader lapped by the writer skips
+    ahead to the oldest frame still in the ring.
+    """
+    _HDR      = 64
+    _SLOT_HDR = 64
+    _META     = struct.Struct("<Qd40s")
+
+    def __init__(self, event, slots: int = SHM_RING_SLOTS, slot_bytes: int = SHM_SLOT_BYTES,
+                 name: str | None = None):
+        self.slots, self.slot_bytes = slots, slot_bytes
+        self.event  = event                   # mp.Event — set on every write
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=self._HDR + slots * (self._SLOT_HDR + slot_bytes))
+        else:
+            # spawn children share the parent's resource tracker → the creator unlinks
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._read_count = 0
+        self.stats = {"written": 0, "read": 0, "oversize": 0, "lapped": 0, "torn": 0}
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def spec(self) -> dict:
+        """Picklable description for the other process (see attach())."""
+        return {"name": self.name, "slots": self.slots, "slot_bytes": self.slot_bytes,
+                "event": self.event}
+
+    @classmethod
+    def attach(cls, spec: dict) -> "_ShmFrameRing":
+        return cls(spec["event"], spec["slots"], spec["slot_bytes"], name=spec["name"])
+
+    def _offset(self, n: int) -> int:
+        return self._HDR + (n % self.slots) * (self._SLOT_HDR + self.slot_bytes)
+
+    def _write_count(self) -> int:
+        return struct.unpack_from("<Q", self.shm.buf, 0)[0]
+
+    def write(self, cam_id: str, data: bytes, ts: float) -> bool:
+        if len(data) > self.slot_bytes:
+            self.stats["oversize"] += 1
+            return False
+        buf = self.shm.buf
+        n   = self._write_count()
+        off = self._offset(n)
+        struct.pack_into("<Q", buf, off, 2 * n + 1)                   # writing
+        self._META.pack_into(buf, off + 8, len(data), ts, cam_id.encode()[:40])
+        buf[off + self._SLOT_HDR:off + self._SLOT_HDR + len(data)] = data
+        struct.pack_into("<Q", buf, off, 2 * n + 2)                   # committed
+        struct.pack_into("<Q", buf, 0, n + 1)
+        self.stats["written"] += 1
+        self.event.set()
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a frame newer than the last read exists (or timeout)."""
+        self.event.clear()
+        if self._write_count() > self._read_count:
+            return True
+        return self.event.wait(timeout)
+
+    def read_new(self) -> list[tuple[str, bytes, float]]:
+        """All committed frames since the last call → [(cam_id, data, ts), ...]."""
+        buf   = self.shm.buf
+        end   = self._write_count()
+        start = max(self._read_count, end - self.slots + 1)   # oldest slot may be mid-write
+        self.stats["lapped"] += start - self._read_count
+        out = []
+        for n in range(start, end):
+            off = self._offset(n)
+            if struct.unpack_from("<Q", buf, off)[0] != 2 * n + 2:
+                self.stats["torn"] += 1
+                continue
+            length, ts, cam = self._META.unpack_from(buf, off + 8)
+            data = bytes(buf[off + self._SLOT_HDR:off + self._SLOT_HDR + length])
+            if struct.unpack_from("<Q", buf, off)[0] != 2 * n + 2:
+                self.stats["torn"] += 1
+                continue
+            out.append((cam.rstrip(b"\0").decode(errors="ignore"), data, ts))
+        self._read_count = end
+        self.stats["read"] += len(out)
+        return out
+
+    def close(self):
+        try:
+            self.shm.close()
+            if self._owner:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+class _EngineProcess:
+    """Parent-side handle on the engine child: rings, queues, pump threads."""
+
+    def __init__(self):
+        ctx = mp.get_context("spawn")     # no fork of a threaded Flask process
+        self.ctrl_q     = ctx.Queue()
+        self.result_q   = ctx.Queue(maxsize=ENGINE_RESULT_QUEUE)
+        self.frames_in  = _ShmFrameRing(ctx.Event())
+        self.frames_out = _ShmFrameRing(ctx.Event())
+        self._in_lock   = threading.Lock()          # MQTT thread(s) → single ring writer
+        self._status: dict = {}
+        self._status_lock = threading.Lock()
+        self._stopping  = False
+        with _light_lock:
+            light = _current_light
+        self.proc = ctx.Process(
+            target=engine_child.main, name="AI-Engine", daemon=True,
+            args=({"frames_in": self.frames_in.spec(), "frames_out": self.frames_out.spec(),
+                   "ctrl_q": self.ctrl_q, "result_q": self.result_q, "light": light},))
+
+    def start(self):
+        # spawn re-runs __main__ in the child: present the side-effect-free
+        # engine_child instead of app.py (DB init, Flask app, MQTT consumers)
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = engine_child
+        try:
+            self.proc.start()
+        finally:
+            sys.modules["__main__"] = main
+        threading.Thread(target=self._result_pump, name="AI-Results", daemon=True).start()
+        threading.Thread(target=self._frame_pump, name="AI-FrameOut", daemon=True).start()
+        atexit.register(self.stop)
+        log.info("🧩 Engine process started (pid=%d) | shm rings %d×%dKB",
+                 self.proc.pid, SHM_RING_SLOTS, SHM_SLOT_BYTES // 1024)
+
+    def push_frame(self, cam_id: str, frame_bytes: bytes, ts: float):
+        with self._in_lock:
+            if not self.frames_in.write(cam_id, frame_bytes, ts):
+                log.debug("Frame too large for shm slot (%d > %d bytes) — dropped",
+                          len(frame_bytes), SHM_SLOT_BYTES)
+
+    def send_light(self, light: str):
+        self.ctrl_q.put(("light", light))
+
+    def _result_pump(self):
+        """Child → parent messages → app.py calls (same contract as thread mode)."""
+        reported_dead = False
+        while not _stop_event.is_set():
+            try:
+                msg = self.result_q.get(timeout=1.0)
+            except queue.Empty:
+                if not self.proc.is_alive() and not self._stopping and not reported_dead:
+                    log.error("❌ Engine process exited (code=%s) — detection stopped",
+                              self.proc.exitcode)
+                    reported_dead = True
+                continue
+            except (EOFError, OSError):
+                break
+            kind = msg[0]
+            try:
+                if kind == "violation":
+                    _AppRef.process_violation(msg[1])
+                    _publish_violation(msg[1])
+                elif kind == "clip":
+                    _AppRef.save_clip(msg[1], msg[2])
+                elif kind == "context":
+                    _AppRef.update_context(msg[1], msg[2], **msg[3])
+                elif kind == "status":
+                    with self._status_lock:
+                        self._status = msg[1]
+            except Exception as e:
+                log.error("Engine result %s error: %s", kind, e)
+
+    def _frame_pump(self):
+        """Annotated frames from the child → Camera Laptop stream (newest wins)."""
+        while not _stop_event.is_set():
+            if not self.frames_out.wait(0.5):
+                continue
+            frames = self.frames_out.read_new()
+            if frames:
+                _AppRef.push_frame(frames[-1][1])
+
+    def status(self, local: dict) -> dict:
+        """Child's detection status + this process's MQTT / ingest view."""
+        with self._status_lock:
+            reported = bool(self._status)
+            st = dict(self._status) if reported else dict(local)
+        child_rings = st.pop("engine_rings", {})
+        st.pop("engine_perf", None)
+        # app.process_violation runs here (AI-Results pump), not in the child
+        st["stages"] = {**st.get("stages", {}),
+                        "process_violation": local["stages"]["process_violation"]}
+        for key in ("mqtt_available", "mqtt_connected", "ever_connected",
+                    "demo_mode", "last_frame_age", "frame_source"):
+            st[key] = local[key]
+        # unknown ids are rejected here, over-cap ids in the child
+        adm = local["camera_admission"]
+        if reported and "camera_admission" in st:
+            adm = {**adm, "rejected_frames": adm["rejected_frames"] +
+                   st["camera_admission"]["rejected_frames"]}
+        st["camera_admission"] = adm
+
+        def ring(writer: dict, reader: dict) -> dict:
+            return {"written": writer.get("written", 0), "oversize": writer.get("oversize", 0),
+                    "read": reader.get("read", 0), "lapped": reader.get("lapped", 0),
+                    "torn": reader.get("torn", 0)}
+
+        st["engine"] = {
+            "mode":       "process",
+            "pid":        self.proc.pid,
+            "alive":      self.proc.is_alive(),
+            "reported":   bool(self._status),
+            "frames_in":  ring(self.frames_in.stats, child_rings.get("frames_in", {})),
+            "frames_out": ring(child_rings.get("frames_out", {}), self.frames_out.stats),
+        }
+        return st
+
+    def perf_counters(self) -> dict:
+        """Child's raw _perf counters from its last status snapshot (+ this process's rejections)."""
+        with self._status_lock:
+            p = dict(self._status.get("engine_perf", {})) if self._status else {}
+        with _perf_lock:
+            p["camera_rejected"] = p.get("camera_rejected", 0) + _perf["camera_rejected"]
+        return p
+
+    def frame_channels(self) -> list[dict]:
+        """Child's ingest channel stats from its last status snapshot."""
+        with self._status_lock:
+            return list(self._status.get("frame_channels", [])) if self._status else []
+
+    def stop(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        try:
+            self.ctrl_q.put(("stop",))
+            self.proc.join(timeout=3)
+            if self.proc.is_alive():
+                self.proc.terminate()
+        except Exception:
+            pass
+        self.frames_in.close()
+        self.frames_out.close()
+
+
+class _EngineChildLink:
+    """Child-side `_AppRef._remote`: app.py calls → messages / ring writes to the parent."""
+
+    def __init__(self, result_q, frames_out: _ShmFrameRing):
+        self.result_q   = result_q
+        self.frames_out = frames_out
+        self._out_lock  = threading.Lock()
+
+    def send_violation(self, payload: dict):
+        try:
+            self.result_q.put(("violation", payload), timeout=2.0)
+        except queue.Full:
+            log.error("Engine result queue full — violation lost: %s", payload.get("plate"))
+
+    def send_clip(self, clip_name: str, data: bytes):
+        try:
+            self.result_q.put(("clip", clip_name, data), timeout=2.0)
+        except queue.Full:
+            log.error("Engine result queue full — clip lost: %s", clip_name)
+
+    def send_context(self, vehicles: int, fps: float, kw: dict):
+        try:
+            self.result_q.put_nowait(("context", vehicles, fps, kw))
+        except queue.Full:
+            pass        # next tick sends a fresher one
+
+    def send_status(self, status: dict):
+        try:
+            self.result_q.put_nowait(("status", status))
+        except queue.Full:
+            pass
+
+    def push_frame(self, jpeg: bytes):
+        with self._out_lock:
+            self.frames_out.write("stream", jpeg, time.time())
+
+
+def _start_engine_process():
+    """Parent side of start_ai() in process mode."""
+    global _engine
+    _engine = _EngineProcess()
+    _engine.start()
+
+    # MQTT stays in this process: light → child, violations → broker; frames
+    # reach _ingest_esp32_frame → ring through app's frame_ingest subscription
+    threading.Thread(target=_mqtt_worker, name="AI-MQTT", daemon=True).start()
+    log.info("✅ AI Engine (process mode) started: MQTT + Results + FrameOut | engine pid=%d",
+             _engine.proc.pid)
+
+
+def _engine_frame_in_worker(ring: _ShmFrameRing):
+    """Child: frames from the parent's MQTT ingest → camera slots."""
+    while not _stop_event.is_set():
+        if not ring.wait(0.5):
+            continue
+        for cam_id, data, _ts in ring.read_new():
+            _ingest_esp32_frame(cam_id, data)
+
+
+def _engine_status_worker(link: _EngineChildLink, frames_in: _ShmFrameRing):
+    """Child: periodic status snapshot for the parent's get_esp32_status()."""
+    while not _stop_event.wait(ENGINE_STATUS_INTERVAL):
+        try:
+            st = _local_status()
+            st["engine_rings"] = {"frames_in":  dict(frames_in.stats),
+                                  "frames_out": dict(link.frames_out.stats)}
+            with _perf_lock:
+                st["engine_perf"] = dict(_perf)
+            link.send_status(st)
+        except Exception as e:
+            log.debug("Engine status error: %s", e)
+
+
+def _engine_process_main(cfg: dict):
+    """
+    Engine child process body (spawned by _EngineProcess, via engine_child.main).
+    Runs model loading, detection and the OCR pool; talks to the parent only
+    through the shm rings and queues in cfg.
+    """
+    frames_in  = _ShmFrameRing.attach(cfg["frames_in"])
+    frames_out = _ShmFrameRing.attach(cfg["frames_out"])
+    link       = _EngineChildLink(cfg["result_q"], frames_out)
+    _AppRef._remote = link
+    sync_light_state(cfg["light"])
+
+    log.info("🧩 Engine process running (pid=%d)", os.getpid())
+    workers = [
+        threading.Thread(target=_load_models_worker, name="AI-ModelLoader", daemon=True),
+        threading.Thread(target=_engine_frame_in_worker, args=(frames_in,),
+                         name="AI-FrameIn", daemon=True),
+        threading.Thread(target=_detection_loop, name="AI-Detection", daemon=True),
+    ]
+    workers += [threading.Thread(target=_ocr_worker, name=f"AI-OCR-{i + 1}", daemon=True)
+                for i in range(max(1, OCR_WORKERS))]
+    if CLIP_ENABLED:
+        workers.append(threading.Thread(target=_clip_builder, name="AI-Clips", daemon=True))
+    workers.append(threading.Thread(target=_engine_status_worker, args=(link, frames_in),
+                                    name="AI-Status", daemon=True))
+    for t in workers:
+        t.start()
+
+    # Control loop (main thread): light changes + stop
+    ctrl_q = cfg["ctrl_q"]
+    while True:
+        try:
+            msg = ctrl_q.get()
+        except (EOFError, OSError):
+            break
+        if msg[0] == "light":
+            sync_light_state(msg[1])
+        elif msg[0] == "stop":
+            break
+
+    _stop_event.set()
+    with _frame_cond:
+        _frame_cond.notify_all()
+    deadline = time.monotonic() + ENGINE_STOP_JOIN_SEC
+    for t in workers:
+        t.join(timeout=max(0.0, deadline - time.monotonic()))
+    stuck = [t.name for t in workers if t.is_alive()]
+    if stuck:
+        log.warning("⚠️  Engine threads still running at shutdown: %s", ", ".join(stuck))
+    frames_in.close()
+    frames_out.close()
+    log.info("🛑 Engine process stopped")
 
 
 # ════════════════════════════════════════════════════════════════════════════
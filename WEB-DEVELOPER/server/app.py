@@ -26,6 +26,7 @@
 ║    app.get_current_light() → str   ← ai_engine đọc đèn traffic            ║
 ║    app.update_ai_context(v, fps)   ← ai_engine update context + emit      ║
 ║    app.process_violation(payload)  ← ai_engine gửi vi phạm                ║
+║    app.save_violation_clip(name, b) ← ai_engine gửi clip bằng chứng       ║
 ║                                                                              ║
 ║  VERSION HISTORY:                                                            ║
 ║    v5.0  Traffic cycle + AI engine integration + DEMO/REAL mode           ║
@@ -39,6 +40,7 @@
 """
 
 import os, time, json, sqlite3, threading, logging, logging.handlers, base64, re
+from collections import OrderedDict
 from datetime import datetime, timezone
 from functools import wraps
 from pathlib import Path
@@ -50,6 +52,10 @@ import requests
 from flask import Flask, request, jsonify, send_from_directory, Response, g
 from flask_socketio import SocketIO, emit
 
+import frame_ingest
+import metrics
+from frame_channel import FrameChannel
+
 # ════════════════════════════════════════════════════════════════════════════
 # LOGGING — Rotating file + console + errors
 # ════════════════════════════════════════════════════════════════════════════
@@ -101,9 +107,11 @@ BASE_DIR     = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
 FRONTEND_DIR = PROJECT_ROOT / "DEVELOPER"
 IMAGE_DIR    = PROJECT_ROOT / "imge"
+CLIP_DIR     = IMAGE_DIR / "clips"          # violation evidence clips (/imge/clips/...)
 DB_PATH      = BASE_DIR / "traffic_ai.db"
 
 IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+CLIP_DIR.mkdir(parents=True, exist_ok=True)
 
 # Auto-create DEVELOPER/ with premium placeholder if missing
 if not FRONTEND_DIR.exists():
@@ -170,9 +178,12 @@ MQTT_HOST  = os.getenv("MQTT_HOST", "broker.hivemq.com")
 MQTT_PORT  = int(os.getenv("MQTT_PORT", 1883))
 MQTT_KEEPALIVE = 60
 
+# Socket.IO "context_update" rate cap (ai_engine / MQTT context may update per frame)
+CONTEXT_EMIT_MAX_HZ = max(0.1, float(os.getenv("CONTEXT_EMIT_MAX_HZ", 4)))
+
 # MQTT topics
 TOPIC_ESP32_STATUS  = "traffic/esp32/status"
-TOPIC_ESP32_FRAME   = "traffic/esp32/frame"
+TOPIC_ESP32_FRAME   = frame_ingest.TOPIC_ESP32_FRAME # + "/<cam_id>" per camera (frame_ingest)
 TOPIC_AI_VIOLATION  = "traffic/ai/violation"
 TOPIC_AI_CONTEXT    = "traffic/ai/context"
 TOPIC_TRAFFIC_STATE = "traffic/light/state"
@@ -187,6 +198,7 @@ TB_ACCESS_TOKEN = os.getenv("TB_TOKEN", "")
 # Auth
 DASHBOARD_SECRET = os.getenv("DASHBOARD_SECRET", "TRAFFIC_AI_TOKEN")
 THEME_TOKEN      = os.getenv("THEME_TOKEN", "premium-2026")
+METRICS_TOKEN    = os.getenv("METRICS_TOKEN", "")    # empty → /metrics open (like /api/health)
 _ADMIN_USER      = "admin"
 _ADMIN_PASS      = "admin123"
 _ADMIN_ROLE      = "superadmin"
@@ -262,13 +274,72 @@ CAMERA_OPTIMAL = {
     "sharpness": 2, "denoise": 1, "xclk_freq_hz": 20_000_000,
 }
 
+# ════════════════════════════════════════════════════════════════════════════
+# METRICS — in-process counters for GET /metrics (Prometheus text format)
+# ════════════════════════════════════════════════════════════════════════════
+M_HTTP_REQUESTS   = metrics.counter("traffic_http_requests_total", "HTTP requests",
+                                    ("method", "route", "status"))
+M_HTTP_LATENCY    = metrics.histogram("traffic_http_request_duration_seconds",
+                                      "HTTP handler time until the response object is returned "
+                                      "(streams: until streaming starts)", ("method", "route"))
+M_MQTT_MESSAGES   = metrics.counter("traffic_mqtt_messages_total", "MQTT messages received by app, by topic kind",
+                                    ("topic",))
+M_FRAMES_INGESTED = metrics.counter("traffic_frames_ingested_total", "Frames received / produced", ("source",))
+M_VIOL_WRITTEN    = metrics.counter("traffic_violations_written_total", "Violations saved to SQLite", ("type",))
+M_VIOL_SKIPPED    = metrics.counter("traffic_violations_skipped_total", "Violations not saved", ("reason",))
+# MQTT topic → fixed label value: topics come from a public broker (per-camera
+# frame topics, anything else a publisher sends), so raw topics are not labels.
+_MQTT_TOPIC_LABELS = {
+    TOPIC_ESP32_STATUS:  "esp32_status",
+    TOPIC_AI_VIOLATION:  "ai_violation",
+    TOPIC_AI_CONTEXT:    "ai_context",
+    TOPIC_TRAFFIC_STATE: "light",
+    TOPIC_THEME_UPDATE:  "theme",
+}
+
+
+def _mqtt_topic_label(topic: str) -> str:
+    if frame_ingest.is_frame_topic(topic):
+        return "frame"
+    return _MQTT_TOPIC_LABELS.get(topic, "other")
+
+
+M_DB_WRITE        = metrics.histogram("traffic_db_write_seconds", "SQLite write latency", ("op",),
+                                      buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+M_WS_CLIENTS      = metrics.gauge("traffic_socketio_clients", "Connected Socket.IO clients")
+M_WS_EMITS        = metrics.counter("traffic_socketio_emits_total", "Socket.IO broadcast emits", ("event",))
+
+
+class _CountingSocketIO(SocketIO):
+    """SocketIO whose server-side emit() is counted per event (M_WS_EMITS)."""
+
+    def emit(self, event, *args, **kwargs):
+        M_WS_EMITS.labels(event).inc()
+        return super().emit(event, *args, **kwargs)
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # FLASK APP + SOCKETIO
 # ════════════════════════════════════════════════════════════════════════════
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "traffic-ai-secret-v6-2026")
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading",
-                    logger=False, engineio_logger=False)
+socketio = _CountingSocketIO(app, cors_allowed_origins="*", async_mode="threading",
+                             logger=False, engineio_logger=False)
+
+
+@app.before_request
+def _metrics_start():
+    g.t_metrics = time.perf_counter()
+
+
+@app.after_request
+def _metrics_observe(response):
+    t0 = g.pop("t_metrics", None)
+    if t0 is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        M_HTTP_LATENCY.labels(request.method, route).observe(time.perf_counter() - t0)
+        M_HTTP_REQUESTS.labels(request.method, route, response.status_code).inc()
+    return response
 
 # ════════════════════════════════════════════════════════════════════════════
 # SHARED STATE — all protected by state_lock (RLock for re-entrant safety)
@@ -303,9 +374,24 @@ devices_state = {
     "esp32_led":   {"name":"LED 7 Đoạn", "ip":"192.168.1.111","status":"OFFLINE","signal":0,"temp":0,"uptime":0,"last_seen":0,"fw":""},
 }
 
-# ESP32 Camera Live frame buffer (populated by ai_engine via MQTT)
-latest_frame: bytes | None = None
-frame_lock = threading.Lock()
+# ESP32 Camera Live frames: MQTT ingest → /video_feed clients (newest wins).
+# dropped = frames no client streamed before the next one replaced them.
+live_frames = FrameChannel("video_feed", capacity=1, policy="drop_oldest")
+
+
+def _on_live_frame(cam_id: str, jpeg):
+    """frame_ingest consumer: ESP32 JPEG → /video_feed."""
+    live_frames.put(jpeg)
+    with state_lock:
+        system_stats["frames_processed"] += 1
+        context_state["esp32_connected"]  = True
+        context_state["ai_mode"]          = "REAL"
+    M_FRAMES_INGESTED.labels("esp32").inc()
+
+
+# This process's MQTT client is the only frame subscriber: frame_ingest parses
+# each message once and hands it to /video_feed and (start_ai) ai_engine.
+frame_ingest.INGEST.subscribe("video_feed", _on_live_frame)
 
 system_stats = {
     "start_time": time.time(), "violations_total": 0, "violations_today": 0,
@@ -333,8 +419,7 @@ system_stats = {
 
 _laptop_cam_active = False
 _laptop_cam_thread = None
-_laptop_frame: bytes | None = None
-_laptop_frame_lock = threading.Lock()
+_laptop_frames     = FrameChannel("laptop_feed", capacity=1, policy="drop_oldest")  # HUD + AI frames
 _laptop_cam_stop   = threading.Event()
 _LAPTOP_W, _LAPTOP_H = 1280, 720
 
@@ -349,9 +434,7 @@ def set_ai_frame(frame_bytes: bytes) -> None:
     These frames appear on Camera Laptop stream overlaid with YOLO bounding boxes.
     Thread-safe. Called from ai_engine._update_app_frame().
     """
-    global _laptop_frame
-    with _laptop_frame_lock:
-        _laptop_frame = frame_bytes
+    _laptop_frames.put(frame_bytes)
 
 
 def _draw_overlay(frame: np.ndarray) -> np.ndarray:
@@ -415,21 +498,26 @@ def _draw_overlay(frame: np.ndarray) -> np.ndarray:
     return frame
 
 
-def _generate_demo_frame_laptop(fidx: int) -> np.ndarray:
-    """
-    High-quality animated demo frame for Camera Laptop when no webcam available.
-    Shows moving vehicles with license plates, road scene, and DEMO watermark.
-    """
+_demo_laptop_bg:  np.ndarray | None = None   # static layers (built once)
+_demo_laptop_buf: np.ndarray | None = None   # reused output buffer
+
+
+def _demo_laptop_background() -> np.ndarray:
+    """Static layers of the laptop demo frame: sky, road, lane markers, DEMO watermark."""
+    global _demo_laptop_bg
+    if _demo_laptop_bg is not None:
+        return _demo_laptop_bg
     W, H = _LAPTOP_W, _LAPTOP_H
     frame = np.zeros((H, W, 3), dtype=np.uint8)
 
     # Sky gradient
-    for y in range(int(H * 0.55)):
-        ratio = y / (H * 0.55)
-        b = int(28 - ratio * 18)
-        g = int(18 - ratio * 8)
-        r = int(10 - ratio * 5)
-        frame[y, :] = (max(0,r), max(0,g), max(0,b))
+    sky_h = int(H * 0.55)
+    ratio = np.arange(sky_h) / (H * 0.55)
+    b = (28 - ratio * 18).astype(np.int32)
+    g = (18 - ratio * 8).astype(np.int32)
+    r = (10 - ratio * 5).astype(np.int32)
+    frame[:sky_h] = np.stack([np.maximum(0, r), np.maximum(0, g), np.maximum(0, b)],
+                             axis=1)[:, None, :].astype(np.uint8)
 
     # Road surface
     cv2.rectangle(frame, (0, int(H*0.55)), (W, H), (22, 28, 36), -1)
@@ -438,8 +526,37 @@ def _generate_demo_frame_laptop(fidx: int) -> np.ndarray:
     for xi in range(0, W, 80):
         cv2.line(frame, (xi, int(H*0.72)), (xi+40, int(H*0.72)), (60, 70, 80), 2)
 
+    # DEMO watermark (above the road — vehicles never overlap it)
+    overlay_txt = frame.copy()
+    cv2.putText(overlay_txt, "DEMO MODE",
+                (int(W*0.34), int(H*0.40)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.8, (15, 25, 45), 4, cv2.LINE_AA)
+    cv2.addWeighted(overlay_txt, 0.6, frame, 0.4, 0, frame)
+    cv2.putText(frame, "Connect ESP32-CAM to switch LIVE detection",
+                (int(W*0.18), int(H*0.48)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.62, (30, 70, 120), 1, cv2.LINE_AA)
+
+    frame.flags.writeable = False
+    _demo_laptop_bg = frame
+    return frame
+
+
+def _generate_demo_frame_laptop(fidx: int) -> np.ndarray:
+    """
+    High-quality animated demo frame for Camera Laptop when no webcam available.
+    Shows moving vehicles with license plates, road scene, and DEMO watermark.
+    Static layers are prebuilt; only the vehicles are drawn, into a reused
+    buffer — the caller overlays + encodes it before the next call.
+    """
+    global _demo_laptop_buf
+    W, H = _LAPTOP_W, _LAPTOP_H
+    bg = _demo_laptop_background()
+    if _demo_laptop_buf is None:
+        _demo_laptop_buf = np.empty_like(bg)
+    frame = _demo_laptop_buf
+    np.copyto(frame, bg)
+
     # Animated vehicles
-    t = time.time()
     vx1 = int((W * 0.06) + (fidx * 4) % int(W * 0.80))
     vy1 = int(H * 0.66)
     # Car 1 — blue sedan
@@ -460,16 +577,6 @@ def _generate_demo_frame_laptop(fidx: int) -> np.ndarray:
     cv2.putText(frame, "30A-99001", (vx2-11, vy2+14),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.28, (30, 30, 30), 1)
 
-    # DEMO watermark
-    overlay_txt = frame.copy()
-    cv2.putText(overlay_txt, "DEMO MODE",
-                (int(W*0.34), int(H*0.40)),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.8, (15, 25, 45), 4, cv2.LINE_AA)
-    cv2.addWeighted(overlay_txt, 0.6, frame, 0.4, 0, frame)
-    cv2.putText(frame, "Connect ESP32-CAM to switch LIVE detection",
-                (int(W*0.18), int(H*0.48)),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.62, (30, 70, 120), 1, cv2.LINE_AA)
-
     return frame
 
 
@@ -515,8 +622,7 @@ def _laptop_cam_worker():
             first_frame = _draw_overlay(first_frame)
             ok, buf = cv2.imencode(".jpg", first_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
             if ok:
-                with _laptop_frame_lock:
-                    _laptop_frame = buf.tobytes()
+                _laptop_frames.put(buf.tobytes())
         log_laptop.info("✅ Camera Laptop opened: %dx%d@30fps (VideoCapture(0))", _LAPTOP_W, _LAPTOP_H)
     else:
         cap.release()
@@ -547,10 +653,10 @@ def _laptop_cam_worker():
 
             ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
             if ok:
-                with _laptop_frame_lock:
-                    _laptop_frame = buf.tobytes()
+                _laptop_frames.put(buf.tobytes())
                 with state_lock:
                     system_stats["frames_processed"] += 1
+                M_FRAMES_INGESTED.labels("laptop").inc()
 
             # FPS calculation + emit
             fps_count += 1
@@ -585,6 +691,8 @@ def _gen_laptop_frames():
     immediately → FPS counter shows correct value.
     Placeholder is same resolution (1280x720) as live frames → MJPEG
     parser doesn't get confused when switching.
+    Each client waits for the next new frame of _laptop_frames (never re-sends
+    the same one); frames it was too slow for count as reader_skipped.
     """
     # Pre-build placeholder (same resolution as live frames)
     _ph = np.zeros((_LAPTOP_H, _LAPTOP_W, 3), dtype=np.uint8)
@@ -600,16 +708,15 @@ def _gen_laptop_frames():
 
     BOUNDARY = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
 
+    seq = 0
     while True:
-        with _laptop_frame_lock:
-            frame = _laptop_frame
+        seq, frame = _laptop_frames.read_newer(seq, timeout=0.1)
 
-        if frame is None:
-            yield BOUNDARY + placeholder + b"\r\n"
-            time.sleep(0.1)
-        else:
+        if frame is not None:
             yield BOUNDARY + frame + b"\r\n"
             time.sleep(0.033)  # ~30fps ceiling
+        elif _laptop_frames.latest() is None:
+            yield BOUNDARY + placeholder + b"\r\n"
 
 
 @app.route("/laptop_feed")
@@ -641,14 +748,12 @@ def api_laptop_start():
 
 @app.post("/api/laptop_camera/stop")
 def api_laptop_stop():
-    global _laptop_frame
     auth = request.headers.get("Authorization", "")
     tok  = auth.removeprefix("Bearer ").strip()
     if not _is_valid_token(tok):
         return jsonify({"ok": False, "error": "Unauthorized"}), 401
     _laptop_cam_stop.set()
-    with _laptop_frame_lock:
-        _laptop_frame = None
+    _laptop_frames.clear()
     log_laptop.info("🛑 Camera Laptop stopped by %s", request.remote_addr)
     _log_event("INFO", "LAPTOP_CAM", "Camera Laptop dừng")
     return jsonify({"ok": True, "status": "stopped"})
@@ -673,7 +778,7 @@ def api_laptop_status():
         fps = _laptop_fps_value
     return jsonify({
         "ok": True, "active": _laptop_cam_active,
-        "frame_ready": _laptop_frame is not None,
+        "frame_ready": _laptop_frames.latest() is not None,
         "fps": round(fps, 1),
         "context_ok": ctx_ok, "context_errors": ctx_err,
         "traffic_light": traffic_state["light"],
@@ -692,8 +797,7 @@ def api_laptop_snapshot():
     plate  = (data.get("plate") or "SNAP_LAPTOP").strip().upper()
     inject = data.get("inject_violation", False)
 
-    with _laptop_frame_lock:
-        frame_bytes = _laptop_frame
+    frame_bytes = _laptop_frames.latest()
 
     image_url = ""
     if frame_bytes:
@@ -714,12 +818,13 @@ def api_laptop_snapshot():
             "type":           data.get("type", "MOTORBIKE"),
             "speed_kmh":      float(data.get("speed_kmh", 0)),
             "confidence":     float(data.get("confidence", 0.87)),
-            "image_b64":      base64.b64encode(frame_bytes).decode() if frame_bytes else "",
+            "image_bytes":    frame_bytes or b"",
             "cam_id":         "LAPTOP_CAM", "roi": "STOP_LINE",
             "vehicles_frame": int(data.get("vehicles_frame", 1)),
         }
         with state_lock:
             traffic_state["light"] = "RED"
+        _sync_ai_engine_light("RED")
         process_violation(vd)
 
     return jsonify({
@@ -903,6 +1008,7 @@ def init_db():
         vehicles_frame INTEGER DEFAULT 0,
         confidence REAL DEFAULT 0,
         image_url TEXT DEFAULT '',
+        clip_url TEXT DEFAULT '',
         cam_id TEXT DEFAULT 'CAM_1',
         ts INTEGER NOT NULL,
         date_str TEXT NOT NULL,
@@ -928,6 +1034,9 @@ def init_db():
         set_by TEXT DEFAULT 'user',
         auto_selected INTEGER DEFAULT 0,
         ts INTEGER NOT NULL)""")
+    # Migration: evidence clip column for databases created before it existed
+    if "clip_url" not in {r[1] for r in c.execute("PRAGMA table_info(violations)")}:
+        c.execute("ALTER TABLE violations ADD COLUMN clip_url TEXT DEFAULT ''")
     c.execute("CREATE INDEX IF NOT EXISTS idx_viol_ts    ON violations(ts DESC)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_viol_plate ON violations(plate)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_viol_date  ON violations(date_str)")
@@ -985,20 +1094,114 @@ def _sync_ai_engine_light(light: str):
 
 def get_current_light() -> str:
     """
-    PUBLIC API — ai_engine reads current traffic light state.
+    PUBLIC API — current traffic light state.
     Thread-safe. Returns "RED" | "YELLOW" | "GREEN".
-    Usage: import app; app.get_current_light()
+    ai_engine no longer polls this: every light write is pushed to it via
+    _sync_ai_engine_light() and read lock-free there.
     """
     with state_lock:
         return traffic_state.get("light", "GREEN")
 
 
+# ── Context publisher: coalesce per-frame updates, emit only changed fields ──
+_ctx_emit_lock      = threading.Lock()
+_ctx_emit_wake      = threading.Event()
+_ctx_last_emitted: dict = {}
+_ctx_pending        = False
+_ctx_last_emit_ts   = 0.0
+_ctx_emit_stats     = {"calls": 0, "emitted": 0, "suppressed": 0, "unchanged": 0}
+
+
+def _ctx_diff(snapshot: dict) -> dict:
+    """Fields of snapshot that differ from what dashboards last received.
+    updated_at alone is not a change. Caller holds _ctx_emit_lock."""
+    changed = {k: v for k, v in snapshot.items()
+               if k != "updated_at" and _ctx_last_emitted.get(k) != v}
+    if changed and "updated_at" in snapshot:
+        changed["updated_at"] = snapshot["updated_at"]
+    return changed
+
+
+def _ctx_try_emit() -> bool:
+    """
+    Emit the pending context diff if the rate cap allows.
+    Returns False when the interval has not elapsed yet (diff stays pending).
+    """
+    global _ctx_pending, _ctx_last_emit_ts
+    with _ctx_emit_lock:
+        now = time.monotonic()
+        if now - _ctx_last_emit_ts < 1.0 / CONTEXT_EMIT_MAX_HZ:
+            return False
+        with state_lock:
+            snapshot = dict(context_state)
+        changed = _ctx_diff(snapshot)
+        _ctx_pending = False
+        if not changed:
+            return True
+        _ctx_last_emitted.update(changed)
+        _ctx_last_emit_ts = now
+        _ctx_emit_stats["emitted"] += 1
+    socketio.emit("context_update", changed)
+    return True
+
+
+def _context_flusher():
+    """Emits coalesced context changes that arrived inside the rate-cap window."""
+    while True:
+        _ctx_emit_wake.wait()
+        _ctx_emit_wake.clear()
+        while True:
+            with _ctx_emit_lock:
+                if not _ctx_pending:
+                    break
+                delay = _ctx_last_emit_ts + 1.0 / CONTEXT_EMIT_MAX_HZ - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                _ctx_try_emit()
+            except Exception as e:
+                log_ai.error("Context flush error: %s", e)
+                break
+
+
+def _ctx_request_emit(snapshot: dict) -> None:
+    """
+    Emit snapshot's changed fields now, or mark them pending for
+    _context_flusher when inside the rate-cap window. Every context writer
+    (update_ai_context, MQTT traffic/ai/context) goes through here.
+    """
+    global _ctx_pending
+    with _ctx_emit_lock:
+        _ctx_emit_stats["calls"] += 1
+        if not _ctx_diff(snapshot):
+            _ctx_emit_stats["unchanged"] += 1
+            return
+        if _ctx_pending:
+            _ctx_emit_stats["suppressed"] += 1
+            return
+    if not _ctx_try_emit():
+        with _ctx_emit_lock:
+            _ctx_pending = True
+            _ctx_emit_stats["suppressed"] += 1
+        _ctx_emit_wake.set()
+
+
+def get_context_emit_stats() -> dict:
+    """Counters for the context publisher (calls / emitted / suppressed / unchanged)."""
+    with _ctx_emit_lock:
+        return {**_ctx_emit_stats, "max_hz": CONTEXT_EMIT_MAX_HZ, "pending": _ctx_pending}
+
+
 def update_ai_context(vehicles: int, fps: float, **extra) -> None:
     """
     PUBLIC API — ai_engine updates detection context.
     Thread-safe. Auto-validates + emits WebSocket event.
     Usage: import app; app.update_ai_context(vehicles=3, fps=24.5, weather="SUN")
 
+    Emits are coalesced: only fields that changed since the last emit are
+    sent, at most CONTEXT_EMIT_MAX_HZ times per second. Changes inside the
+    window are flushed by the _context_flusher thread.
+
     Args:
         vehicles: vehicle count in frame (clamped to max 6)
         fps:      detection fps (rounded to 1dp)
@@ -1016,7 +1219,8 @@ def update_ai_context(vehicles: int, fps: float, **extra) -> None:
         context_state["context_ok"]     = ok
         context_state["context_errors"] = errs
         snapshot = dict(context_state)
-    socketio.emit("context_update", snapshot)
+
+    _ctx_request_emit(snapshot)
     log_ai.debug("Context updated: vehicles=%d fps=%.1f ok=%s", vehicles, fps, ok)
 
 
@@ -1240,11 +1444,12 @@ def _auto_select_theme() -> str:
 # VIOLATION PROCESSOR
 # ════════════════════════════════════════════════════════════════════════════
 
-def save_image(b64: str, plate: str, ts: int) -> str:
-    if not b64:
+def save_image(image: bytes | str, plate: str, ts: int) -> str:
+    """Write a violation JPEG (raw bytes, or base64 str from MQTT/inject callers)."""
+    if not image:
         return ""
     try:
-        data  = base64.b64decode(b64)
+        data  = base64.b64decode(image) if isinstance(image, str) else image
         fname = f"{ts}_{plate.replace(' ','_').replace('/','_')}.jpg"
         (IMAGE_DIR / fname).write_bytes(data)
         return f"/imge/{fname}"
@@ -1253,34 +1458,106 @@ def save_image(b64: str, plate: str, ts: int) -> str:
         return ""
 
 
+# Evidence clips arrive from ai_engine a few seconds after the event, before or
+# after its violation row is written (OCR runs in parallel) — whichever side
+# comes second attaches clip_url. Both maps are bounded.
+CLIP_MATCH_MAX = 256
+_clip_lock    = threading.Lock()
+_clip_pending: "OrderedDict[str, int]" = OrderedDict()   # clip_name → row waiting for its clip
+_clip_saved:   "OrderedDict[str, str]" = OrderedDict()   # clip_name → url saved before its row
+
+
+def _remember_clip(d: OrderedDict, key: str, value):
+    """Insert under _clip_lock, dropping the oldest entries beyond CLIP_MATCH_MAX."""
+    d[key] = value
+    while len(d) > CLIP_MATCH_MAX:
+        d.popitem(last=False)
+
+
+def _set_violation_clip(row_id: int, clip_url: str):
+    try:
+        with M_DB_WRITE.labels("violation_clip").time():
+            conn = sqlite3.connect(str(DB_PATH))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("UPDATE violations SET clip_url=? WHERE id=?", (clip_url, row_id))
+            conn.commit()
+            conn.close()
+    except Exception as e:
+        log_viol.error("DB update violation clip: %s", e)
+        return
+    socketio.emit("violation_clip", {"id": row_id, "clip_url": clip_url})
+
+
+def _attach_clip(clip_name: str, row_id: int) -> str:
+    """Violation row written: link its clip if already saved, else wait for it."""
+    with _clip_lock:
+        clip_url = _clip_saved.pop(clip_name, "")
+        if not clip_url:
+            _remember_clip(_clip_pending, clip_name, row_id)
+    if clip_url:
+        _set_violation_clip(row_id, clip_url)
+    return clip_url
+
+
+def save_violation_clip(clip_name: str, data: bytes) -> str:
+    """
+    Store a violation evidence clip (MJPEG / mp4 bytes) under imge/clips/ and
+    set clip_url on its violation row (now, or when the row is written).
+
+    PUBLIC API — ai_engine calls: app.save_violation_clip(name, data)
+    """
+    fname = Path(clip_name).name
+    if not fname or not data:
+        return ""
+    try:
+        (CLIP_DIR / fname).write_bytes(data)
+    except Exception as e:
+        log.error("save_violation_clip: %s", e)
+        return ""
+    clip_url = f"/imge/clips/{fname}"
+    with _clip_lock:
+        row_id = _clip_pending.pop(fname, None)
+        if row_id is None:
+            _remember_clip(_clip_saved, fname, clip_url)
+    if row_id is not None:
+        _set_violation_clip(row_id, clip_url)
+    return clip_url
+
+
 def process_violation(payload: dict):
     """
     Process violation from ai_engine or inject API.
     Only saves when light is RED. Emits WebSocket event + ThingsBoard telemetry.
 
     PUBLIC API — ai_engine calls: import app; app.process_violation(payload)
+    Evidence image: "image_bytes" (raw JPEG, in-process callers) or
+    "image_b64" (MQTT / inject API). "clip_name" (optional) names the evidence
+    clip ai_engine delivers through save_violation_clip().
     """
     ts_v  = payload.get("ts",  int(time.time()))
     plate = payload.get("plate", "").strip().upper()
     vtype = payload.get("type", "UNKNOWN").upper()
     speed = float(payload.get("speed_kmh", 0))
     conf  = float(payload.get("confidence", 0))
-    b64   = payload.get("image_b64", "")
+    image = payload.get("image_bytes") or payload.get("image_b64", "")
     cam   = payload.get("cam_id", "CAM_1")
     roi   = payload.get("roi", "STOP_LINE")
     veh   = int(payload.get("vehicles_frame", 0))
+    clip  = Path(payload.get("clip_name") or "").name
 
     with state_lock:
         light = traffic_state["light"]
 
     if light != "RED":
         log_viol.debug("Violation skipped — light=%s (not RED): %s", light, plate)
+        M_VIOL_SKIPPED.labels("not_red").inc()
         return
 
     date_str  = datetime.fromtimestamp(ts_v, tz=timezone.utc).strftime("%Y-%m-%d")
-    image_url = save_image(b64, plate or "UNKNOWN", ts_v)
+    image_url = save_image(image, plate or "UNKNOWN", ts_v)
 
     try:
+        t_db = time.perf_counter()
         conn = sqlite3.connect(str(DB_PATH))
         conn.execute("PRAGMA journal_mode=WAL")
         cur  = conn.cursor()
@@ -1291,9 +1568,13 @@ def process_violation(payload: dict):
         conn.commit()
         row_id = cur.lastrowid
         conn.close()
+        M_DB_WRITE.labels("violation").observe(time.perf_counter() - t_db)
     except Exception as e:
         log_viol.error("DB insert violation: %s", e)
+        M_VIOL_SKIPPED.labels("db_error").inc()
         return
+    M_VIOL_WRITTEN.labels(vtype).inc()
+    clip_url = _attach_clip(clip, row_id) if clip else ""
 
     with state_lock:
         system_stats["violations_total"]  += 1
@@ -1304,7 +1585,7 @@ def process_violation(payload: dict):
     ev = {
         "id": row_id, "plate": plate, "type": vtype, "speed_kmh": speed,
         "light": light, "roi": roi, "vehicles_frame": veh, "confidence": conf,
-        "image_url": image_url, "cam_id": cam, "ts": ts_v, "date_str": date_str,
+        "image_url": image_url, "clip_url": clip_url, "cam_id": cam, "ts": ts_v, "date_str": date_str,
     }
     socketio.emit("new_violation", ev)
     log_viol.warning("🚨 Violation #%d: %s | %s | conf=%.2f | cam=%s", row_id, plate, vtype, conf, cam)
@@ -1331,12 +1612,13 @@ def process_violation(payload: dict):
 def _log_event(level: str, source: str, message: str):
     ts = int(time.time())
     try:
-        conn = sqlite3.connect(str(DB_PATH))
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("INSERT INTO system_events(level,source,message,ts) VALUES(?,?,?,?)",
-                     (level, source, message, ts))
-        conn.commit()
-        conn.close()
+        with M_DB_WRITE.labels("event").time():
+            conn = sqlite3.connect(str(DB_PATH))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("INSERT INTO system_events(level,source,message,ts) VALUES(?,?,?,?)",
+                         (level, source, message, ts))
+            conn.commit()
+            conn.close()
     except Exception as e:
         log.error("_log_event DB error: %s", e)
     socketio.emit("system_event", {"level": level, "source": source, "message": message, "ts": ts})
@@ -1363,7 +1645,7 @@ def _on_mqtt_connect(client, userdata, flags, rc):
         log_mqtt.info("✅ MQTT connected %s:%d", MQTT_HOST, MQTT_PORT)
         client.subscribe([
             (TOPIC_ESP32_STATUS,  1),
-            (TOPIC_ESP32_FRAME,   0),
+            *frame_ingest.INGEST.topics(),
             (TOPIC_AI_VIOLATION,  1),
             (TOPIC_AI_CONTEXT,    1),
             (TOPIC_TRAFFIC_STATE, 1),
@@ -1379,19 +1661,12 @@ def _on_mqtt_disconnect(client, userdata, rc):
 
 
 def _on_mqtt_message(client, userdata, msg):
-    global latest_frame
     with state_lock:
         system_stats["mqtt_messages"] += 1
+    M_MQTT_MESSAGES.labels(_mqtt_topic_label(msg.topic)).inc()
     try:
-        if msg.topic == TOPIC_ESP32_FRAME:
-            pl = msg.payload
-            frame_bytes = base64.b64decode(pl) if pl[:2] in (b"//", b"/9") else bytes(pl)
-            with frame_lock:
-                latest_frame = frame_bytes
-            with state_lock:
-                system_stats["frames_processed"] += 1
-                context_state["esp32_connected"]  = True
-                context_state["ai_mode"]          = "REAL"
+        if frame_ingest.is_frame_topic(msg.topic):
+            frame_ingest.INGEST.on_message(msg.topic, msg.payload)   # → /video_feed + ai_engine
             return
 
         d = json.loads(msg.payload.decode())
@@ -1431,7 +1706,7 @@ def _on_mqtt_message(client, userdata, msg):
                 context_state["context_ok"]     = ok
                 context_state["context_errors"] = errs
                 p = dict(context_state)
-            socketio.emit("context_update", p)
+            _ctx_request_emit(p)              # same diff + CONTEXT_EMIT_MAX_HZ cap as ai_engine
 
         elif msg.topic == TOPIC_TRAFFIC_STATE:
             l = d.get("light", "").upper()
@@ -1493,15 +1768,16 @@ def _context_snapshot_worker():
         with state_lock:
             ctx = dict(context_state)
         try:
-            conn = sqlite3.connect(str(DB_PATH))
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("""INSERT INTO context_snapshots
-                (speed_kmh,vehicles_frame,weather,capture_interval,fps,context_ok,ts)
-                VALUES(?,?,?,?,?,?,?)""",
-                (ctx["speed_kmh"], ctx["vehicles_frame"], ctx["weather"],
-                 ctx["capture_interval"], ctx["fps"], 1 if ctx["context_ok"] else 0, int(time.time())))
-            conn.commit()
-            conn.close()
+            with M_DB_WRITE.labels("context_snapshot").time():
+                conn = sqlite3.connect(str(DB_PATH))
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""INSERT INTO context_snapshots
+                    (speed_kmh,vehicles_frame,weather,capture_interval,fps,context_ok,ts)
+                    VALUES(?,?,?,?,?,?,?)""",
+                    (ctx["speed_kmh"], ctx["vehicles_frame"], ctx["weather"],
+                     ctx["capture_interval"], ctx["fps"], 1 if ctx["context_ok"] else 0, int(time.time())))
+                conn.commit()
+                conn.close()
         except Exception as e:
             log.error("Context snapshot error: %s", e)
 
@@ -1576,25 +1852,24 @@ def _generate_esp32_placeholder():
 
 
 def _gen_esp32_frames():
-    """MJPEG generator for Camera Live (/video_feed)."""
+    """MJPEG generator for Camera Live (/video_feed) — new frames of live_frames only."""
     BOUNDARY = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
     _placeholder = None
     _placeholder_ts = 0.0
+    seq = 0
 
     while True:
-        with frame_lock:
-            frame = latest_frame
+        seq, frame = live_frames.read_newer(seq, timeout=0.1)
 
-        if frame is None:
+        if frame is not None:
+            yield BOUNDARY + frame + b"\r\n"
+            time.sleep(0.033)
+        elif live_frames.latest() is None:
             now = time.time()
             if _placeholder is None or (now - _placeholder_ts) > 2.0:
                 _placeholder = _generate_esp32_placeholder()
                 _placeholder_ts = now
             yield BOUNDARY + _placeholder + b"\r\n"
-            time.sleep(0.1)
-        else:
-            yield BOUNDARY + frame + b"\r\n"
-            time.sleep(0.033)
 
 
 @app.get("/video_feed")
@@ -1614,7 +1889,7 @@ def api_bootstrap():
     db = get_db()
     cur = db.cursor()
     cur.execute("""SELECT id,plate,type,speed_kmh,light_state,roi,vehicles_frame,
-                   confidence,image_url,cam_id,ts,date_str FROM violations ORDER BY ts DESC LIMIT 20""")
+                   confidence,image_url,clip_url,cam_id,ts,date_str FROM violations ORDER BY ts DESC LIMIT 20""")
     violations = [dict(r) for r in cur.fetchall()]
     today = datetime.now().strftime("%Y-%m-%d")
     cur.execute("SELECT COUNT(*) FROM violations WHERE date_str=?", (today,))
@@ -1679,7 +1954,7 @@ def api_get_violations():
     cur.execute(f"SELECT COUNT(*) FROM violations WHERE {wc}", p)
     total = cur.fetchone()[0]
     cur.execute(f"""SELECT id,plate,type,speed_kmh,light_state,roi,vehicles_frame,
-                    confidence,image_url,cam_id,ts,date_str FROM violations
+                    confidence,image_url,clip_url,cam_id,ts,date_str FROM violations
                     WHERE {wc} ORDER BY ts DESC LIMIT ? OFFSET ?""", p + [pp, off])
     rows = [dict(r) for r in cur.fetchall()]
     return jsonify({
@@ -1829,12 +2104,29 @@ def api_ai_status():
         "camera":       traffic_state["camera"],
         "ai_mode":      ctx.get("ai_mode", "DEMO"),
         "models_ready": info.get("models_ready", False),
+        "context_emit": get_context_emit_stats(),
+        "frame_channels": _frame_channel_stats(),
+        "frame_ingest":   frame_ingest.INGEST.stats(),
         # v6.0: dual camera status
         "camera_laptop": {"active": _laptop_cam_active, "fps": round(laptop_fps, 1)},
         "camera_live":   {"source": "ESP32-CAM" if info.get("ever_connected") else "WEBCAM/DEMO"},
     })
 
 
+@app.get("/api/ai/perf")
+@require_token
+@log_request_timing
+def api_ai_perf():
+    """Per-stage detection latency (p50/p95/p99) — decode, yolo, draw, encode, ocr, process_violation."""
+    try:
+        import ai_engine
+        return jsonify({"ok": True, **ai_engine.get_perf_stats()})
+    except ImportError:
+        return jsonify({"ok": False, "error": "ai_engine module not found"}), 503
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @app.post("/api/violations/inject")
 @require_token
 @log_request_timing
@@ -1849,6 +2141,7 @@ def api_inject():
     d.setdefault("cam_id",     "INJECT_API")
     with state_lock:
         traffic_state["light"] = "RED"
+    _sync_ai_engine_light("RED")
     process_violation(d)
     return jsonify({"ok": True, "message": "Violation injected"})
 
@@ -1950,6 +2243,95 @@ def api_health():
     })
 
 
+def _frame_channel_stats() -> list[dict]:
+    """Counters of every frame channel: app's MJPEG outputs + ai_engine ingest."""
+    chans = [live_frames.stats(), _laptop_frames.stats()]
+    try:
+        import ai_engine
+        chans.extend(ai_engine.get_frame_channel_stats())
+    except ImportError:
+        pass
+    return chans
+
+
+@metrics.REGISTRY.add_collector
+def _collect_app_metrics():
+    """Scrape-time view of app state — in-memory copies only, no DB."""
+    with state_lock:
+        st    = dict(system_stats)
+        light = traffic_state["light"]
+    with _laptop_fps_lock:
+        laptop_fps = _laptop_fps_value
+    yield metrics.Family("traffic_uptime_seconds", "gauge", "Server uptime").add(time.time() - st["start_time"])
+    fam = metrics.Family("traffic_light_state", "gauge", "1 for the current traffic light")
+    for l in ("RED", "YELLOW", "GREEN"):
+        fam.add(int(l == light), light=l)
+    yield fam
+    yield metrics.Family("traffic_laptop_fps", "gauge", "Camera Laptop stream FPS").add(laptop_fps)
+    yield metrics.Family("traffic_mqtt_connected", "gauge", "App MQTT client connected").add(
+        _mqtt_client is not None and _mqtt_client.is_connected())
+    ce = get_context_emit_stats()
+    fam = metrics.Family("traffic_context_updates_total", "counter",
+                         "Context updates (update_ai_context + MQTT traffic/ai/context) by outcome")
+    for k in ("emitted", "suppressed", "unchanged"):
+        fam.add(ce[k], outcome=k)
+    yield fam
+    chans = _frame_channel_stats()
+    fam = metrics.Family("traffic_frame_channel_frames_total", "counter",
+                         "Frames per channel: enqueued / consumed / dropped (never analyzed or streamed)")
+    for ch in chans:
+        for k in ("enqueued", "consumed", "dropped"):
+            fam.add(ch[k], channel=ch["name"], outcome=k)
+    yield fam
+    fam = metrics.Family("traffic_frame_channel_depth", "gauge", "Frames queued per channel")
+    for ch in chans:
+        fam.add(ch["depth"], channel=ch["name"])
+    yield fam
+    fi = frame_ingest.INGEST.stats()
+    fam = metrics.Family("traffic_frame_ingest_messages_total", "counter",
+                         "ESP32 frame messages parsed once for all consumers, by encoding")
+    for k in ("raw", "base64", "errors"):
+        fam.add(fi[k], encoding=k)
+    yield fam
+
+
+@metrics.REGISTRY.add_collector
+def _collect_ai_metrics():
+    """ai_engine _perf counters + per-stage latency summaries."""
+    try:
+        import ai_engine
+    except ImportError:
+        return
+    for key, val in sorted(ai_engine.get_perf_counters().items()):
+        if not isinstance(val, (int, float)) or key.startswith("last_"):
+            continue
+        if key in ai_engine.PERF_GAUGE_KEYS:
+            yield metrics.Family(f"traffic_ai_{key}", "gauge", f"ai_engine _perf[{key!r}]").add(val)
+        else:   # monotonic totals
+            name = f"traffic_ai_{key}" if key.endswith("_total") else f"traffic_ai_{key}_total"
+            yield metrics.Family(name, "counter", f"ai_engine _perf[{key!r}]").add(val)
+    fam = metrics.Family("traffic_ai_stage_latency_seconds", "summary",
+                         "Detection pipeline stage latency (ai_engine histograms)")
+    for stage, h in ai_engine.get_perf_stats()["stages"].items():
+        if stage == "overhead":
+            continue
+        for q, k in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            fam.add(h[k] / 1000, stage=stage, quantile=q)
+        fam.add(h["mean_ms"] * h["n"] / 1000, "_sum", stage=stage)
+        fam.add(h["n"], "_count", stage=stage)
+    yield fam
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape target. Bearer METRICS_TOKEN required when set."""
+    if METRICS_TOKEN:
+        tok = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if tok != METRICS_TOKEN:
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # ERROR HANDLERS
 # ════════════════════════════════════════════════════════════════════════════
@@ -1981,6 +2363,7 @@ def handle_500(e):
 
 @socketio.on("connect")
 def ws_connect():
+    M_WS_CLIENTS.inc()
     ai_info = {}
     try:
         import ai_engine
@@ -2010,6 +2393,7 @@ def ws_connect():
 
 @socketio.on("disconnect")
 def ws_disconnect():
+    M_WS_CLIENTS.dec()
     log.debug("WebSocket client disconnected")
 
 
@@ -2075,7 +2459,7 @@ def _bootstrap():
     log.info("   MQTT: %s:%d", MQTT_HOST, MQTT_PORT)
     log.info("   DB:   %s", DB_PATH)
     log.info("   Camera Laptop → /laptop_feed (VideoCapture(0) by app.py)")
-    log.info("   Camera Live   → /video_feed  (ESP32-CAM via ai_engine)")
+    log.info("   Camera Live   → /video_feed  (ESP32-CAM via frame_ingest → video_feed + ai_engine)")
     log.info("=" * 72)
 
     # Background workers
@@ -2085,6 +2469,7 @@ def _bootstrap():
     threading.Thread(target=_tb_periodic_push,        name="TB-Push",        daemon=True).start()
     threading.Thread(target=_theme_auto_worker,       name="ThemeWorker",    daemon=True).start()
     threading.Thread(target=_ai_engine_status_worker, name="AIStatus",       daemon=True).start()
+    threading.Thread(target=_context_flusher,         name="CtxFlusher",     daemon=True).start()
 
     # MQTT
     _init_mqtt()
@@ -0,0 +1,106 @@
+"""
+Shared helpers for the ai_engine benchmark scripts.
+
+Run benchmarks from WEB-DEVELOPER/server:
+    python benchmarks/<script>.py --help
+"""
+
+import sys
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+if str(SERVER_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVER_DIR))
+
+import cv2
+import numpy as np
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def load_frames(source: str | None, limit: int = 200) -> list[np.ndarray]:
+    """
+    Load up to `limit` BGR frames from a directory of images or a video file.
+    source=None → animated demo frames from ai_engine (no camera needed).
+    """
+    if source is None:
+        import ai_engine
+        frames = []
+        for _ in range(limit):
+            frames.append(ai_engine._generate_demo_frame().copy())
+            time.sleep(0.01)   # demo vehicles move with wall-clock time
+        return frames
+
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTS)[:limit]
+        frames = [cv2.imread(str(p), cv2.IMREAD_COLOR) for p in files]
+        return [f for f in frames if f is not None]
+
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def summarize_ms(samples_s: list[float]) -> dict:
+    """Latency samples (seconds) → {mean, p50, p95, p99, max} in ms + throughput."""
+    if not samples_s:
+        return {"n": 0}
+    arr = np.asarray(samples_s) * 1000.0
+    return {
+        "n":       len(arr),
+        "mean_ms": round(float(arr.mean()), 2),
+        "p50_ms":  round(float(np.percentile(arr, 50)), 2),
+        "p95_ms":  round(float(np.percentile(arr, 95)), 2),
+        "p99_ms":  round(float(np.percentile(arr, 99)), 2),
+        "max_ms":  round(float(arr.max()), 2),
+        "per_s":   round(1000.0 / float(arr.mean()), 1) if arr.mean() > 0 else 0.0,
+    }
+
+
+def print_table(rows: list[dict], columns: list[str]):
+    """Print rows as a fixed-width table."""
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def load_labeled_crops(source: str | None, limit: int = 500) -> list[tuple[str, np.ndarray, str]]:
+    """
+    Load vehicle crops as (name, BGR crop, expected plate or "").
+    Labels come from an optional `labels.csv` in the directory (filename,plate).
+    source=None → the stopped demo vehicle (plate "ABC 1234") from ai_engine.
+    """
+    if source is None:
+        import ai_engine
+        frame = ai_engine._generate_demo_frame()
+        H, W = frame.shape[:2]
+        cx, cy = int(W * 0.40), int(H * 0.74)     # vehicle 3 in _generate_demo_frame
+        crop = frame[cy - 40:cy + 40, cx - 50:cx + 50].copy()
+        return [("demo_vehicle3", crop, "ABC 1234")]
+
+    path = Path(source)
+    labels = {}
+    labels_file = path / "labels.csv"
+    if labels_file.exists():
+        import csv
+        with open(labels_file, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0] and not row[0].startswith("#"):
+                    labels[row[0].strip()] = row[1].strip().upper()
+
+    crops = []
+    for p in sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTS)[:limit]:
+        img = cv2.imread(str(p), cv2.IMREAD_COLOR)
+        if img is not None:
+            crops.append((p.name, img, labels.get(p.name, "")))
+    return crops
@@ -0,0 +1,126 @@
+"""
+Microbenchmark of the per-iteration _AppRef overhead in the detection loop:
+get_light() + push_frame() + update_context() once per tick, as the loop
+does, with the app callbacks stubbed out (no Flask / Socket.IO needed).
+
+Compares the previous _AppRef (import app + hasattr on every call, light
+read through app.get_current_light() under state_lock — copied below as the
+baseline) with the current one (callbacks bound once in _AppRef.set, light
+read lock-free).
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_appref_overhead.py
+    python benchmarks/bench_appref_overhead.py --iterations 500000
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import types
+
+from _common import print_table
+
+import ai_engine
+
+
+def install_stub_app() -> types.ModuleType:
+    """Minimal `app` module with the callbacks ai_engine uses (no-op bodies)."""
+    stub = types.ModuleType("app")
+    stub.state_lock    = threading.RLock()
+    stub.traffic_state = {"light": "RED"}
+
+    def get_current_light() -> str:
+        with stub.state_lock:
+            return stub.traffic_state.get("light", "GREEN")
+
+    stub.get_current_light = get_current_light
+    stub.process_violation = lambda payload: None
+    stub.save_violation_clip = lambda *a, **k: None
+    stub.set_ai_frame      = lambda frame_bytes: None
+    stub.update_ai_context = lambda vehicles, fps, **extra: None
+    sys.modules["app"] = stub
+    return stub
+
+
+class LegacyAppRef:
+    """_AppRef before callbacks were bound once (baseline)."""
+    _app = None
+
+    @classmethod
+    def set(cls, app):
+        cls._app = app
+
+    @classmethod
+    def get_light(cls) -> str:
+        if cls._app is not None:
+            try:
+                import app as _app_module
+                if hasattr(_app_module, "get_current_light"):
+                    return _app_module.get_current_light()
+            except Exception:
+                pass
+        with ai_engine._light_lock:
+            return ai_engine._current_light
+
+    @classmethod
+    def push_frame(cls, jpeg: bytes):
+        if cls._app is None:
+            return
+        try:
+            import app as _app_module
+            if hasattr(_app_module, "set_ai_frame"):
+                _app_module.set_ai_frame(jpeg)
+        except Exception:
+            pass
+
+    @classmethod
+    def update_context(cls, vehicles: int, fps: float, **kw):
+        try:
+            import app as _app_module
+            if hasattr(_app_module, "update_ai_context"):
+                _app_module.update_ai_context(vehicles=vehicles, fps=fps, **kw)
+        except Exception:
+            pass
+
+
+def bench(name: str, ref, iterations: int) -> dict:
+    jpeg = b"\xff\xd8" + b"\0" * 1024
+    best = float("inf")
+    for _ in range(3):                       # best of 3 → less scheduler noise
+        t = time.perf_counter()
+        for _ in range(iterations):
+            ref.get_light()
+            ref.push_frame(jpeg)
+            ref.update_context(2, 29.5, capture_interval=0.5, roi="STOP_LINE",
+                               target_objects=["MOTORBIKE", "CAR"], weather="SUN", distance=5.0)
+        best = min(best, time.perf_counter() - t)
+    return {"appref": name, "ns_per_iter": round(best / iterations * 1e9),
+            "iters_per_s": round(iterations / best)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--iterations", type=int, default=200_000)
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    stub = install_stub_app()
+    LegacyAppRef.set(stub)
+    ai_engine._AppRef.set(stub)
+    ai_engine.sync_light_state("RED")
+
+    rows = [bench("import per call", LegacyAppRef, args.iterations),
+            bench("bound once", ai_engine._AppRef, args.iterations)]
+    rows[1]["speedup"] = f"{rows[0]['ns_per_iter'] / max(1, rows[1]['ns_per_iter']):.1f}x"
+    print_table(rows, ["appref", "ns_per_iter", "iters_per_s", "speedup"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"iterations": args.iterations, "results": rows}, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
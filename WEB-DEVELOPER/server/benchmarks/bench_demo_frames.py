@@ -0,0 +1,222 @@
+"""
+Microbenchmark for the demo frame generators: frames/s of the original
+per-call rendering (copied below as the baseline) vs. the prebuilt static
+background + per-frame vehicle compositing now in ai_engine / app.
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_demo_frames.py
+    python benchmarks/bench_demo_frames.py --frames 500 --json demo.json
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from _common import print_table, summarize_ms
+
+import ai_engine
+
+try:
+    import app
+except ImportError as e:          # flask / socketio not installed
+    app = None
+    _APP_IMPORT_ERROR = str(e)
+
+
+# ── Baselines: generators as they were before the static-layer cache ────────
+
+def legacy_ai_demo_frame() -> np.ndarray:
+    """
+    High-quality animated demo frame for Camera Live detection.
+    Shows realistic road scene with moving vehicles + license plates.
+    Used when no ESP32 AND no webcam available.
+    """
+    W, H = 1280, 720
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+
+    # ── Background: sky + road ───────────────────────────────────
+    for y in range(int(H * 0.55)):
+        v = int(28 - (y / (H * 0.55)) * 18)
+        frame[y, :] = (max(4,v-2), max(8,v), max(16,v+4))
+
+    cv2.rectangle(frame, (0, int(H*0.55)), (W, H), (20, 26, 34), -1)
+
+    # Road lane dividers
+    for xi in range(0, W, 100):
+        cv2.line(frame, (xi, int(H*0.70)), (xi+50, int(H*0.70)), (45, 55, 65), 2)
+    # Road edges
+    cv2.line(frame, (0, int(H*0.58)), (W, int(H*0.58)), (35, 45, 55), 1)
+
+    # ── Animated vehicles ────────────────────────────────────────
+    t = time.time()
+
+    # Vehicle 1 — blue car
+    vx1 = int((W * 0.05) + (t * 90) % (W * 0.82))
+    vy1 = int(H * 0.65)
+    # Body
+    cv2.rectangle(frame, (vx1-42, vy1-24), (vx1+42, vy1+24), (45, 85, 185), -1)
+    cv2.rectangle(frame, (vx1-42, vy1-24), (vx1+42, vy1+24), (70, 120, 220), 1)
+    # Roof
+    cv2.rectangle(frame, (vx1-28, vy1-38), (vx1+28, vy1-20), (35, 65, 150), -1)
+    # Windshield
+    cv2.rectangle(frame, (vx1-22, vy1-36), (vx1+22, vy1-22), (60, 90, 160), -1)
+    # Wheels
+    cv2.circle(frame, (vx1-28, vy1+24), 8, (20, 20, 20), -1)
+    cv2.circle(frame, (vx1+28, vy1+24), 8, (20, 20, 20), -1)
+    # License plate VN
+    cv2.rectangle(frame, (vx1-26, vy1+8), (vx1+26, vy1+22), (220, 220, 50), -1)
+    cv2.putText(frame, "51B-12345", (vx1-24, vy1+20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.32, (20, 20, 20), 1)
+
+    # Vehicle 2 — red motorbike
+    vx2 = int(W * 0.55 + (t * 60) % (W * 0.38))
+    vy2 = int(H * 0.70)
+    cv2.rectangle(frame, (vx2-22, vy2-20), (vx2+22, vy2+20), (140, 35, 35), -1)
+    cv2.rectangle(frame, (vx2-22, vy2-20), (vx2+22, vy2+20), (190, 60, 60), 1)
+    cv2.circle(frame, (vx2-14, vy2+20), 7, (20, 20, 20), -1)
+    cv2.circle(frame, (vx2+14, vy2+20), 7, (20, 20, 20), -1)
+    cv2.rectangle(frame, (vx2-14, vy2+6), (vx2+14, vy2+18), (220, 220, 50), -1)
+    cv2.putText(frame, "30A-99001", (vx2-12, vy2+16),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.28, (20, 20, 20), 1)
+
+    # Vehicle 3 — foreign plate (stopped at ROI)
+    vx3 = int(W * 0.40)
+    vy3 = int(H * 0.74)
+    cv2.rectangle(frame, (vx3-38, vy3-20), (vx3+38, vy3+20), (60, 140, 60), -1)
+    cv2.rectangle(frame, (vx3-38, vy3-20), (vx3+38, vy3+20), (80, 180, 80), 1)
+    cv2.rectangle(frame, (vx3-25, vy3-32), (vx3+25, vy3-18), (50, 110, 50), -1)
+    # Foreign plate (EU style: white)
+    cv2.rectangle(frame, (vx3-26, vy3+5), (vx3+26, vy3+19), (240, 240, 240), -1)
+    cv2.rectangle(frame, (vx3-26, vy3+5), (vx3+26, vy3+19), (40, 40, 180), 2)
+    cv2.putText(frame, "ABC 1234", (vx3-24, vy3+17),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.30, (20, 20, 20), 1)
+
+    # ── DEMO watermark ───────────────────────────────────────────
+    cv2.putText(frame, "DEMO MODE — CAMERA LIVE",
+                (int(W*0.24), int(H*0.38)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (12, 24, 48), 3, cv2.LINE_AA)
+    cv2.putText(frame, "Connect ESP32-CAM via MQTT to go LIVE",
+                (int(W*0.22), int(H*0.44)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.62, (20, 60, 120), 1, cv2.LINE_AA)
+
+    return frame
+
+
+def legacy_laptop_demo_frame(fidx: int, W: int = 1280, H: int = 720) -> np.ndarray:
+    """
+    High-quality animated demo frame for Camera Laptop when no webcam available.
+    Shows moving vehicles with license plates, road scene, and DEMO watermark.
+    """
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+
+    # Sky gradient
+    for y in range(int(H * 0.55)):
+        ratio = y / (H * 0.55)
+        b = int(28 - ratio * 18)
+        g = int(18 - ratio * 8)
+        r = int(10 - ratio * 5)
+        frame[y, :] = (max(0,r), max(0,g), max(0,b))
+
+    # Road surface
+    cv2.rectangle(frame, (0, int(H*0.55)), (W, H), (22, 28, 36), -1)
+
+    # Road lane markers
+    for xi in range(0, W, 80):
+        cv2.line(frame, (xi, int(H*0.72)), (xi+40, int(H*0.72)), (60, 70, 80), 2)
+
+    # Animated vehicles
+    t = time.time()
+    vx1 = int((W * 0.06) + (fidx * 4) % int(W * 0.80))
+    vy1 = int(H * 0.66)
+    # Car 1 — blue sedan
+    cv2.rectangle(frame, (vx1-38, vy1-22), (vx1+38, vy1+22), (50, 90, 190), -1)
+    cv2.rectangle(frame, (vx1-38, vy1-22), (vx1+38, vy1+22), (80, 130, 220), 1)
+    cv2.rectangle(frame, (vx1-25, vy1-32), (vx1+25, vy1-18), (40, 60, 120), -1)
+    # Plate
+    cv2.rectangle(frame, (vx1-26, vy1+8), (vx1+26, vy1+20), (220, 220, 60), -1)
+    cv2.putText(frame, "51B-12345", (vx1-24, vy1+18),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.32, (30, 30, 30), 1)
+
+    vx2 = int(W * 0.55 + (fidx * 2.5) % int(W * 0.38))
+    vy2 = int(H * 0.70)
+    # Car 2 — red motorbike
+    cv2.rectangle(frame, (vx2-20, vy2-18), (vx2+20, vy2+18), (150, 40, 40), -1)
+    cv2.rectangle(frame, (vx2-20, vy2-18), (vx2+20, vy2+18), (200, 60, 60), 1)
+    cv2.rectangle(frame, (vx2-12, vy2+5), (vx2+12, vy2+16), (220, 220, 60), -1)
+    cv2.putText(frame, "30A-99001", (vx2-11, vy2+14),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.28, (30, 30, 30), 1)
+
+    # DEMO watermark
+    overlay_txt = frame.copy()
+    cv2.putText(overlay_txt, "DEMO MODE",
+                (int(W*0.34), int(H*0.40)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.8, (15, 25, 45), 4, cv2.LINE_AA)
+    cv2.addWeighted(overlay_txt, 0.6, frame, 0.4, 0, frame)
+    cv2.putText(frame, "Connect ESP32-CAM to switch LIVE detection",
+                (int(W*0.18), int(H*0.48)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.62, (30, 70, 120), 1, cv2.LINE_AA)
+
+    return frame
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+
+def bench(name: str, fn, n: int) -> dict:
+    fn(0)                                    # warm-up (builds cached layers)
+    samples = []
+    for i in range(n):
+        t = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t)
+    stats = summarize_ms(samples)
+    return {"generator": name, "fps": stats["per_s"], "mean_ms": stats["mean_ms"],
+            "p95_ms": stats["p95_ms"]}
+
+
+def identical(old, new, n: int = 20) -> bool:
+    """Same pixels for the same time / frame index."""
+    real_time = time.time
+    try:
+        for i in range(n):
+            time.time = lambda i=i: 1000.0 + i * 0.37
+            if not np.array_equal(old(i), new(i)):
+                return False
+        return True
+    finally:
+        time.time = real_time
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", type=int, default=300, help="frames per generator")
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    pairs = [("ai_engine", lambda i: legacy_ai_demo_frame(),
+              lambda i: ai_engine._generate_demo_frame())]
+    if app is not None:
+        pairs.append(("app laptop", legacy_laptop_demo_frame, app._generate_demo_frame_laptop))
+    else:
+        print(f"app generator skipped — cannot import app ({_APP_IMPORT_ERROR})\n")
+
+    rows = []
+    for name, old, new in pairs:
+        before = bench(f"{name} (before)", old, args.frames)
+        after  = bench(f"{name} (after)", new, args.frames)
+        after["speedup"]   = f"{after['fps'] / before['fps']:.1f}x" if before["fps"] else "-"
+        after["identical"] = identical(old, new)
+        rows += [before, after]
+
+    print_table(rows, ["generator", "fps", "mean_ms", "p95_ms", "speedup", "identical"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"frames": args.frames, "results": rows}, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark YOLO inference backends (torch vs ONNX Runtime vs OpenVINO) on the
+same frames: throughput (FPS) and per-frame latency.
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_inference_backends.py
+    python benchmarks/bench_inference_backends.py --frames recorded/ --threads 4
+    python benchmarks/bench_inference_backends.py --frames clip.mp4 --backends torch,onnx --batch 3
+"""
+
+import argparse
+import json
+import time
+
+from _common import load_frames, print_table, summarize_ms
+
+import ai_engine
+
+
+def bench_backend(name: str, frames: list, threads: int, batch: int, warmup: int) -> dict:
+    t0 = time.perf_counter()
+    backend = ai_engine._create_yolo_backend(name, threads)
+    load_s = time.perf_counter() - t0
+    if backend.name != name:
+        return {"backend": name, "error": f"fell back to {backend.name} (runtime missing)"}
+
+    groups = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+    for g in groups[:warmup]:
+        backend.infer(g)
+
+    latencies, detections = [], 0
+    t_start = time.perf_counter()
+    for g in groups:
+        t = time.perf_counter()
+        out = backend.infer(g)
+        dt = time.perf_counter() - t
+        latencies.extend([dt / len(g)] * len(g))
+        detections += sum(len(d) for d in out)
+    total_s = time.perf_counter() - t_start
+
+    stats = summarize_ms(latencies)
+    return {
+        "backend":    name,
+        "threads":    threads or "auto",
+        "batch":      batch,
+        "load_s":     round(load_s, 2),
+        "fps":        round(len(frames) / total_s, 1) if total_s > 0 else 0.0,
+        "mean_ms":    stats["mean_ms"],
+        "p50_ms":     stats["p50_ms"],
+        "p95_ms":     stats["p95_ms"],
+        "detections": detections,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", help="image directory or video file (default: demo frames)")
+    ap.add_argument("--limit", type=int, default=100, help="max frames to load")
+    ap.add_argument("--backends", default="torch,onnx,openvino")
+    ap.add_argument("--threads", type=int, default=ai_engine.INFERENCE_THREADS,
+                    help="intra-op threads (0 = runtime default)")
+    ap.add_argument("--batch", type=int, default=1, help="frames per inference call (cameras per tick)")
+    ap.add_argument("--warmup", type=int, default=3, help="warm-up calls excluded from timing")
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    frames = load_frames(args.frames, args.limit)
+    if not frames:
+        raise SystemExit(f"No frames loaded from {args.frames}")
+    h, w = frames[0].shape[:2]
+    print(f"Frames: {len(frames)} @ {w}x{h} | batch={args.batch} | threads={args.threads or 'auto'}\n")
+
+    rows = []
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            rows.append(bench_backend(name, frames, args.threads, args.batch, args.warmup))
+        except Exception as e:
+            rows.append({"backend": name, "error": str(e)})
+
+    ok_rows = [r for r in rows if "error" not in r]
+    base = next((r for r in ok_rows if r["backend"] == "torch"), None)
+    for r in ok_rows:
+        r["speedup"] = f"{r['fps'] / base['fps']:.2f}x" if base and base["fps"] else "-"
+
+    print_table(ok_rows, ["backend", "threads", "batch", "load_s", "fps", "speedup",
+                          "mean_ms", "p50_ms", "p95_ms", "detections"])
+    for r in rows:
+        if "error" in r:
+            print(f"  {r['backend']}: skipped — {r['error']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"frames": len(frames), "size": [w, h], "results": rows}, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark batched plate OCR: N violating vehicles in one RED frame, OCR'd
+one crop at a time (N readtext calls — the previous per-violation path) vs
+one _run_ocr_batch call (readtext_batched over the padded crops), for
+N = 1, 3 and 6 (MAX_VEHICLES). Both paths localize + preprocess each crop
+the same way, so the difference is the EasyOCR invocation count.
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_ocr_batch.py
+    python benchmarks/bench_ocr_batch.py --crops recorded_crops/ --frames 30
+    python benchmarks/bench_ocr_batch.py --vehicles 1,2,4,6 --json ocr_batch.json
+"""
+
+import argparse
+import json
+import time
+
+from _common import load_labeled_crops, print_table, summarize_ms
+
+import ai_engine
+
+
+def frame_crops(crops: list, n: int, frame_idx: int) -> list:
+    """n vehicle crops for one frame, cycling through the loaded crops."""
+    return [crops[(frame_idx * n + k) % len(crops)][1] for k in range(n)]
+
+
+def bench(crops: list, n: int, frames: int, batched: bool) -> dict:
+    latencies, plates = [], []
+    for f in range(frames):
+        batch = frame_crops(crops, n, f)
+        t = time.perf_counter()
+        if batched:
+            out = ai_engine._run_ocr_batch(batch)
+        else:
+            out = [ai_engine._run_ocr(c) for c in batch]
+        latencies.append(time.perf_counter() - t)
+        plates.extend(out)
+    stats = summarize_ms(latencies)
+    total = sum(latencies)
+    return {
+        "vehicles":      n,
+        "mode":          "batched" if batched else "per crop",
+        "ms_per_frame":  stats["mean_ms"],
+        "p95_ms":        stats["p95_ms"],
+        "crops_per_s":   round(n * frames / total, 1) if total > 0 else 0.0,
+        "read":          f"{sum(1 for p in plates if p)}/{len(plates)}",
+        "plates":        plates,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--crops", help="directory of vehicle crops [+ labels.csv] (default: demo vehicle)")
+    ap.add_argument("--limit", type=int, default=200, help="max crops to load")
+    ap.add_argument("--vehicles", default=f"1,3,{ai_engine.MAX_VEHICLES}", help="vehicles per frame")
+    ap.add_argument("--frames", type=int, default=20, help="frames timed per vehicle count")
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    if not ai_engine._EASYOCR_AVAILABLE:
+        raise SystemExit("easyocr not installed — pip install easyocr")
+    crops = load_labeled_crops(args.crops, args.limit)
+    if not crops:
+        raise SystemExit(f"No crops loaded from {args.crops}")
+
+    ai_engine._ocr_reader = ai_engine.easyocr.Reader(['en'], gpu=False, verbose=False)
+    ai_engine._run_ocr_batch(frame_crops(crops, 2, 0))             # warm-up (both code paths)
+    print(f"Crops: {len(crops)} | frames per point: {args.frames} | "
+          f"localize={ai_engine.PLATE_LOCALIZE}\n")
+
+    rows = []
+    for n in [int(v) for v in args.vehicles.split(",") if v.strip()]:
+        seq = bench(crops, n, args.frames, batched=False)
+        bat = bench(crops, n, args.frames, batched=True)
+        bat["speedup"] = f"{seq['ms_per_frame'] / bat['ms_per_frame']:.2f}x" if bat["ms_per_frame"] else "-"
+        bat["same_plates"] = sum(a == b for a, b in zip(seq["plates"], bat["plates"]))
+        rows += [seq, bat]
+
+    print_table(rows, ["vehicles", "mode", "ms_per_frame", "p95_ms", "crops_per_s", "read",
+                       "speedup", "same_plates"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"crops": len(crops), "frames": args.frames,
+                       "results": [{k: v for k, v in r.items() if k != "plates"} for r in rows]},
+                      f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
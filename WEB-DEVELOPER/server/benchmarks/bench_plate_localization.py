@@ -0,0 +1,117 @@
+"""
+Benchmark the plate-localization stage that runs before OCR: localization hit
+rate / latency, and end-to-end OCR time with vs without localization.
+
+Input is a directory of recorded vehicle crops (what _complete_violation gets),
+optionally with a labels.csv (filename,plate) to also report plate accuracy.
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_plate_localization.py
+    python benchmarks/bench_plate_localization.py --crops recorded_crops/
+    python benchmarks/bench_plate_localization.py --crops recorded_crops/ --no-ocr --save-dir out/
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import cv2
+
+from _common import load_labeled_crops, print_table, summarize_ms
+
+import ai_engine
+
+
+def _norm(plate: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", plate.upper())
+
+
+def bench_localization(crops: list, repeat: int, save_dir: str | None) -> dict:
+    hits, latencies, areas = 0, [], []
+    for name, crop, _ in crops:
+        for _ in range(repeat):
+            t = time.perf_counter()
+            plate, found = ai_engine._localize_plate(crop)
+            latencies.append(time.perf_counter() - t)
+        if found:
+            hits += 1
+            areas.append(plate.shape[0] * plate.shape[1] / float(crop.shape[0] * crop.shape[1]))
+            if save_dir:
+                cv2.imwrite(str(Path(save_dir) / name), plate)
+    stats = summarize_ms(latencies)
+    return {
+        "crops":      len(crops),
+        "hits":       hits,
+        "hit_rate":   round(hits / len(crops), 3) if crops else 0.0,
+        "area_ratio": round(sum(areas) / len(areas), 3) if areas else "-",
+        "mean_ms":    stats["mean_ms"],
+        "p95_ms":     stats["p95_ms"],
+    }
+
+
+def bench_ocr(crops: list, localize: bool) -> dict:
+    ai_engine.PLATE_LOCALIZE = localize
+    latencies, read, correct, labeled = [], 0, 0, 0
+    for _, crop, expected in crops:
+        t = time.perf_counter()
+        plate = ai_engine._run_ocr(crop)
+        latencies.append(time.perf_counter() - t)
+        read += bool(plate)
+        if expected:
+            labeled += 1
+            correct += _norm(plate) == _norm(expected)
+    stats = summarize_ms(latencies)
+    return {
+        "mode":     "localized" if localize else "full crop",
+        "mean_ms":  stats["mean_ms"],
+        "p50_ms":   stats["p50_ms"],
+        "p95_ms":   stats["p95_ms"],
+        "read":     f"{read}/{len(crops)}",
+        "accuracy": f"{correct}/{labeled}" if labeled else "-",
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--crops", help="directory of vehicle crops [+ labels.csv] (default: demo vehicle)")
+    ap.add_argument("--limit", type=int, default=500, help="max crops to load")
+    ap.add_argument("--repeat", type=int, default=20, help="localization runs per crop (timing only)")
+    ap.add_argument("--no-ocr", action="store_true", help="skip the EasyOCR comparison")
+    ap.add_argument("--save-dir", help="write localized plate regions here for inspection")
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    crops = load_labeled_crops(args.crops, args.limit)
+    if not crops:
+        raise SystemExit(f"No crops loaded from {args.crops}")
+    if args.save_dir:
+        Path(args.save_dir).mkdir(parents=True, exist_ok=True)
+    print(f"Crops: {len(crops)} | labeled: {sum(1 for c in crops if c[2])}\n")
+
+    loc = bench_localization(crops, args.repeat, args.save_dir)
+    print("Localization")
+    print_table([loc], ["crops", "hits", "hit_rate", "area_ratio", "mean_ms", "p95_ms"])
+
+    ocr_rows = []
+    if not args.no_ocr:
+        if not ai_engine._EASYOCR_AVAILABLE:
+            print("\nOCR comparison skipped — easyocr not installed")
+        else:
+            ai_engine._ocr_reader = ai_engine.easyocr.Reader(['en'], gpu=False, verbose=False)
+            ai_engine._run_ocr(crops[0][1])                # warm-up
+            ocr_rows = [bench_ocr(crops, False), bench_ocr(crops, True)]
+            base, new = ocr_rows[0]["mean_ms"], ocr_rows[1]["mean_ms"]
+            ocr_rows[1]["speedup"] = f"{base / new:.2f}x" if new else "-"
+            print("\nEnd-to-end OCR")
+            print_table(ocr_rows, ["mode", "mean_ms", "p50_ms", "p95_ms", "read", "accuracy", "speedup"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"localization": loc, "ocr": ocr_rows}, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
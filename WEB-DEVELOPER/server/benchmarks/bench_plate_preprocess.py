@@ -0,0 +1,124 @@
+"""
+Benchmark the plate preprocessing profiles (AI_PLATE_PREPROCESS) that run on
+each crop before OCR: preprocessing latency per profile, then end-to-end OCR
+latency, read rate and — with a labels.csv (filename,plate) — plate accuracy.
+
+Crops are localized once up front (as _run_ocr_batch does when
+AI_PLATE_LOCALIZE=1), so the timings isolate the preprocessing step. Pick the
+profile with the best accuracy the deployment's CPU budget allows.
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_plate_preprocess.py
+    python benchmarks/bench_plate_preprocess.py --crops labeled_plates/ --json prep.json
+    python benchmarks/bench_plate_preprocess.py --crops labeled_plates/ --no-ocr --save-dir out/
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import cv2
+
+from _common import load_labeled_crops, print_table, summarize_ms
+
+import ai_engine
+
+
+def _norm(plate: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", plate.upper())
+
+
+def bench_preprocess(crops: list, profile: str, repeat: int, save_dir: str | None) -> dict:
+    latencies = []
+    for name, crop, _ in crops:
+        for _ in range(repeat):
+            t = time.perf_counter()
+            out = ai_engine._preprocess_plate_crop(crop, profile)
+            latencies.append(time.perf_counter() - t)
+        if save_dir:
+            cv2.imwrite(str(Path(save_dir) / f"{profile}_{name}"), out)
+    stats = summarize_ms(latencies)
+    return {"profile": profile, "mean_ms": stats["mean_ms"], "p50_ms": stats["p50_ms"],
+            "p95_ms": stats["p95_ms"], "max_ms": stats["max_ms"]}
+
+
+def bench_ocr(crops: list, profile: str) -> dict:
+    ai_engine.PLATE_PREPROCESS = profile
+    latencies, read, correct, labeled = [], 0, 0, 0
+    for _, crop, expected in crops:
+        t = time.perf_counter()
+        plate = ai_engine._run_ocr(crop)
+        latencies.append(time.perf_counter() - t)
+        read += bool(plate)
+        if expected:
+            labeled += 1
+            correct += _norm(plate) == _norm(expected)
+    stats = summarize_ms(latencies)
+    return {
+        "profile":  profile,
+        "mean_ms":  stats["mean_ms"],
+        "p95_ms":   stats["p95_ms"],
+        "read":     f"{read}/{len(crops)}",
+        "hit_rate": round(read / len(crops), 3) if crops else 0.0,
+        "accuracy": f"{correct}/{labeled}" if labeled else "-",
+        "acc_rate": round(correct / labeled, 3) if labeled else "-",
+    }
+
+
+def main():
+    profiles = list(ai_engine._PREPROCESS_PROFILES)
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--crops", help="directory of plate / vehicle crops [+ labels.csv] (default: demo vehicle)")
+    ap.add_argument("--limit", type=int, default=500, help="max crops to load")
+    ap.add_argument("--profiles", default=",".join(profiles), help=f"comma list of {profiles}")
+    ap.add_argument("--repeat", type=int, default=20, help="preprocessing runs per crop (timing only)")
+    ap.add_argument("--no-localize", action="store_true", help="crops are already plates — skip localization")
+    ap.add_argument("--no-ocr", action="store_true", help="skip the EasyOCR comparison")
+    ap.add_argument("--save-dir", help="write preprocessed crops here for inspection")
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    chosen = [p.strip().lower() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in chosen if p not in profiles]
+    if unknown:
+        raise SystemExit(f"Unknown profile(s) {unknown} — choices: {profiles}")
+    crops = load_labeled_crops(args.crops, args.limit)
+    if not crops:
+        raise SystemExit(f"No crops loaded from {args.crops}")
+    if not args.no_localize:
+        crops = [(name, ai_engine._localize_plate(crop)[0], label) for name, crop, label in crops]
+    ai_engine.PLATE_LOCALIZE = False                  # already applied above
+    if args.save_dir:
+        Path(args.save_dir).mkdir(parents=True, exist_ok=True)
+    print(f"Crops: {len(crops)} | labeled: {sum(1 for c in crops if c[2])} | "
+          f"localized: {not args.no_localize} | configured: {ai_engine.PLATE_PREPROCESS}\n")
+
+    prep_rows = [bench_preprocess(crops, p, args.repeat, args.save_dir) for p in chosen]
+    base = next((r["mean_ms"] for r in prep_rows if r["profile"] == "accurate"), None)
+    for r in prep_rows:
+        r["speedup"] = f"{base / r['mean_ms']:.2f}x" if base and r["mean_ms"] else "-"
+    print("Preprocessing")
+    print_table(prep_rows, ["profile", "mean_ms", "p50_ms", "p95_ms", "max_ms", "speedup"])
+
+    ocr_rows = []
+    if not args.no_ocr:
+        if not ai_engine._EASYOCR_AVAILABLE:
+            print("\nOCR comparison skipped — easyocr not installed")
+        else:
+            ai_engine._ocr_reader = ai_engine.easyocr.Reader(['en'], gpu=False, verbose=False)
+            ai_engine._run_ocr(crops[0][1])                # warm-up
+            ocr_rows = [bench_ocr(crops, p) for p in chosen]
+            print("\nEnd-to-end OCR")
+            print_table(ocr_rows, ["profile", "mean_ms", "p95_ms", "read", "hit_rate", "accuracy", "acc_rate"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"crops": len(crops), "localized": not args.no_localize,
+                       "preprocess": prep_rows, "ocr": ocr_rows}, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
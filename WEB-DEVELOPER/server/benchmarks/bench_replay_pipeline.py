@@ -0,0 +1,230 @@
+"""
+Offline replay of the detection pipeline: a video file or JPEG directory is
+fed frame by frame through the ESP32 path (JPEG ingest → _get_frames decode →
+_detection_tick: motion gate, YOLO, tracker, ROI, _handle_violations → OCR
+pool → app.process_violation, clip builder → app.save_violation_clip), with
+the traffic light scripted on the replay timeline. Violations and clips are
+collected through _AppRef from a stub app module (no Flask / DB / MQTT).
+Clip windows follow wall time (ingest timestamps), so a max-speed run packs
+more replayed frames into each clip than a real-time one.
+
+The light script is "LIGHT:seconds,..." on media time (frame index / --fps),
+repeated over the clip, e.g. "GREEN:5,RED:10". Detection is skipped on GREEN,
+as in the live loop. Tick time (CAPTURE_INTERVAL throttle, motion gate
+refresh) follows media time, so a max-speed run reports the same violations
+as a real-time one.
+
+Usage (from WEB-DEVELOPER/server):
+    python benchmarks/bench_replay_pipeline.py
+    python benchmarks/bench_replay_pipeline.py --frames clip.mp4 --light GREEN:5,RED:10 --json run.json
+    python benchmarks/bench_replay_pipeline.py --frames recorded/ --fps 10 --realtime
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import types
+
+import cv2
+
+from _common import load_frames, print_table, summarize_ms
+
+import ai_engine
+
+LIGHTS = ("RED", "YELLOW", "GREEN")
+
+
+def parse_light_script(script: str) -> list[tuple[str, float]]:
+    """'GREEN:5,RED:10' → [("GREEN", 5.0), ("RED", 10.0)]."""
+    phases = []
+    for part in script.split(","):
+        light, _, secs = part.strip().partition(":")
+        light = light.strip().upper()
+        if light not in LIGHTS or not secs:
+            raise SystemExit(f"Bad light phase {part!r} — expected LIGHT:seconds, LIGHT in {LIGHTS}")
+        phases.append((light, float(secs)))
+    if not phases or sum(s for _, s in phases) <= 0:
+        raise SystemExit("Light script needs at least one phase with a positive duration")
+    return phases
+
+
+def light_at(phases: list[tuple[str, float]], t: float) -> str:
+    t %= sum(s for _, s in phases)
+    for light, secs in phases:
+        if t < secs:
+            return light
+        t -= secs
+    return phases[-1][0]
+
+
+def install_stub_app(violations: list, clips: dict) -> types.ModuleType:
+    """`app` stand-in: collects violations + clip sizes, drops frames / context."""
+    stub = types.ModuleType("app")
+
+    def process_violation(payload: dict):
+        v = {k: val for k, val in payload.items() if k != "image_bytes"}
+        v["image_kb"] = round(len(payload.get("image_bytes") or b"") / 1024, 1)
+        violations.append(v)
+
+    stub.process_violation = process_violation
+    stub.save_violation_clip = lambda clip_name, data: clips.__setitem__(clip_name, len(data))
+    stub.set_ai_frame      = lambda frame_bytes: None
+    stub.update_ai_context = lambda vehicles, fps, **extra: None
+    sys.modules["app"] = stub
+    return stub
+
+
+def source_fps(source: str | None, default: float) -> float:
+    if source is None:
+        return default
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+    cap.release()
+    return fps if 1.0 <= fps <= 240.0 else default
+
+
+def replay(jpegs: list[bytes], fps: float, phases: list, realtime: bool, cam_id: str) -> dict:
+    light    = None
+    ticks    = []            # detection tick wall time (s): decode + _detection_tick
+    idle     = 0
+    base     = time.time()   # media-time clock origin for _detection_tick(now=...)
+    t_start  = time.perf_counter()
+
+    for i, jpeg in enumerate(jpegs):
+        media_t = i / fps
+        want = light_at(phases, media_t)
+        if want != light:
+            light = want
+            ai_engine.sync_light_state(light)
+        if realtime:
+            delay = t_start + media_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        ai_engine._ingest_esp32_frame(cam_id, jpeg)
+        if light == "GREEN":
+            idle += 1
+            continue
+
+        t = time.perf_counter()
+        sources = ai_engine._get_frames(None)
+        if sources:
+            ai_engine._detection_tick(sources, light, base + media_t)
+        dt = time.perf_counter() - t
+        ticks.append(dt)
+        ai_engine._stages["tick"].record(dt * 1000)
+
+    wall = time.perf_counter() - t_start
+    return {"wall_s": wall, "ticks": ticks, "idle_frames": idle}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", help="image directory or video file (default: demo frames)")
+    ap.add_argument("--limit", type=int, default=300, help="max frames to load")
+    ap.add_argument("--fps", type=float, default=15.0,
+                    help="media frame rate (video files use their own when known)")
+    ap.add_argument("--light", default="RED:20", help='light script, e.g. "GREEN:5,RED:10"')
+    ap.add_argument("--realtime", action="store_true", help="pace frames at --fps (default: max speed)")
+    ap.add_argument("--cam", default=ai_engine.DEFAULT_CAMERA_ID, help="camera id for the ingest")
+    ap.add_argument("--quality", type=int, default=80, help="JPEG quality of the replayed frames")
+    ap.add_argument("--no-models", action="store_true",
+                    help="skip YOLO / OCR loading (demo detections, plate UNKNOWN)")
+    ap.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    phases = parse_light_script(args.light)
+    frames = load_frames(args.frames, args.limit)
+    if not frames:
+        raise SystemExit(f"No frames loaded from {args.frames}")
+    fps = source_fps(args.frames, args.fps)
+    jpegs = []
+    for f in frames:
+        ok, buf = cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+        if ok:
+            jpegs.append(buf.tobytes())
+    h, w = frames[0].shape[:2]
+    del frames
+
+    violations, clips = [], {}
+    ai_engine._AppRef.set(install_stub_app(violations, clips))
+    if not args.no_models:
+        t = time.perf_counter()
+        ai_engine._load_models_worker()
+        print(f"Models loaded in {time.perf_counter() - t:.1f}s")
+    else:
+        ai_engine._yolo_ready.set()
+        ai_engine._ocr_ready.set()
+    backend = ai_engine._vehicle_model.name if ai_engine._vehicle_model is not None else "demo"
+    if backend == "demo" and args.frames:
+        print("⚠️  YOLO not available — demo detections, violations are synthetic")
+
+    workers = [threading.Thread(target=ai_engine._ocr_worker, name=f"OCR-{i}", daemon=True)
+               for i in range(max(1, ai_engine.OCR_WORKERS))]
+    if ai_engine.CLIP_ENABLED:
+        workers.append(threading.Thread(target=ai_engine._clip_builder, name="Clips", daemon=True))
+    for t in workers:
+        t.start()
+
+    print(f"Replay: {len(jpegs)} frames @ {w}x{h}, {fps:g} fps media | light {args.light} | "
+          f"{'realtime' if args.realtime else 'max speed'} | backend={backend}\n")
+    run = replay(jpegs, fps, phases, args.realtime, args.cam)
+
+    t = time.perf_counter()
+    ai_engine._ocr_queue.join()               # pending violations finish OCR + process_violation
+    drain_s = time.perf_counter() - t
+    ai_engine._clip_queue.join()              # last clips wait for their post-roll
+    ai_engine._stop_event.set()
+
+    ticks  = run["ticks"]
+    tick   = summarize_ms(ticks)
+    stages = ai_engine._stage_stats()
+    perf   = ai_engine.get_perf_counters()
+    result = {
+        "frames":          len(jpegs),
+        "detected_frames": len(ticks),
+        "idle_frames":     run["idle_frames"],
+        "wall_s":          round(run["wall_s"], 2),
+        "pipeline_fps":    round(len(ticks) / sum(ticks), 1) if ticks else 0.0,
+        "replay_fps":      round(len(jpegs) / run["wall_s"], 1) if run["wall_s"] > 0 else 0.0,
+        "tick_ms":         tick,
+        "ocr_drain_s":     round(drain_s, 2),
+        "violations":      len(violations),
+        "clips":           len(clips),
+        "clip_kb_avg":     round(sum(clips.values()) / 1024 / len(clips), 1) if clips else 0.0,
+        "ocr_dropped":     perf["ocr_dropped"],
+        "yolo_skip_rate":  round(perf["motion_skipped"] /
+                                 max(1, perf["motion_skipped"] + perf["motion_inferred"]) * 100, 1),
+    }
+
+    print_table([result], ["frames", "detected_frames", "wall_s", "pipeline_fps", "replay_fps",
+                           "violations", "clips", "ocr_dropped", "yolo_skip_rate"])
+    print()
+    rows = [{"stage": k, **v} for k, v in stages.items() if k != "overhead"]
+    print_table(rows, ["stage", "n", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    if violations:
+        print()
+        print_table(violations, ["track_id", "plate", "type", "confidence", "cam_id", "image_kb"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "source":     args.frames or "demo",
+                "size":       [w, h],
+                "media_fps":  fps,
+                "light":      args.light,
+                "realtime":   args.realtime,
+                "backend":    backend,
+                "decode_reduce": ai_engine.ESP32_DECODE_REDUCE,
+                "motion_gate": ai_engine.MOTION_GATE_ENABLED,
+                "result":     result,
+                "stages":     stages,
+                "violations": violations,
+            }, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
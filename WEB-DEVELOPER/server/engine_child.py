@@ -0,0 +1,18 @@
+"""
+Entry module of the ai_engine child process (AI_ENGINE_MODE=process).
+
+multiprocessing's spawn start method re-runs the parent's __main__ module in
+the child (as __mp_main__) before unpickling the target. In production that
+is app.py, whose module level opens the DB, builds the Flask / Socket.IO app
+and registers the frame_ingest consumers. _EngineProcess.start() therefore
+presents this module as __main__ while spawning, so the child only imports
+this file (and ai_engine through main()).
+
+Keep it free of module-level side effects.
+"""
+
+
+def main(cfg: dict):
+    """Child process target: run the detection engine until the parent stops it."""
+    import ai_engine
+    ai_engine._engine_process_main(cfg)
@@ -0,0 +1,187 @@
+"""
+Bounded frame channel with an explicit overflow policy + drop accounting.
+
+Replaces the "latest value wins" frame globals between MQTT ingest, the
+detection loop and the MJPEG outputs, so every hop records how many frames
+arrived, how many were used and how many were lost on the way:
+
+    enqueued  frames put into the channel
+    consumed  frames delivered to a reader at least once
+    dropped   frames that left the channel (or never got in) unread
+    rejected  subset of dropped: put refused (drop_newest / block timeout)
+
+Policies when the channel is full:
+    drop_oldest  evict the oldest frame, accept the new one (latest wins)
+    drop_newest  refuse the new frame, keep what is queued
+    block        wait up to `timeout` for a consumer to make room, else refuse
+
+Two ways to read:
+    get() / get_nowait()   consume the oldest frame (one consumer, FIFO)
+    read_newer(seq)        peek the newest frame with sequence > seq, without
+                           removing it — for fan-out readers such as MJPEG
+                           clients; each reader keeps its own last seq
+
+A channel may share an external Condition (e.g. one per detection loop that
+waits on several cameras at once); it must wrap an RLock so a caller that
+already holds the condition can still call channel methods.
+
+Usage:
+    from frame_channel import FrameChannel
+    ch = FrameChannel("video_feed", capacity=1, policy="drop_oldest")
+    ch.put(jpeg)
+    seq, jpeg = ch.read_newer(seq, timeout=0.5)
+    ch.stats()   # → {"name", "policy", "capacity", "depth", "enqueued", ...}
+"""
+
+import threading
+import time
+from collections import deque
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class FrameChannel:
+    """Bounded FIFO of frames (any object, usually JPEG bytes) with counters."""
+
+    def __init__(self, name: str, capacity: int = 1, policy: str = "drop_oldest",
+                 cond: threading.Condition | None = None):
+        if policy not in POLICIES:
+            raise ValueError(f"{name}: unknown policy {policy!r} — expected one of {POLICIES}")
+        self.name     = name
+        self.capacity = max(1, int(capacity))
+        self.policy   = policy
+        self._cond    = cond if cond is not None else threading.Condition(threading.RLock())
+        self._items: "deque[tuple[int, object]]" = deque()   # (seq, frame), oldest first
+        self._seq      = 0       # sequence of the last frame put
+        self._read_seq = 0       # highest sequence delivered to any reader
+        self._last_put = 0.0     # time.time() of the last accepted frame
+        self.enqueued  = 0
+        self.consumed  = 0
+        self.dropped   = 0
+        self.rejected  = 0
+        self.high_water = 0
+        self.reader_skipped = 0  # fan-out: frames a reader never saw (sum over readers)
+        self.blocked_ms_total = 0.0
+
+    # ── write side ──────────────────────────────────────────────────────────
+
+    def put(self, frame, timeout: float | None = None) -> bool:
+        """
+        Add a frame; returns False if the policy refused it (counted as
+        dropped). `timeout` only applies to the block policy (None = forever).
+        """
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                if self.policy == "drop_oldest":
+                    self._evict_oldest()
+                elif self.policy == "drop_newest" or not self._wait_for_room(timeout):
+                    self.dropped  += 1
+                    self.rejected += 1
+                    return False
+            self._seq += 1
+            self._items.append((self._seq, frame))
+            self._last_put = time.time()
+            self.enqueued += 1
+            self.high_water = max(self.high_water, len(self._items))
+            self._cond.notify_all()
+            return True
+
+    def _evict_oldest(self):
+        seq, _ = self._items.popleft()
+        if seq > self._read_seq:
+            self.dropped += 1
+
+    def _wait_for_room(self, timeout: float | None) -> bool:
+        t0 = time.perf_counter()
+        ok = self._cond.wait_for(lambda: len(self._items) < self.capacity, timeout=timeout)
+        self.blocked_ms_total += (time.perf_counter() - t0) * 1000
+        return ok
+
+    # ── read side ───────────────────────────────────────────────────────────
+
+    def get_nowait(self):
+        """Consume the oldest frame, or None when empty."""
+        with self._cond:
+            if not self._items:
+                return None
+            seq, frame = self._items.popleft()
+            self._mark_read(seq)
+            self._cond.notify_all()          # room for a blocked producer
+            return frame
+
+    def get(self, timeout: float | None = None):
+        """Consume the oldest frame, waiting up to `timeout`; None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout=timeout):
+                return None
+            return self.get_nowait()
+
+    def read_newer(self, seq: int, timeout: float | None = None) -> tuple[int, object]:
+        """
+        Newest frame with a sequence above `seq`, without consuming it.
+        Waits up to `timeout` for one; returns (seq, None) when none arrived.
+        Frames put in between that this reader never saw are counted in
+        reader_skipped.
+        """
+        with self._cond:
+            if self._seq <= seq or not self._items:
+                self._cond.wait_for(lambda: self._seq > seq and self._items, timeout=timeout)
+            if self._seq <= seq or not self._items:
+                return seq, None
+            new_seq, frame = self._items[-1]
+            if seq:
+                self.reader_skipped += new_seq - seq - 1
+            self._mark_read(new_seq)
+            return new_seq, frame
+
+    def _mark_read(self, seq: int):
+        if seq > self._read_seq:
+            self._read_seq = seq
+            self.consumed += 1
+
+    def latest(self):
+        """Newest frame or None — a plain peek, not counted as a read."""
+        with self._cond:
+            return self._items[-1][1] if self._items else None
+
+    def clear(self):
+        """Discard queued frames (unread ones count as dropped)."""
+        with self._cond:
+            while self._items:
+                self._evict_oldest()
+            self._cond.notify_all()
+
+    # ── state ───────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def read_seq(self) -> int:
+        """Sequence of the newest frame delivered to a reader (0 = none yet)."""
+        return self._read_seq
+
+    @property
+    def last_put_ts(self) -> float:
+        return self._last_put
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "name":       self.name,
+                "policy":     self.policy,
+                "capacity":   self.capacity,
+                "depth":      len(self._items),
+                "high_water": self.high_water,
+                "enqueued":   self.enqueued,
+                "consumed":   self.consumed,
+                "dropped":    self.dropped,
+                "rejected":   self.rejected,
+                "drop_rate":  round(self.dropped / max(1, self.enqueued + self.rejected), 4),
+                "reader_skipped":   self.reader_skipped,
+                "blocked_ms_total": round(self.blocked_ms_total, 1),
+            }
@@ -0,0 +1,154 @@
+"""
+Single in-process ingest for ESP32-CAM frames received over MQTT.
+
+app.py's MQTT client is the only subscriber of traffic/esp32/frame[/<cam_id>]:
+its on_message hands frame messages to INGEST.on_message(), which parses each
+message once — camera id (topic suffix or "CAM:<id>\\n" header), raw JPEG vs
+base64 sniff — and passes the JPEG to every registered consumer:
+
+    app            → live_frames channel (/video_feed)
+    ai_engine      → _ingest_esp32_frame (camera slots, or the shm ring in
+                     process mode)
+
+so each frame crosses the broker once and is base64-decoded at most once.
+A raw payload is handed on without a copy: the paho bytes object itself, or
+a memoryview past the camera header (consumers only need the buffer protocol).
+
+Usage:
+    import frame_ingest
+    frame_ingest.INGEST.subscribe("video_feed", lambda cam_id, jpeg: ...)
+    client.subscribe(frame_ingest.INGEST.topics())
+    if frame_ingest.is_frame_topic(msg.topic):
+        frame_ingest.INGEST.on_message(msg.topic, msg.payload)
+"""
+
+import base64
+import logging
+import re
+import threading
+import time
+
+log = logging.getLogger("TrafficAI.FrameIngest")
+
+TOPIC_ESP32_FRAME = "traffic/esp32/frame"
+
+# Multi-camera: each ESP32-CAM publishes on traffic/esp32/frame/<cam_id>
+# (or on the bare topic with a "CAM:<cam_id>\n" header line before the JPEG).
+# Legacy firmware publishing on the bare topic without header → camera #1.
+TOPIC_ESP32_FRAME_CAM = TOPIC_ESP32_FRAME + "/+"
+FRAME_CAM_HEADER      = b"CAM:"
+DEFAULT_CAMERA_ID     = "esp32_cam_1"      # matches app.devices_state keys
+FRAME_QOS             = 0                  # high-frequency video: no redelivery
+
+# First two characters of base64 JPEG ("/9j/…", "//…") and PNG ("iVBOR…")
+_B64_PREFIXES = (b"//", b"/9", b"iV")
+
+_CAM_ID_RE = re.compile(r'^esp32[_\-]?cam[_\-]?0*(\d+)$', re.IGNORECASE)
+
+
+def normalize_camera_id(raw: str) -> str:
+    """'ESP32_CAM_01' / 'esp32-cam-1' / 'esp32_cam_1' → 'esp32_cam_1'."""
+    raw = raw.strip()
+    m = _CAM_ID_RE.match(raw)
+    return f"esp32_cam_{int(m.group(1))}" if m else raw.lower()
+
+
+def is_frame_topic(topic: str) -> bool:
+    return topic == TOPIC_ESP32_FRAME or topic.startswith(TOPIC_ESP32_FRAME + "/")
+
+
+def parse_frame_message(topic: str, payload: bytes) -> "tuple[str | None, bytes | memoryview | None, bool]":
+    """
+    ESP32 frame message → (cam_id, jpeg, was_base64).
+    Camera id comes from the topic suffix, else the optional "CAM:<id>\\n"
+    header, else DEFAULT_CAMERA_ID. Returns (None, None, False) for
+    non-frame topics. Raises binascii.Error on a corrupt base64 payload.
+    """
+    if topic == TOPIC_ESP32_FRAME:
+        cam_id = DEFAULT_CAMERA_ID
+    elif topic.startswith(TOPIC_ESP32_FRAME + "/"):
+        cam_id = normalize_camera_id(topic[len(TOPIC_ESP32_FRAME) + 1:])
+    else:
+        return None, None, False
+
+    data = memoryview(payload)
+    if data[:len(FRAME_CAM_HEADER)] == FRAME_CAM_HEADER:
+        nl = bytes(data[:80]).find(b"\n")
+        if nl > 0:
+            cam_id = normalize_camera_id(bytes(data[len(FRAME_CAM_HEADER):nl]).decode(errors="ignore"))
+            data   = data[nl + 1:]
+
+    if bytes(data[:2]) in _B64_PREFIXES:
+        return cam_id, base64.b64decode(data), True
+    return cam_id, (payload if data.nbytes == len(payload) else data), False
+
+
+class FrameIngest:
+    """Parses each ESP32 frame message once and fans the JPEG out to consumers."""
+
+    def __init__(self):
+        self._consumers: "list[tuple[str, object]]" = []
+        self._lock   = threading.Lock()
+        self._counts = {"frames": 0, "raw": 0, "base64": 0, "bytes": 0, "errors": 0, "parse_ms_total": 0.0}
+        self._consumer_errors: dict[str, int] = {}
+
+    def subscribe(self, name: str, fn):
+        """Register fn(cam_id, jpeg) — called on the MQTT thread, must not block long."""
+        with self._lock:
+            self._consumers = [(n, f) for n, f in self._consumers if n != name] + [(name, fn)]
+            self._consumer_errors.setdefault(name, 0)
+
+    def unsubscribe(self, name: str):
+        with self._lock:
+            self._consumers = [(n, f) for n, f in self._consumers if n != name]
+
+    @staticmethod
+    def topics() -> list[tuple[str, int]]:
+        """Subscriptions for the owning MQTT client."""
+        return [(TOPIC_ESP32_FRAME, FRAME_QOS), (TOPIC_ESP32_FRAME_CAM, FRAME_QOS)]
+
+    def on_message(self, topic: str, payload: bytes) -> bool:
+        """Parse one frame message and deliver it; False if not a frame / undecodable."""
+        t0 = time.perf_counter()
+        try:
+            cam_id, jpeg, was_b64 = parse_frame_message(topic, payload)
+        except Exception as e:
+            with self._lock:
+                self._counts["errors"] += 1
+            log.debug("ESP32 frame decode error [%s]: %s", topic, e)
+            return False
+        if cam_id is None or not len(jpeg):
+            return False
+        with self._lock:
+            c = self._counts
+            c["frames"] += 1
+            c["base64" if was_b64 else "raw"] += 1
+            c["bytes"]  += len(jpeg)
+            c["parse_ms_total"] += (time.perf_counter() - t0) * 1000
+            consumers = self._consumers
+
+        for name, fn in consumers:
+            try:
+                fn(cam_id, jpeg)
+            except Exception as e:
+                with self._lock:
+                    self._consumer_errors[name] = self._consumer_errors.get(name, 0) + 1
+                log.debug("Frame consumer %s error [%s]: %s", name, cam_id, e)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self._counts)
+            consumers = {n: {"errors": self._consumer_errors.get(n, 0)} for n, _ in self._consumers}
+        return {
+            "frames":       c["frames"],
+            "raw":          c["raw"],
+            "base64":       c["base64"],
+            "errors":       c["errors"],
+            "mb_total":     round(c["bytes"] / 1048576, 2),
+            "parse_ms_avg": round(c["parse_ms_total"] / max(1, c["frames"]), 3),
+            "consumers":    consumers,
+        }
+
+
+INGEST = FrameIngest()
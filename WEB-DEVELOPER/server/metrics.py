@@ -0,0 +1,289 @@
+"""
+In-process metrics registry + Prometheus text exposition (format 0.0.4).
+
+Counters, gauges and histograms are updated on the hot paths of app.py and
+rendered by GET /metrics. Values that already live elsewhere (ai_engine
+_perf, system_stats) are read at scrape time by registered collectors, so a
+scrape only copies in-memory state — it never touches SQLite.
+
+Usage:
+    import metrics
+    REQS = metrics.counter("http_requests_total", "HTTP requests", ("route",))
+    REQS.labels("/api/stats").inc()
+    body = metrics.REGISTRY.render()
+"""
+
+import abc
+import math
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if v == -math.inf:
+        return "-Inf"
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    if isinstance(v, int) or float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _labels_str(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# METRIC TYPES
+# ════════════════════════════════════════════════════════════════════════════
+
+class _Metric(abc.ABC):
+    """Base: one metric family, children keyed by label values."""
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = ()):
+        self.name       = name
+        self.doc        = doc
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock      = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Value holder for one label set."""
+
+    def labels(self, *values):
+        """Child for these label values (created on first use)."""
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {values}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabeled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames} — use .labels()")
+        return self._children[()]
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]:
+        """Exposition lines for every child."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabeled().inc(amount)
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels_str(self.labelnames, k)} {_fmt(c.value)}"
+                for k, c in list(self._children.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self._unlabeled().dec(amount)
+
+    def set(self, value: float):
+        self._unlabeled().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # last = +Inf
+        self.sum    = 0.0
+        self._lock  = threading.Lock()
+
+    def observe(self, value: float):
+        i = 0
+        for i, b in enumerate(self.bounds):
+            if value <= b:
+                break
+        else:
+            i = len(self.bounds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum       += value
+
+    def time(self):
+        """Context manager: observe elapsed seconds of the with-block."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._t0)
+        return False
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (seconds by convention)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, doc, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabeled().observe(value)
+
+    def time(self):
+        return self._unlabeled().time()
+
+    def samples(self) -> list[str]:
+        out = []
+        for key, c in list(self._children.items()):
+            with c._lock:
+                counts, total = list(c.counts), c.sum
+            acc = 0
+            for b, n in zip(self.buckets + (math.inf,), counts):
+                acc += n
+                le = f'le="{_fmt(b)}"'
+                out.append(f"{self.name}_bucket{_labels_str(self.labelnames, key, le)} {acc}")
+            out.append(f"{self.name}_sum{_labels_str(self.labelnames, key)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_labels_str(self.labelnames, key)} {acc}")
+        return out
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ════════════════════════════════════════════════════════════════════════════
+
+class Family:
+    """
+    Scrape-time metric family returned by collectors:
+    samples = [(suffix, {label: value}, value)], suffix "" for plain samples.
+    """
+    __slots__ = ("name", "kind", "doc", "samples")
+
+    def __init__(self, name: str, kind: str, doc: str, samples: list | None = None):
+        self.name, self.kind, self.doc = name, kind, doc
+        self.samples = samples if samples is not None else []
+
+    def add(self, value: float, suffix: str = "", **labels):
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples:
+            names = tuple(labels)
+            lines.append(f"{self.name}{suffix}{_labels_str(names, tuple(labels[n] for n in names))} {_fmt(value)}")
+        return "\n".join(lines)
+
+
+class Registry:
+    """Holds metrics + collectors; render() produces the /metrics body."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list = []
+        self._lock = threading.Lock()
+        self.scrape_errors = 0
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, fn):
+        """fn() → iterable of Family, called on every scrape (must be cheap, no I/O)."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics.values()), list(self._collectors)
+        blocks = [m.render() for m in metrics]
+        for fn in collectors:
+            try:
+                blocks.extend(f.render() for f in fn())
+            except Exception:
+                self.scrape_errors += 1
+        blocks.append(Family("metrics_scrape_errors_total", "counter",
+                             "Collector failures during /metrics scrapes").add(self.scrape_errors).render())
+        return "\n".join(blocks) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, doc: str, labelnames: tuple = ()) -> Counter:
+    return REGISTRY.register(Counter(name, doc, labelnames))
+
+
+def gauge(name: str, doc: str, labelnames: tuple = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, doc, labelnames))
+
+
+def histogram(name: str, doc: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, doc, labelnames, buckets))
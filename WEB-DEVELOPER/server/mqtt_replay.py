@@ -0,0 +1,401 @@
+"""
+Record and replay MQTT traffic (ESP32 frames, AI context, light state)
+without a broker — deterministic load tests of the ingest + detection path.
+
+Recording = two append-only files:
+    <name>.mqrec   data:  MAGIC, then records  [u32 payload_len][f64 ts][u16 topic_len][topic][payload]
+    <name>.mqidx   index: MAGIC, then entries  [u64 offset][f64 ts][u32 record_len]
+Payloads are stored exactly as received (raw / base64 JPEG, "CAM:" header).
+The index is only an accelerator: records written after the last index entry
+(crash, kill -9) are recovered by scanning the data file, and a truncated
+trailing record is ignored.
+
+Replay calls the same on_message callbacks the paho clients use:
+ai_engine._on_mqtt_message (frames → camera slots → detection) and/or
+app._on_mqtt_message, at original speed (--speed 1), accelerated (--speed 4)
+or as fast as possible (--speed 0). Detection runs on the replayed ESP32
+frames only — no webcam / demo fallback before, between or after them.
+
+Usage (from WEB-DEVELOPER/server):
+    python mqtt_replay.py record --out logs/crossing.mqrec --duration 120
+    python mqtt_replay.py info   logs/crossing.mqrec
+    python mqtt_replay.py replay logs/crossing.mqrec --target ai --speed 0
+    python mqtt_replay.py replay logs/crossing.mqrec --target both --speed 2 --loop 3
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+try:
+    import paho.mqtt.client as mqtt
+    _MQTT_AVAILABLE = True
+except ImportError:
+    _MQTT_AVAILABLE = False
+    mqtt = None
+
+DATA_MAGIC  = b"MQREC\x00\x01\x00"
+INDEX_MAGIC = b"MQIDX\x00\x01\x00"
+_REC_HDR    = struct.Struct("<IdH")     # payload_len, ts, topic_len
+_IDX_ENTRY  = struct.Struct("<QdI")     # offset, ts, record_len
+
+# Same topics app.py / ai_engine.py subscribe to for the ingest path
+DEFAULT_TOPICS = ("traffic/esp32/frame", "traffic/esp32/frame/+",
+                  "traffic/ai/context", "traffic/light/state")
+FLUSH_EVERY    = 32      # records between file flushes while recording
+
+
+def _index_path(data_path: Path) -> Path:
+    return data_path.with_suffix(".mqidx")
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# RECORDER
+# ════════════════════════════════════════════════════════════════════════════
+
+class MqttRecorder:
+    """Appends (ts, topic, payload) records; thread-safe (paho network thread)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new = not self.path.exists() or self.path.stat().st_size == 0
+        self._data  = open(self.path, "ab")
+        self._index = open(_index_path(self.path), "ab")
+        if new:
+            self._data.write(DATA_MAGIC)
+            self._index.truncate(0)
+            self._index.write(INDEX_MAGIC)
+        elif self._index.tell() == 0:
+            self._index.write(INDEX_MAGIC)
+        self._lock    = threading.Lock()
+        self._pending = 0
+        self.records  = 0
+        self.bytes    = 0
+        self.per_topic: dict[str, int] = {}
+
+    def write(self, topic: str, payload: bytes, ts: float | None = None):
+        ts = time.time() if ts is None else ts
+        t  = topic.encode("utf-8")
+        header = _REC_HDR.pack(len(payload), ts, len(t))
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(header)
+            self._data.write(t)
+            self._data.write(payload)
+            rec_len = _REC_HDR.size + len(t) + len(payload)
+            self._index.write(_IDX_ENTRY.pack(offset, ts, rec_len))
+            self.records += 1
+            self.bytes   += rec_len
+            self.per_topic[topic] = self.per_topic.get(topic, 0) + 1
+            self._pending += 1
+            if self._pending >= FLUSH_EVERY:
+                self._flush()
+
+    def _flush(self):
+        self._data.flush()      # data before index → index never points past the data
+        self._index.flush()
+        self._pending = 0
+
+    def on_message(self, client, userdata, msg):
+        """paho on_message callback."""
+        self.write(msg.topic, bytes(msg.payload))
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._data.close()
+            self._index.close()
+
+
+def record(out: str, host: str, port: int, topics: tuple, duration: float | None):
+    """Subscribe to `topics` on the broker and record until duration / Ctrl+C."""
+    if not _MQTT_AVAILABLE:
+        raise SystemExit("paho-mqtt not installed — pip install paho-mqtt")
+    rec = MqttRecorder(out)
+    client = mqtt.Client(client_id=f"MqttRecorder-{int(time.time())}")
+    client.on_message = rec.on_message
+    client.on_connect = lambda c, u, f, rc: c.subscribe([(t, 0) for t in topics]) if rc == 0 else None
+    client.connect(host, port, 60)
+    client.loop_start()
+    print(f"● Recording {', '.join(topics)} from {host}:{port} → {out} (Ctrl+C to stop)")
+    t0 = time.time()
+    try:
+        while duration is None or time.time() - t0 < duration:
+            time.sleep(1.0)
+            print(f"\r  {rec.records} msgs, {rec.bytes / 1e6:.1f} MB, {time.time() - t0:.0f}s", end="")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop_stop()
+        client.disconnect()
+        rec.close()
+    print(f"\n✅ {rec.records} messages recorded: {json.dumps(rec.per_topic)}")
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# READER
+# ════════════════════════════════════════════════════════════════════════════
+
+class MqttRecording:
+    """Read side of a recording: index entries + random-access record reads."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._data = open(self.path, "rb")
+        if self._data.read(len(DATA_MAGIC)) != DATA_MAGIC:
+            raise ValueError(f"{self.path}: not an MQTT recording")
+        self.size    = os.fstat(self._data.fileno()).st_size
+        self.entries = self._load_index()
+        self.recovered = 0
+        self._scan_tail()
+
+    def _load_index(self) -> list[tuple[int, float, int]]:
+        idx = _index_path(self.path)
+        if not idx.exists():
+            return []
+        raw = idx.read_bytes()
+        if raw[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            return []
+        body = raw[len(INDEX_MAGIC):]
+        body = body[:len(body) - len(body) % _IDX_ENTRY.size]
+        entries = [e for e in _IDX_ENTRY.iter_unpack(body)]
+        # drop entries pointing past the data (index flushed after a data truncation)
+        while entries and entries[-1][0] + entries[-1][2] > self.size:
+            entries.pop()
+        # index must cover the data contiguously from the start, else rescan it all
+        pos = len(DATA_MAGIC)
+        for offset, _ts, rec_len in entries:
+            if offset != pos:
+                return []
+            pos += rec_len
+        return entries
+
+    def _scan_tail(self):
+        """Recover records written after the last index entry."""
+        pos = self.entries[-1][0] + self.entries[-1][2] if self.entries else len(DATA_MAGIC)
+        while pos + _REC_HDR.size <= self.size:
+            self._data.seek(pos)
+            plen, ts, tlen = _REC_HDR.unpack(self._data.read(_REC_HDR.size))
+            rec_len = _REC_HDR.size + tlen + plen
+            if pos + rec_len > self.size:
+                break                               # truncated trailing record
+            self.entries.append((pos, ts, rec_len))
+            self.recovered += 1
+            pos += rec_len
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def read(self, i: int) -> tuple[float, str, bytes]:
+        offset, ts, rec_len = self.entries[i]
+        self._data.seek(offset)
+        buf = self._data.read(rec_len)
+        plen, _ts, tlen = _REC_HDR.unpack_from(buf)
+        topic = buf[_REC_HDR.size:_REC_HDR.size + tlen].decode("utf-8")
+        return ts, topic, buf[_REC_HDR.size + tlen:]
+
+    def __iter__(self):
+        for i in range(len(self.entries)):
+            yield self.read(i)
+
+    def info(self) -> dict:
+        per_topic: dict[str, dict] = {}
+        for ts, topic, payload in self:
+            t = per_topic.setdefault(topic, {"messages": 0, "bytes": 0})
+            t["messages"] += 1
+            t["bytes"]    += len(payload)
+        dur = self.entries[-1][1] - self.entries[0][1] if self.entries else 0.0
+        return {"messages": len(self), "duration_s": round(dur, 2), "bytes": self.size,
+                "recovered_unindexed": self.recovered, "topics": per_topic}
+
+    def close(self):
+        self._data.close()
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# REPLAY
+# ════════════════════════════════════════════════════════════════════════════
+
+class ReplayMessage:
+    """Duck-typed paho MQTTMessage (what the on_message callbacks read)."""
+    __slots__ = ("topic", "payload", "qos", "retain", "timestamp")
+
+    def __init__(self, topic: str, payload: bytes, ts: float):
+        self.topic, self.payload, self.timestamp = topic, payload, ts
+        self.qos, self.retain = 0, False
+
+
+def replay(recording: MqttRecording, handlers: list, speed: float = 1.0, loops: int = 1) -> dict:
+    """
+    Deliver every record to each on_message handler (client=None, userdata=None).
+    speed: 1 = original timing, N = N× faster, 0 = no pacing.
+    Returns delivery stats incl. how late messages were vs. their schedule.
+    """
+    if not len(recording):
+        return {"messages": 0}
+    ts0   = recording.entries[0][1]
+    n     = len(recording)
+    span  = recording.entries[-1][1] - ts0
+    span += span / (n - 1) if n > 1 else 0.0      # one average gap between loops
+    sent, late_ms, errors = 0, [], 0
+    t_start = time.perf_counter()
+    for loop in range(loops):
+        loop_off = loop * span
+        for ts, topic, payload in recording:
+            if speed > 0:
+                due = t_start + (ts - ts0 + loop_off) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    late_ms.append(-delay * 1000)
+            msg = ReplayMessage(topic, payload, ts)
+            for h in handlers:
+                try:
+                    h(None, None, msg)
+                except Exception:
+                    errors += 1
+            sent += 1
+    wall = time.perf_counter() - t_start
+    late_ms.sort()
+    return {
+        "messages":    sent,
+        "wall_s":      round(wall, 3),
+        "msg_per_s":   round(sent / wall, 1) if wall > 0 else 0.0,
+        "speed":       speed or "max",
+        "late":        len(late_ms),
+        "late_ms_p95": round(late_ms[int(len(late_ms) * 0.95)], 2) if late_ms else 0.0,
+        "late_ms_max": round(late_ms[-1], 2) if late_ms else 0.0,
+        "handler_errors": errors,
+    }
+
+
+def _stub_app(violations: list) -> types.ModuleType:
+    stub = types.ModuleType("app")
+    stub.process_violation = lambda payload: violations.append(
+        {k: v for k, v in payload.items() if k != "image_bytes"})
+    stub.set_ai_frame      = lambda frame_bytes: None
+    stub.update_ai_context = lambda vehicles, fps, **extra: None
+    stub.save_violation_clip = lambda clip_name, data: None
+    return stub
+
+
+def _replay_detection(ai, stop: threading.Event):
+    """
+    Detection ticks on the replayed ESP32 cameras only (_get_frames →
+    _detection_tick, as in benchmarks/bench_replay_pipeline.py). Unlike the
+    live _detection_loop there is no webcam / demo fallback: with no fresh
+    ESP32 frame the tick is skipped, so the counters and violations cover
+    the recording alone.
+    """
+    ai._yolo_ready.wait(timeout=120)
+    while not stop.is_set():
+        light = ai._AppRef.get_light()
+        now = time.time()
+        with ai._frame_cond:
+            fresh = any(slot.is_fresh(now) for cid, slot in ai._cameras.items()
+                        if cid != ai.LOCAL_CAMERA_ID)
+        if light == "GREEN" or not fresh:
+            stop.wait(0.02)
+            continue
+        t = time.perf_counter()
+        sources = [(slot, frame) for slot, frame in ai._get_frames(None)
+                   if slot.cam_id != ai.LOCAL_CAMERA_ID]
+        if sources:
+            ai._detection_tick(sources, light, time.time())
+            ai._stages["tick"].record((time.perf_counter() - t) * 1000)
+
+
+def _start_ai_detection(app_module) -> tuple:
+    """
+    ai_engine replay detection + OCR threads without its MQTT client (replay
+    feeds it). Returns (ai_engine, detection stop event, detection thread).
+    """
+    import ai_engine
+    ai_engine._AppRef.set(app_module)
+    threading.Thread(target=ai_engine._load_models_worker, name="AI-ModelLoader", daemon=True).start()
+    stop = threading.Event()
+    det = threading.Thread(target=_replay_detection, args=(ai_engine, stop),
+                           name="AI-ReplayDetection", daemon=True)
+    det.start()
+    for i in range(max(1, ai_engine.OCR_WORKERS)):
+        threading.Thread(target=ai_engine._ocr_worker, name=f"AI-OCR-{i + 1}", daemon=True).start()
+    if ai_engine.CLIP_ENABLED:
+        threading.Thread(target=ai_engine._clip_builder, name="AI-Clips", daemon=True).start()
+    return ai_engine, stop, det
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("record", help="record broker traffic to a file")
+    r.add_argument("--out", required=True)
+    r.add_argument("--host", default=os.getenv("MQTT_HOST", "broker.hivemq.com"))
+    r.add_argument("--port", type=int, default=int(os.getenv("MQTT_PORT", 1883)))
+    r.add_argument("--topics", default=",".join(DEFAULT_TOPICS))
+    r.add_argument("--duration", type=float, help="seconds (default: until Ctrl+C)")
+
+    i = sub.add_parser("info", help="summary of a recording")
+    i.add_argument("path")
+
+    p = sub.add_parser("replay", help="replay a recording into ai_engine / app")
+    p.add_argument("path")
+    p.add_argument("--target", choices=("ai", "app", "both"), default="ai")
+    p.add_argument("--speed", type=float, default=1.0, help="1 = original, N = N× faster, 0 = max")
+    p.add_argument("--loop", type=int, default=1, help="replay the recording N times")
+    p.add_argument("--settle", type=float, default=2.0,
+                   help="seconds to let detection / OCR finish after the last message")
+    p.add_argument("--json", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    if args.cmd == "record":
+        record(args.out, args.host, args.port,
+               tuple(t.strip() for t in args.topics.split(",") if t.strip()), args.duration)
+        return
+
+    rec = MqttRecording(args.path)
+    if args.cmd == "info":
+        print(json.dumps(rec.info(), indent=2))
+        return
+
+    handlers, violations, ai = [], [], None
+    if args.target in ("app", "both"):
+        import app as app_module            # app's module-level setup (DB, Flask) — no broker
+        handlers.append(app_module._on_mqtt_message)
+    if args.target in ("ai", "both"):
+        ai, det_stop, det = _start_ai_detection(app_module if args.target == "both"
+                                                else _stub_app(violations))
+        ai._models_ready.wait(timeout=120)
+        handlers.insert(0, ai._on_mqtt_message)
+
+    print(f"▶ Replaying {len(rec)} messages → {args.target} at speed {args.speed or 'max'} ×{args.loop}")
+    stats = replay(rec, handlers, args.speed, args.loop)
+    if ai is not None:
+        time.sleep(args.settle)            # last frames still being analyzed
+        det_stop.set()                     # no new OCR work from here on
+        det.join(timeout=5)
+        ai._ocr_queue.join()
+        ai._clip_queue.join()
+        stats["ai"] = {k: v for k, v in ai.get_esp32_status().items()
+                       if k in ("total_frames", "duplicate_frames_avoided", "violations_found",
+                                "scheduler", "stages", "decode", "ocr_queue", "frame_channels")}
+        stats["violations_collected"] = len(violations)
+        ai._stop_event.set()
+    rec.close()
+    print(json.dumps(stats, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        print(f"\nResults → {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())